@@ -0,0 +1,144 @@
+"""
+캡처 백엔드 CPU 벤치마크: cv2.VideoCapture vs PyAVCapture (디코드 생략 + 디코더 안에서 축소)
+
+H.264 테스트 영상(기본 1080p 25fps, GOP 2초)을 만든 뒤 캡처 프로세스와 같은 방식으로 읽습니다.
+소비 fps마다 기록 주기가 안 된 프레임은 grab()으로 버리고, 기록할 프레임만 read()해 출력 크기로 맞춥니다.
+- opencv: 전체 크기 디코드 + BGR 변환 후 cv2.resize
+- pyav_full: 모든 프레임 디코드, 변환/축소는 swscale 한 번
+- pyav_auto: 소비 fps에 따라 NONREF/NONKEY로 디코드 자체를 줄임
+영상 길이 대비 CPU 시간(모든 스레드 합)을 "실시간 카메라 1대당 CPU %"로 환산해 비교합니다.
+
+사용 예:
+    python bench/bench_capture_backend.py --seconds 20 --fps 15 5 1 0.5
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions import pyav_capture  # noqa: E402
+
+
+def make_clip(path, seconds, width, height, fps, gop_sec, bframes):
+    import av
+
+    out = av.open(path, "w")
+    stream = out.add_stream("libx264", rate=fps)
+    stream.width, stream.height, stream.pix_fmt = width, height, "yuv420p"
+    stream.options = {"g": str(int(fps * gop_sec)), "bf": str(bframes), "preset": "veryfast", "crf": "28"}
+    rng = np.random.default_rng(0)
+    noise = rng.integers(0, 40, (height, width, 3), dtype=np.uint8)
+    for i in range(int(seconds * fps)):
+        # 움직이는 물체 + 잡음 배경 (실제 카메라처럼 P 프레임이 비어 있지 않게)
+        img = np.roll(noise, i * 3, axis=1)
+        x = (i * 12) % (width - 200)
+        img[height // 3:height // 3 + 200, x:x + 200] = (0, 160, 255)
+        for packet in stream.encode(av.VideoFrame.from_ndarray(img, format="bgr24")):
+            out.mux(packet)
+    for packet in stream.encode():
+        out.mux(packet)
+    out.close()
+
+
+def consume(cap, target_fps, out_size, resize):
+    """캡처 프로세스 기록 루프 흉내 (벽시계 대신 스트림 시각 기준)"""
+    camera_fps = cap.get(cv2.CAP_PROP_FPS) or 25.0
+    interval = 1.0 / target_fps
+    next_due = 0.0
+    delivered = 0
+    while True:
+        position = cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0
+        if position + 1.0 / camera_fps < next_due:
+            if not cap.grab():
+                break
+            continue
+        ok, frame = cap.read()
+        if not ok or frame is None:
+            break
+        if resize and (frame.shape[1], frame.shape[0]) != out_size:
+            frame = cv2.resize(frame, out_size, interpolation=cv2.INTER_AREA)
+        delivered += 1
+        next_due = max(next_due + interval, cap.get(cv2.CAP_PROP_POS_MSEC) / 1000.0)
+    return delivered
+
+
+def run(mode, path, target_fps, out_size, video_sec):
+    cpu0, wall0 = time.process_time(), time.perf_counter()
+    if mode == "opencv":
+        cap = cv2.VideoCapture(path, cv2.CAP_FFMPEG)
+        delivered = consume(cap, target_fps, out_size, resize=True)
+        extra = {}
+    else:
+        cap = pyav_capture.PyAVCapture(
+            path,
+            max_width=out_size[0],
+            max_height=out_size[1],
+            target_fps=target_fps,
+            skip="auto" if mode == "pyav_auto" else "none",
+        )
+        delivered = consume(cap, target_fps, out_size, resize=False)
+        stats = cap.stats()
+        extra = {"decoded": stats["decoded"], "skip_mode": stats["skip_mode"]}
+    cap.release()
+    cpu = time.process_time() - cpu0
+    return {
+        "mode": mode,
+        "target_fps": target_fps,
+        "delivered": delivered,
+        **extra,
+        "cpu_sec": round(cpu, 2),
+        "wall_sec": round(time.perf_counter() - wall0, 2),
+        "cpu_percent_per_camera": round(cpu / video_sec * 100, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--camera-fps", type=int, default=25)
+    parser.add_argument("--gop-sec", type=float, default=2.0)
+    parser.add_argument("--bframes", type=int, default=0, help="IP 카메라는 대부분 0 (B 프레임 없음)")
+    parser.add_argument("--out-size", default="1280x720")
+    parser.add_argument("--fps", type=float, nargs="+", default=[15, 5, 1, 0.5])
+    parser.add_argument("--clip", default=None, help="직접 준비한 영상 (없으면 생성)")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    if not pyav_capture.available():
+        sys.exit("PyAV가 필요합니다: pip install av")
+    width, height = (int(v) for v in args.size.split("x"))
+    out_size = tuple(int(v) for v in args.out_size.split("x"))
+    path = args.clip
+    if path is None:
+        path = os.path.join(tempfile.mkdtemp(prefix="capture_bench_"), "clip.mp4")
+        make_clip(path, args.seconds, width, height, args.camera_fps, args.gop_sec, args.bframes)
+
+    results = []
+    for target_fps in args.fps:
+        for mode in ("opencv", "pyav_full", "pyav_auto"):
+            results.append(run(mode, path, target_fps, out_size, args.seconds))
+
+    report = {
+        "benchmark": "capture_backend",
+        "clip": {"size": [width, height], "fps": args.camera_fps, "gop_sec": args.gop_sec, "bframes": args.bframes},
+        "video_sec": args.seconds,
+        "out_size": list(out_size),
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,281 @@
+"""
+프레임 버스 벤치마크: 단일 프로세스(스레드) 구성 vs 공유 메모리 프레임 버스(다중 프로세스) 구성
+
+파이프라인(카메라 N대): 캡처(디코드) -> 추론 -> 스트림(리사이즈 + JPEG 인코딩)
+- 디코드: 미리 인코딩한 JPEG를 cv2.imdecode (RTSP 디코드 대역)
+- 추론: 640x640 리사이즈 + 블러 + --infer-py-ms 만큼 GIL을 잡는 파이썬 연산 (트래커/후처리 대역)
+- single: 한 프로세스 안에서 캡처 스레드 N개 + 추론 스레드 + 스트림 스레드 (현재 main.py 구조)
+- bus: 캡처 프로세스 N개가 FrameRing에 기록, 추론/스트림 프로세스가 복사 없이 읽음
+
+결과: 단계별 처리 fps(전체 합), 캡처 -> 스트림 지연 p50/p99. 코어 수가 적으면 이득이 작음 (cpu_count 함께 출력)
+
+사용 예:
+    python bench/bench_frame_bus.py --cameras 4 --seconds 10 --size 1280x720
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.frame_bus import FrameRing  # noqa: E402
+
+
+def make_jpeg(size, index):
+    width, height = size
+    frame = np.zeros((height, width, 3), dtype=np.uint8)
+    cv2.rectangle(frame, (0, height // 2), (width, height), (60, 70, 80), -1)
+    cv2.rectangle(frame, (40 * index, height // 3), (40 * index + 160, height // 3 + 300), (40, 90, 200), -1)
+    noise = np.random.default_rng(index).integers(0, 16, size=(height, width, 1), dtype=np.uint8)
+    frame = cv2.add(frame, np.repeat(noise, 3, axis=2))
+    return cv2.imencode(".jpg", frame, [int(cv2.IMWRITE_JPEG_QUALITY), 85])[1].tobytes()
+
+
+def infer(frame, py_ms):
+    small = cv2.resize(frame, (640, 640))
+    cv2.GaussianBlur(small, (5, 5), 0)
+    # GIL을 잡는 파이썬 후처리 (트래커 갱신/박스 변환 등)
+    end = time.perf_counter() + py_ms / 1000.0
+    acc = 0
+    while time.perf_counter() < end:
+        acc += 1
+    return acc
+
+
+def stream(frame, stream_size):
+    return cv2.imencode(".jpg", cv2.resize(frame, stream_size), [int(cv2.IMWRITE_JPEG_QUALITY), 75])[1]
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))] * 1000, 2)
+
+
+def summarize(layout, seconds, captured, inferred, streamed, latencies, extra=None):
+    result = {
+        "layout": layout,
+        "capture_fps": round(captured / seconds, 1),
+        "infer_fps": round(inferred / seconds, 1),
+        "end_to_end_fps": round(streamed / seconds, 1),
+        "latency_ms_p50": percentile(latencies, 50),
+        "latency_ms_p99": percentile(latencies, 99),
+    }
+    if extra:
+        result.update(extra)
+    return result
+
+
+# --- single: 한 프로세스 안의 스레드 ---
+def run_single(args, jpegs):
+    latest = [None] * args.cameras
+    stop = threading.Event()
+    counts = {"captured": 0, "inferred": 0, "streamed": 0}
+    latencies = []
+    min_interval = 1.0 / args.fps if args.fps > 0 else 0.0
+
+    def capture(i):
+        while not stop.is_set():
+            start = time.time()
+            frame = cv2.imdecode(np.frombuffer(jpegs[i], np.uint8), cv2.IMREAD_COLOR)
+            latest[i] = (counts["captured"], start, frame)
+            counts["captured"] += 1
+            wait = min_interval - (time.time() - start)
+            if wait > 0:
+                time.sleep(wait)
+
+    def inference():
+        seen = [None] * args.cameras
+        while not stop.is_set():
+            busy = False
+            for i in range(args.cameras):
+                item = latest[i]
+                if item is None or item[0] == seen[i]:
+                    continue
+                seen[i] = item[0]
+                infer(item[2], args.infer_py_ms)
+                counts["inferred"] += 1
+                busy = True
+            if not busy:
+                time.sleep(0.001)
+
+    def streaming():
+        seen = [None] * args.cameras
+        while not stop.is_set():
+            busy = False
+            for i in range(args.cameras):
+                item = latest[i]
+                if item is None or item[0] == seen[i]:
+                    continue
+                seen[i] = item[0]
+                stream(item[2], args.stream_size)
+                counts["streamed"] += 1
+                latencies.append(time.time() - item[1])
+                busy = True
+            if not busy:
+                time.sleep(0.001)
+
+    threads = [threading.Thread(target=capture, args=(i,), daemon=True) for i in range(args.cameras)]
+    threads += [threading.Thread(target=inference, daemon=True), threading.Thread(target=streaming, daemon=True)]
+    cpu_start = time.process_time()
+    for t in threads:
+        t.start()
+    time.sleep(args.warmup)
+    base = dict(counts)
+    del latencies[:]
+    time.sleep(args.seconds)
+    snapshot = {k: counts[k] - base[k] for k in counts}
+    lat = list(latencies)
+    stop.set()
+    for t in threads:
+        t.join(timeout=2)
+    cpu_sec = time.process_time() - cpu_start
+    return summarize(
+        "single", args.seconds, snapshot["captured"], snapshot["inferred"], snapshot["streamed"], lat,
+        {"cpu_sec": round(cpu_sec, 2)},
+    )
+
+
+# --- bus: 캡처 프로세스 N개 + 추론 프로세스 + 스트림 프로세스 ---
+def bus_capture(ring_name, jpeg, fps, stop, start_evt, measure, result_queue):
+    ring = FrameRing(ring_name)
+    min_interval = 1.0 / fps if fps > 0 else 0.0
+    frames = np.frombuffer(jpeg, np.uint8)
+    start_evt.wait()
+    count = base = 0
+    while not stop.is_set():
+        start = time.time()
+        ring.write(cv2.imdecode(frames, cv2.IMREAD_COLOR), start)
+        count += 1
+        if measure.is_set() and not base:
+            base = count
+        wait = min_interval - (time.time() - start)
+        if wait > 0:
+            time.sleep(wait)
+    result_queue.put(("captured", count - base, [], time.process_time()))
+    ring.close(unlink=False)
+
+
+def bus_reader(role, ring_names, py_ms, stream_size, stop, start_evt, measure, result_queue):
+    rings = [FrameRing(name) for name in ring_names]
+    seen = [0] * len(rings)
+    latencies = []
+    torn = count = base = 0
+    start_evt.wait()
+    while not stop.is_set():
+        busy = False
+        for i, ring in enumerate(rings):
+            ref = ring.latest(after_seq=seen[i])
+            if ref is None:
+                continue
+            seen[i] = ref.seq
+            if role == "inferred":
+                infer(ref.array, py_ms)
+            else:
+                stream(ref.array, stream_size)
+            if not ref.valid():
+                torn += 1
+                continue
+            count += 1
+            if measure.is_set():
+                if not base:
+                    base = count
+                if role == "streamed":
+                    latencies.append(time.time() - ref.ts)
+            busy = True
+        if not busy:
+            time.sleep(0.001)
+    result_queue.put((role, count - base, latencies, time.process_time(), torn))
+    for ring in rings:
+        ring.close(unlink=False)
+
+
+def run_bus(args, jpegs):
+    ctx = multiprocessing.get_context("spawn")
+    width, height = args.size
+    rings = [
+        FrameRing(f"lgbench_{os.getpid()}_{i}", slots=args.slots, max_width=width, max_height=height, create=True)
+        for i in range(args.cameras)
+    ]
+    names = [ring.name for ring in rings]
+    stop, start_evt, measure = ctx.Event(), ctx.Event(), ctx.Event()
+    results = ctx.Queue()
+    procs = [
+        ctx.Process(target=bus_capture, args=(names[i], jpegs[i], args.fps, stop, start_evt, measure, results))
+        for i in range(args.cameras)
+    ]
+    for role in ("inferred", "streamed"):
+        procs.append(ctx.Process(
+            target=bus_reader,
+            args=(role, names, args.infer_py_ms, args.stream_size, stop, start_evt, measure, results),
+        ))
+    for p in procs:
+        p.start()
+    time.sleep(1.0)  # 자식 프로세스 import 시간은 측정에서 제외
+    start_evt.set()
+    time.sleep(args.warmup)
+    measure.set()
+    time.sleep(args.seconds)
+    stop.set()
+    totals = {"captured": 0, "inferred": 0, "streamed": 0}
+    latencies = []
+    cpu_sec = 0.0
+    torn = 0
+    for _ in procs:
+        item = results.get(timeout=30)
+        totals[item[0]] += item[1]
+        latencies.extend(item[2])
+        cpu_sec += item[3]
+        if len(item) > 4:
+            torn += item[4]
+    for p in procs:
+        p.join(timeout=5)
+    for ring in rings:
+        ring.close(unlink=True)
+    return summarize(
+        "bus", args.seconds, totals["captured"], totals["inferred"], totals["streamed"], latencies,
+        {"cpu_sec": round(cpu_sec, 2), "torn_reads": torn, "processes": len(procs)},
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cameras", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--warmup", type=float, default=1.0)
+    parser.add_argument("--size", default="1280x720")
+    parser.add_argument("--stream-size", default="640x360")
+    parser.add_argument("--fps", type=float, default=30.0, help="카메라당 캡처 fps 상한 (0 = 무제한)")
+    parser.add_argument("--infer-py-ms", type=float, default=5.0)
+    parser.add_argument("--slots", type=int, default=4)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+    args.size = tuple(int(v) for v in args.size.lower().split("x"))
+    args.stream_size = tuple(int(v) for v in args.stream_size.lower().split("x"))
+
+    jpegs = [make_jpeg(args.size, i) for i in range(args.cameras)]
+    report = {
+        "benchmark": "frame_bus",
+        "cpu_count": os.cpu_count(),
+        "cameras": args.cameras,
+        "size": list(args.size),
+        "offered_fps": args.fps * args.cameras if args.fps > 0 else None,
+        "results": [run_single(args, jpegs), run_bus(args, jpegs)],
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,189 @@
+"""
+게이트웨이 전송 벤치마크 (로컬 대역 서버 사용)
+
+기존 방식(메시지마다 새 TCP 연결, 2초 타임아웃, 호출자 스레드에서 전송)과
+GatewayClient(지속 연결 + outbox + 배치 + 재연결)를 비교합니다.
+
+시나리오
+- up: 게이트웨이 정상. 호출자 지연, 전체 전달 시간, TCP 연결 수
+- down: 게이트웨이 무응답(accept 하지 않는 리스너). 호출자가 막히는 시간
+- restart: 전송 도중 게이트웨이를 내렸다 올림. 유실/순서 확인
+
+사용 예:
+    python bench/bench_gateway_client.py --messages 500
+"""
+import argparse
+import json
+import os
+import socket
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from functions.gateway_client import GatewayClient  # noqa: E402
+from gateway_stub import GatewayStub  # noqa: E402
+
+
+def legacy_send(host, port, cam_id, status_msg, timeout=2.0):
+    """기존 send_to_gateway: 메시지마다 연결 생성 (실패는 무시)"""
+    try:
+        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
+            s.settimeout(timeout)
+            s.connect((host, port))
+            s.sendall(f"{cam_id}:{status_msg}".encode("utf-8"))
+    except Exception:
+        pass
+
+
+def blackhole_listener():
+    """SYN에 응답하지 않는(accept 안 하고 backlog가 찬) 리스너로 '응답 없는 게이트웨이'를 흉내"""
+    server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    server.bind(("127.0.0.1", 0))
+    server.listen(0)
+    fillers = []
+    for _ in range(4):
+        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        s.setblocking(False)
+        try:
+            s.connect(server.getsockname())
+        except BlockingIOError:
+            pass
+        fillers.append(s)
+    time.sleep(0.1)
+    return server, fillers
+
+
+def caller_ms(samples):
+    samples = sorted(samples)
+    return {
+        "avg": round(sum(samples) / len(samples) * 1000, 3),
+        "p99": round(samples[int(len(samples) * 0.99) - 1] * 1000, 3),
+        "max": round(samples[-1] * 1000, 3),
+    }
+
+
+def run_up(stub, count):
+    results = []
+
+    stub.reset()
+    samples = []
+    start = time.perf_counter()
+    for i in range(count):
+        t = time.perf_counter()
+        legacy_send(stub.host, stub.port, f"CAM_{i % 8}", f"MSG{i}")
+        samples.append(time.perf_counter() - t)
+    stub.wait_for(count, timeout=30)
+    results.append({
+        "mode": "legacy-connect-per-message",
+        "seconds": round(time.perf_counter() - start, 3),
+        "caller_ms": caller_ms(samples),
+        "delivered": len(stub.messages),
+        "tcp_connections": stub.connections,
+    })
+
+    stub.reset()
+    client = GatewayClient(stub.host, stub.port, queue_size=count)
+    samples = []
+    start = time.perf_counter()
+    for i in range(count):
+        t = time.perf_counter()
+        client.send(f"CAM_{i % 8}", f"MSG{i}")
+        samples.append(time.perf_counter() - t)
+    stub.wait_for(count, timeout=30)
+    elapsed = time.perf_counter() - start
+    stats = client.stats()
+    client.close()
+    results.append({
+        "mode": "persistent-client",
+        "seconds": round(elapsed, 3),
+        "caller_ms": caller_ms(samples),
+        "delivered": len(stub.messages),
+        "tcp_connections": stub.connections,
+        "batches": stats["batches"],
+        "in_order": stub.messages == [f"CAM_{i % 8}:MSG{i}" for i in range(count)],
+    })
+    return results
+
+
+def run_down(count):
+    server, fillers = blackhole_listener()
+    host, port = server.getsockname()
+    results = []
+
+    samples = []
+    for i in range(count):
+        t = time.perf_counter()
+        legacy_send(host, port, "CAM_0", "DANGER")
+        samples.append(time.perf_counter() - t)
+    results.append({"mode": "legacy-connect-per-message", "caller_ms": caller_ms(samples)})
+
+    client = GatewayClient(host, port, connect_timeout=0.5)
+    samples = []
+    for i in range(count * 100):
+        t = time.perf_counter()
+        client.send("CAM_0", "DANGER")
+        samples.append(time.perf_counter() - t)
+    results.append({"mode": "persistent-client", "caller_ms": caller_ms(samples), "stats": client.stats()})
+
+    for s in fillers:
+        s.close()
+    server.close()
+    return results
+
+
+def run_restart(count):
+    stub = GatewayStub()
+    client = GatewayClient(stub.host, stub.port, backoff_base=0.05, backoff_max=0.5)
+    expected = []
+    for i in range(count):
+        if i == count // 2:
+            stub.wait_for(len(expected), timeout=10)
+            stub.stop()
+            time.sleep(0.3)
+            stub.start()
+        msg = f"MSG{i}"
+        expected.append(f"CAM_0:{msg}")
+        client.send("CAM_0", msg)
+        time.sleep(0.002)
+    stub.wait_for(count, timeout=30)
+    stats = client.stats()
+    client.close()
+    delivered = stub.messages
+    stub.stop()
+    return {
+        "mode": "persistent-client",
+        "delivered": len(delivered),
+        "expected": count,
+        "in_order": [m for m in delivered if m in set(expected)] == expected[: len(delivered)],
+        "reconnects": stats["reconnects"],
+        "dropped": stats["dropped"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--messages", type=int, default=500)
+    parser.add_argument("--down-messages", type=int, default=5)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    stub = GatewayStub()
+    report = {
+        "benchmark": "gateway_client",
+        "messages": args.messages,
+        "up": run_up(stub, args.messages),
+        "down": run_down(args.down_messages),
+        "restart": run_restart(args.messages),
+    }
+    stub.stop()
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""
+게이트웨이 전송 형식 벤치마크
+
+1. 인코드/디코드: 구버전 텍스트("cam:status:path\\n")와 길이 접두 프레임(v1)을
+   프레임당 이벤트 수별로 비교 (이벤트/초, 이벤트당 바이트)
+2. 루프백: GatewayClient -> 로컬 대역 서버(bench/gateway_stub.py)로 실제 전송해
+   전달 시간과 write(프레임) 수를 비교
+
+사용 예:
+    python bench/bench_gateway_protocol.py --events 50000 --batch 1 16 64
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from functions.gateway_client import GatewayClient  # noqa: E402
+from functions.gateway_protocol import (  # noqa: E402
+    FrameDecoder,
+    GatewayEvent,
+    encode_event,
+    encode_frames,
+    event_from_text,
+)
+from gateway_stub import GatewayStub  # noqa: E402
+
+
+def make_events(count):
+    return [
+        GatewayEvent(
+            f"CAM_{i % 8}",
+            "DANGER" if i % 3 == 0 else "SAFE",
+            image_path=f"/recordings/CAM_{i % 8}_20260120_120000_{i}.jpg" if i % 3 == 0 else None,
+            meta={"objects": i % 4} if i % 3 == 0 else None,
+        )
+        for i in range(count)
+    ]
+
+
+def bench_text(events, batch):
+    start = time.perf_counter()
+    writes = []
+    for i in range(0, len(events), batch):
+        writes.append(b"".join(e.to_text().encode("utf-8") + b"\n" for e in events[i:i + batch]))
+    encode_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoded = 0
+    for data in writes:
+        for line in data.split(b"\n"):
+            if line:
+                event_from_text(line.decode("utf-8"))
+                decoded += 1
+    decode_sec = time.perf_counter() - start
+    return encode_sec, decode_sec, sum(len(w) for w in writes), decoded
+
+
+def bench_framed(events, batch):
+    start = time.perf_counter()
+    writes = []
+    for i in range(0, len(events), batch):
+        writes.append(encode_frames([encode_event(e) for e in events[i:i + batch]]))
+    encode_sec = time.perf_counter() - start
+
+    start = time.perf_counter()
+    decoder = FrameDecoder()
+    decoded = 0
+    for data in writes:
+        decoded += len(decoder.feed(data))
+    decode_sec = time.perf_counter() - start
+    return encode_sec, decode_sec, sum(len(w) for w in writes), decoded
+
+
+def loopback(protocol, events):
+    stub = GatewayStub()
+    client = GatewayClient("127.0.0.1", stub.port, queue_size=len(events), protocol=protocol)
+    start = time.perf_counter()
+    for e in events:
+        client.send(e.cam_id, e.status, image_path=e.image_path, meta=e.meta, ts=e.ts)
+    complete = stub.wait_for(len(events), timeout=60)
+    elapsed = time.perf_counter() - start
+    stats = client.stats()
+    client.close()
+    stub.stop()
+    result = {
+        "protocol": protocol,
+        "seconds": round(elapsed, 3),
+        "delivered": len(stub.messages),
+        "complete": complete,
+        "client_writes": stats["batches"],
+    }
+    if protocol == "framed":
+        result["frames"] = stub.frames
+        result["metadata_preserved"] = all(
+            got.meta == sent.meta and abs(got.ts - sent.ts) < 0.001 for got, sent in zip(stub.events, events)
+        )
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=50000)
+    parser.add_argument("--batch", type=int, nargs="+", default=[1, 16, 64])
+    parser.add_argument("--loopback-events", type=int, default=5000)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    events = make_events(args.events)
+    codec = []
+    for batch in args.batch:
+        for name, fn in (("text", bench_text), ("framed-v1", bench_framed)):
+            encode_sec, decode_sec, total_bytes, decoded = fn(events, batch)
+            codec.append({
+                "format": name,
+                "events_per_write": batch,
+                "encode_events_per_sec": round(len(events) / encode_sec, 1),
+                "decode_events_per_sec": round(decoded / decode_sec, 1),
+                "bytes_per_event": round(total_bytes / len(events), 1),
+                "carries_ts_and_meta": name != "text",
+            })
+
+    loop_events = make_events(args.loopback_events)
+    report = {
+        "benchmark": "gateway_protocol",
+        "events": args.events,
+        "codec": codec,
+        "loopback": [loopback("text", loop_events), loopback("framed", loop_events)],
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+게이트웨이 디스크 스풀 벤치마크 (로컬 대역 서버 사용)
+
+게이트웨이가 내려간 동안 이벤트를 스풀에 쌓고(적재 처리량, fsync 횟수),
+다시 올라왔을 때 재전송 처리량과 카메라별 순서 보존을 측정합니다.
+fsync 배치 크기별로 반복합니다 (1 = 레코드마다 fsync).
+
+사용 예:
+    python bench/bench_gateway_spool.py --events 20000 --fsync-batch 1 64 256
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from functions.gateway_client import GatewayClient  # noqa: E402
+from functions.gateway_protocol import GatewayEvent, encode_event  # noqa: E402
+from functions.gateway_spool import GatewaySpool  # noqa: E402
+from gateway_stub import GatewayStub  # noqa: E402
+
+
+def run(events, cameras, fsync_batch, segment_bytes, directory):
+    stub = GatewayStub()
+    port = stub.port
+    stub.stop()
+
+    # 1. 적재: 스풀에 직접 기록 (송신 스레드가 outbox를 옮기는 것과 같은 경로)
+    spool = GatewaySpool(directory, segment_bytes=segment_bytes, fsync_batch=fsync_batch, fsync_interval=3600)
+    messages = [
+        encode_event(GatewayEvent(f"CAM_{i % cameras}", "DANGER" if i % 2 else "SAFE", meta={"seq": i}))
+        for i in range(events)
+    ]
+    chunk = 64
+    start = time.perf_counter()
+    for i in range(0, events, chunk):
+        spool.append_many(messages[i:i + chunk])
+    spool.sync()
+    append_sec = time.perf_counter() - start
+    spooled = spool.stats()
+
+    # 2. 재전송: 게이트웨이가 다시 올라오면 클라이언트가 스풀부터 순서대로 보냄
+    stub.port = port
+    stub.start()
+    start = time.perf_counter()
+    client = GatewayClient("127.0.0.1", port, spool=spool, batch_max=256, batch_wait=0)
+    delivered_all = stub.wait_for(events, timeout=120)
+    replay_sec = time.perf_counter() - start
+    client.close()
+    stub.stop()
+
+    per_camera_ordered = True
+    last_seq = {}
+    for event in stub.events:
+        seq = event.meta["seq"]
+        if seq <= last_seq.get(event.cam_id, -1):
+            per_camera_ordered = False
+        last_seq[event.cam_id] = seq
+
+    return {
+        "fsync_batch": fsync_batch,
+        "append": {
+            "seconds": round(append_sec, 3),
+            "events_per_sec": round(events / append_sec, 1),
+            "fsyncs": spooled["fsyncs"],
+            "bytes": spooled["bytes"],
+            "segments": spooled["segments"],
+        },
+        "replay": {
+            "seconds": round(replay_sec, 3),
+            "events_per_sec": round(len(stub.messages) / replay_sec, 1),
+            "delivered": len(stub.messages),
+            "complete": delivered_all,
+            "per_camera_ordered": per_camera_ordered,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--events", type=int, default=20000)
+    parser.add_argument("--cameras", type=int, default=8)
+    parser.add_argument("--fsync-batch", type=int, nargs="+", default=[1, 64, 256])
+    parser.add_argument("--segment-bytes", type=int, default=1024 * 1024)
+    parser.add_argument("--dir", default=None, help="스풀 위치 (기본: 임시 폴더, 실제 디스크 측정 시 지정)")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    base = args.dir or tempfile.mkdtemp(prefix="gateway_spool_bench_")
+    results = []
+    for fsync_batch in args.fsync_batch:
+        directory = os.path.join(base, f"fsync_{fsync_batch}")
+        shutil.rmtree(directory, ignore_errors=True)
+        results.append(run(args.events, args.cameras, fsync_batch, args.segment_bytes, directory))
+        shutil.rmtree(directory, ignore_errors=True)
+    if not args.dir:
+        shutil.rmtree(base, ignore_errors=True)
+
+    report = {
+        "benchmark": "gateway_spool",
+        "events": args.events,
+        "cameras": args.cameras,
+        "segment_bytes": args.segment_bytes,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
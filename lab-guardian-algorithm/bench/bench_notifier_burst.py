@@ -0,0 +1,183 @@
+"""
+텔레그램 알림 폭주 벤치마크 (로컬 스텁 HTTP 서버 사용, 실제 텔레그램 호출 없음)
+
+기존 방식(알림마다 스레드 + 일회성 requests.post + 매번 cv2.imencode)과
+TelegramNotifier(고정 워커 풀 + keep-alive 세션 + 인코딩된 JPEG 재사용)를 비교합니다.
+
+사용 예:
+    python bench/bench_notifier_burst.py --alerts 200 --latency-ms 50 --rate-limit-every 0
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2
+import numpy as np
+import requests
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.notifier import TelegramNotifier  # noqa: E402
+
+
+class StubTelegram:
+    """sendPhoto를 흉내 내는 스텁 서버: 지연 + N번째 요청마다 429 응답"""
+
+    def __init__(self, latency_ms=50, rate_limit_every=0):
+        stub = self
+        self.latency = latency_ms / 1000.0
+        self.rate_limit_every = rate_limit_every
+        self.requests = 0
+        self.accepted = 0
+        self.rate_limited = 0
+        self.connections = set()
+        self._lock = threading.Lock()
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                self.rfile.read(length)
+                time.sleep(stub.latency)
+                with stub._lock:
+                    stub.requests += 1
+                    stub.connections.add(self.client_address)
+                    limited = stub.rate_limit_every and stub.requests % stub.rate_limit_every == 0
+                    if limited:
+                        stub.rate_limited += 1
+                    else:
+                        stub.accepted += 1
+                if limited:
+                    body = json.dumps({"ok": False, "parameters": {"retry_after": 0.2}}).encode()
+                    self.send_response(429)
+                else:
+                    body = b'{"ok": true}'
+                    self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        class Server(ThreadingHTTPServer):
+            # 기존 방식의 동시 연결 폭주가 listen backlog에서 막히지 않도록 여유를 둠
+            request_queue_size = 256
+
+        self.server = Server(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def reset(self):
+        with self._lock:
+            self.requests = self.accepted = self.rate_limited = 0
+            self.connections = set()
+
+    def wait_for(self, count, timeout, field="accepted"):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                if getattr(self, field) >= count:
+                    return True
+            time.sleep(0.01)
+        return False
+
+
+def legacy_send(url, chat_id, cam_id, frame):
+    """기존 구현: 알림마다 새 스레드 + 매번 인코딩 + 연결 재사용 없음"""
+    def _send():
+        try:
+            ret, buffer = cv2.imencode('.jpg', frame)
+            if not ret:
+                return
+            requests.post(url, files={'photo': buffer.tobytes()}, data={'chat_id': chat_id}, timeout=3)
+        except Exception:
+            pass
+    threading.Thread(target=_send).start()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--alerts", type=int, default=200)
+    parser.add_argument("--latency-ms", type=float, default=50)
+    parser.add_argument("--rate-limit-every", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    frame = np.random.default_rng(0).integers(0, 255, size=(720, 1280, 3), dtype=np.uint8)
+    jpeg_bytes = cv2.imencode('.jpg', frame)[1].tobytes()
+    stub = StubTelegram(latency_ms=args.latency_ms, rate_limit_every=args.rate_limit_every)
+    results = []
+
+    # 1. 기존 방식
+    stub.reset()
+    threads_before = threading.active_count()
+    start = time.perf_counter()
+    for i in range(args.alerts):
+        legacy_send(f"{stub.url}/botTOKEN/sendPhoto", "1", f"CAM_{i % 8}", frame)
+    peak_threads = threading.active_count() - threads_before
+    # 기존 방식은 재시도가 없으므로 요청 수 기준으로 대기 (429는 그대로 유실)
+    stub.wait_for(args.alerts, timeout=120, field="requests")
+    elapsed = time.perf_counter() - start
+    results.append({
+        "mode": "legacy-thread-per-alert",
+        "seconds": round(elapsed, 3),
+        "alerts_per_sec": round(stub.accepted / elapsed, 1),
+        "delivered": stub.accepted,
+        "rate_limited": stub.rate_limited,
+        "tcp_connections": len(stub.connections),
+        "peak_extra_threads": peak_threads,
+    })
+
+    # 2. 워커 풀 + 세션 재사용 + 인코딩 재사용
+    stub.reset()
+    notifier = TelegramNotifier(
+        "TOKEN",
+        "1",
+        workers=args.workers,
+        queue_size=args.alerts,
+        api_base=stub.url,
+        backoff_base=0.05,
+    )
+    start = time.perf_counter()
+    for i in range(args.alerts):
+        notifier.send_photo(f"CAM_{i % 8}", jpeg_bytes=jpeg_bytes)
+    stub.wait_for(args.alerts, timeout=120)
+    elapsed = time.perf_counter() - start
+    stats = notifier.stats()
+    results.append({
+        "mode": f"pooled-{args.workers}-workers",
+        "seconds": round(elapsed, 3),
+        "alerts_per_sec": round(stub.accepted / elapsed, 1),
+        "delivered": stub.accepted,
+        "rate_limited": stub.rate_limited,
+        "tcp_connections": len(stub.connections),
+        "retries": stats["retries"],
+        "dropped": stats["dropped"],
+    })
+
+    report = {
+        "benchmark": "notifier_burst",
+        "alerts": args.alerts,
+        "stub_latency_ms": args.latency_ms,
+        "rate_limit_every": args.rate_limit_every,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    stub.server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
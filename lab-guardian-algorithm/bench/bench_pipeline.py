@@ -0,0 +1,480 @@
+"""
+전체 파이프라인 벤치마크: main.py 서버를 실제로 띄우고 가짜 카메라 N대 + /video_feed 뷰어 M개로 부하
+
+구성(카메라 수 x 뷰어 수)마다 서버를 새로 띄워(임시 작업 폴더) 측정합니다.
+- 소스 upload(기본): 로봇처럼 /upload_frame/{cam}으로 JPEG 전송. 영상(--video)은 시작 전에 JPEG로 미리 인코딩해
+  반복 재생하므로 부하 생성 비용이 작음 (영상이 없으면 움직이는 사각형 합성 영상). X-Capture-Ts를 함께 보내
+  "가짜 카메라 캡처 -> 뷰어 수신" 전 구간 지연을 잼
+- 소스 rtsp: --rtsp-url의 RTSP 서버(예: mediamtx에 ffmpeg -re -stream_loop -1로 영상 송출)를 /cameras/register로 등록
+  ({i}는 카메라 번호). 지연은 서버 캡처 시각 기준
+- 뷰어: multipart 스트림을 읽어 새 프레임 fps, X-Capture-Ts/X-Frame-Age-Ms 기준 지연 p50/p99
+- 탐지율: /metrics의 lab_guardian_detections_total 증가량
+- 서버 CPU(캡처 자식 프로세스 포함, 100 = 코어 1개)와 RSS 최대값
+
+결과는 JSON. --baseline으로 이전 결과와 비교해 허용 범위(--tolerance)를 넘게 나빠지면 종료 코드 1 (릴리스 간 회귀 추적).
+
+사용 예:
+    python bench/bench_pipeline.py --cameras 1 2 4 --viewers 1 4 --seconds 30 --out pipeline.json
+    python bench/bench_pipeline.py --cameras 4 --viewers 4 --env FRAME_BUS=1 --baseline pipeline.json
+"""
+import argparse
+import json
+import os
+import platform
+import shutil
+import socket
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import zlib
+
+import cv2
+import numpy as np
+import psutil
+import requests
+
+ALGO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(len(values) * pct / 100))], 1)
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+# ---------------- 가짜 카메라 ----------------
+def load_frames(video, size, max_frames, quality):
+    """영상(없으면 합성)을 미리 JPEG로 인코딩 (측정 중 부하 생성기의 디코드/인코드 비용 제거)"""
+    width, height = size
+    params = [int(cv2.IMWRITE_JPEG_QUALITY), quality]
+    frames = []
+    if video:
+        cap = cv2.VideoCapture(video)
+        while len(frames) < max_frames:
+            ok, frame = cap.read()
+            if not ok:
+                break
+            frame = cv2.resize(frame, (width, height), interpolation=cv2.INTER_AREA)
+            frames.append(cv2.imencode(".jpg", frame, params)[1].tobytes())
+        cap.release()
+        if not frames:
+            sys.exit(f"영상을 읽을 수 없습니다: {video}")
+        return frames
+    noise = np.random.default_rng(0).integers(0, 24, (height, width, 3), dtype=np.uint8)
+    for i in range(max_frames):
+        frame = noise.copy()
+        x = (i * 8) % max(width - 120, 1)
+        cv2.rectangle(frame, (x, height // 4), (x + 120, height // 4 + 260), (40, 90, 200), -1)
+        frames.append(cv2.imencode(".jpg", frame, params)[1].tobytes())
+    return frames
+
+
+class UploadSource(threading.Thread):
+    def __init__(self, base_url, cam_id, frames, fps, stop):
+        super().__init__(name=f"source-{cam_id}", daemon=True)
+        self.url = f"{base_url}/upload_frame/{cam_id}"
+        self.frames = frames
+        self.interval = 1.0 / fps
+        self.stop = stop
+        self.sent = 0
+        self.errors = 0
+
+    def run(self):
+        session = requests.Session()
+        next_due = time.perf_counter()
+        seq = 0
+        while not self.stop.is_set():
+            seq += 1
+            jpeg = self.frames[seq % len(self.frames)]
+            headers = {"X-Capture-Ts": f"{time.time():.6f}", "X-Frame-Seq": str(seq)}
+            try:
+                r = session.post(self.url, files={"file": ("frame.jpg", jpeg, "image/jpeg")}, headers=headers, timeout=5)
+                if r.status_code == 200:
+                    self.sent += 1
+                else:
+                    self.errors += 1
+            except requests.RequestException:
+                self.errors += 1
+            next_due += self.interval
+            delay = next_due - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            else:
+                next_due = time.perf_counter()  # 서버가 못 따라오면 밀린 만큼 몰아 보내지 않음
+
+
+# ---------------- 뷰어 ----------------
+class Viewer(threading.Thread):
+    """multipart/x-mixed-replace 스트림을 읽어 새 프레임(내용이 바뀐 JPEG)만 집계"""
+
+    def __init__(self, base_url, cam_id, stop):
+        super().__init__(name=f"viewer-{cam_id}", daemon=True)
+        self.url = f"{base_url}/video_feed/{cam_id}"
+        self.cam_id = cam_id
+        self.stop = stop
+        self.measuring = False
+        self.frames = 0
+        self.e2e_ms = []
+        self.server_ms = []
+        self.errors = 0
+
+    def run(self):
+        try:
+            with requests.get(self.url, stream=True, timeout=(5, 10)) as r:
+                buf = b""
+                last_crc = None
+                for chunk in r.iter_content(chunk_size=65536):
+                    if self.stop.is_set():
+                        break
+                    buf += chunk
+                    while True:
+                        head_end = buf.find(b"\r\n\r\n")
+                        if head_end < 0:
+                            break
+                        body_end = buf.find(b"\r\n--frame\r\n", head_end + 4)
+                        if body_end < 0:
+                            break
+                        head, body = buf[:head_end], buf[head_end + 4:body_end]
+                        buf = buf[body_end + 2:]
+                        received = time.time()
+                        crc = zlib.crc32(body)
+                        if not self.measuring or crc == last_crc:
+                            last_crc = crc
+                            continue
+                        last_crc = crc
+                        headers = dict(
+                            line.split(": ", 1) for line in head.decode("latin-1").split("\r\n") if ": " in line
+                        )
+                        if "X-Capture-Ts" not in headers:
+                            continue  # 오프라인 화면
+                        self.frames += 1
+                        self.e2e_ms.append((received - float(headers["X-Capture-Ts"])) * 1000)
+                        self.server_ms.append(float(headers["X-Frame-Age-Ms"]))
+        except requests.RequestException:
+            if not self.stop.is_set():
+                self.errors += 1
+
+
+# ---------------- 서버 ----------------
+def parse_counter(text, name):
+    values = {}
+    for line in text.splitlines():
+        if line.startswith(name + "{"):
+            labels, value = line.rsplit(" ", 1)
+            cam = labels.split('cam="', 1)[1].split('"', 1)[0]
+            values[cam] = float(value)
+    return values
+
+
+class Server:
+    def __init__(self, port, env_overrides, workdir):
+        self.port = port
+        self.base_url = f"http://127.0.0.1:{port}"
+        env = dict(os.environ)
+        env.update({
+            "PORT_ALGO": str(port),
+            "PC_IP": env.get("PC_IP", "127.0.0.1"),
+            "TELEGRAM_TOKEN": env.get("TELEGRAM_TOKEN", "bench"),
+            "TELEGRAM_CHAT_ID": env.get("TELEGRAM_CHAT_ID", "0"),
+            "CAMERA_WARM_RESTART": "0",
+            "CAMERA_STORE_DB": os.path.join(workdir, "cameras.db"),
+            "CAMERA_SECRETS_PATH": os.path.join(workdir, "camera_secrets.json"),
+            "RECORDING_CATALOG_DB": os.path.join(workdir, "recordings.db"),
+            "GATEWAY_SPOOL_DIR": os.path.join(workdir, "gateway_spool"),
+        })
+        env.update(env_overrides)
+        # 모델 파일을 작업 폴더에 연결 (없으면 ultralytics가 내려받음)
+        model = os.path.join(ALGO_DIR, "yolov8n.pt")
+        if os.path.exists(model) and not os.path.exists(os.path.join(workdir, "yolov8n.pt")):
+            os.symlink(model, os.path.join(workdir, "yolov8n.pt"))
+        self.log_path = os.path.join(workdir, "server.log")
+        self.log = open(self.log_path, "wb")
+        self.proc = subprocess.Popen(
+            [sys.executable, os.path.join(ALGO_DIR, "main.py")],
+            cwd=workdir,
+            env=env,
+            stdout=self.log,
+            stderr=subprocess.STDOUT,
+        )
+        self.ps = psutil.Process(self.proc.pid)
+
+    def wait_ready(self, timeout):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            if self.proc.poll() is not None:
+                break
+            try:
+                if requests.get(f"{self.base_url}/metrics", timeout=1).status_code == 200:
+                    return
+            except requests.RequestException:
+                pass
+            time.sleep(0.5)
+        with open(self.log_path, "rb") as f:
+            tail = f.read()[-2000:].decode("utf-8", "replace")
+        self.close()
+        sys.exit(f"서버가 시작되지 않았습니다:\n{tail}")
+
+    def processes(self):
+        try:
+            return [self.ps] + self.ps.children(recursive=True)
+        except psutil.NoSuchProcess:
+            return []
+
+    def cpu_seconds(self):
+        total = 0.0
+        for p in self.processes():
+            try:
+                t = p.cpu_times()
+                total += t.user + t.system
+            except psutil.NoSuchProcess:
+                pass
+        return total
+
+    def rss(self):
+        total = 0
+        for p in self.processes():
+            try:
+                total += p.memory_info().rss
+            except psutil.NoSuchProcess:
+                pass
+        return total
+
+    def close(self):
+        if self.proc.poll() is None:
+            self.proc.terminate()
+            try:
+                self.proc.wait(timeout=15)
+            except subprocess.TimeoutExpired:
+                self.proc.kill()
+                self.proc.wait()
+        self.log.close()
+
+
+def add_rtsp_camera(base_url, cam_id, url_template, index):
+    url = requests.utils.urlparse(url_template.format(i=index))
+    payload = {
+        "cam_id": cam_id,
+        "ip": url.hostname,
+        "port": url.port or 554,
+        "path": url.path,
+        "username": url.username or "",
+        "password": url.password or "",
+        "stream": "sub",
+        "transport": "tcp",
+    }
+    r = requests.post(f"{base_url}/cameras/register", json=payload, timeout=30)
+    if r.status_code != 200:
+        sys.exit(f"RTSP 카메라 등록 실패 {cam_id}: {r.status_code} {r.text}")
+
+
+def run_config(args, cameras, viewers, frames):
+    workdir = tempfile.mkdtemp(prefix="pipeline_bench_")
+    env = dict(item.split("=", 1) for item in args.env)
+    server = Server(free_port(), env, workdir)
+    stop = threading.Event()
+    sources, clients = [], []
+    try:
+        server.wait_ready(args.startup_timeout)
+        cam_ids = [f"BENCH_{i}" for i in range(cameras)]
+        for i, cam_id in enumerate(cam_ids):
+            if args.source == "rtsp":
+                add_rtsp_camera(server.base_url, cam_id, args.rtsp_url, i)
+            else:
+                sources.append(UploadSource(server.base_url, cam_id, frames, args.source_fps, stop))
+            if args.detect:
+                requests.post(f"{server.base_url}/monitoring/start/{cam_id}", timeout=10)
+        # 뷰어는 카메라에 돌아가며 배정 (뷰어 수 < 카메라 수면 일부 카메라는 뷰어 없음)
+        clients = [Viewer(server.base_url, cam_ids[i % cameras], stop) for i in range(viewers)]
+        for t in sources + clients:
+            t.start()
+        time.sleep(args.warmup)
+
+        for v in clients:
+            v.measuring = True
+        sent0 = [s.sent for s in sources]
+        detections0 = parse_counter(requests.get(f"{server.base_url}/metrics", timeout=10).text,
+                                    "lab_guardian_detections_total")
+        cpu0, bench_cpu0, start = server.cpu_seconds(), time.process_time(), time.perf_counter()
+        rss_max = 0
+        while time.perf_counter() - start < args.seconds:
+            rss_max = max(rss_max, server.rss())
+            time.sleep(0.5)
+        elapsed = time.perf_counter() - start
+        cpu = server.cpu_seconds() - cpu0
+        bench_cpu = time.process_time() - bench_cpu0
+        for v in clients:
+            v.measuring = False
+        detections1 = parse_counter(requests.get(f"{server.base_url}/metrics", timeout=10).text,
+                                    "lab_guardian_detections_total")
+        rss_end = server.rss()
+    finally:
+        stop.set()
+        server.close()
+        for t in sources + clients:
+            t.join(timeout=5)
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    per_camera = {}
+    for i, cam_id in enumerate(cam_ids):
+        mine = [v for v in clients if v.cam_id == cam_id]
+        per_camera[cam_id] = {
+            "viewers": len(mine),
+            "viewer_fps": round(sum(v.frames for v in mine) / len(mine) / elapsed, 2) if mine else None,
+            "detect_fps": round((detections1.get(cam_id, 0) - detections0.get(cam_id, 0)) / elapsed, 2),
+            "source_fps": round((sources[i].sent - sent0[i]) / elapsed, 2) if sources else None,
+        }
+    viewed = [c["viewer_fps"] for c in per_camera.values() if c["viewer_fps"] is not None]
+    e2e = [ms for v in clients for ms in v.e2e_ms]
+    server_age = [ms for v in clients for ms in v.server_ms]
+    return {
+        "cameras": cameras,
+        "viewers": viewers,
+        "seconds": round(elapsed, 1),
+        "fps_per_camera_avg": round(sum(viewed) / len(viewed), 2) if viewed else None,
+        "fps_per_camera_min": min(viewed) if viewed else None,
+        "detect_fps_avg": round(sum(c["detect_fps"] for c in per_camera.values()) / cameras, 2),
+        # e2e: 가짜 카메라 캡처(업로드 모드) 또는 서버 캡처(RTSP) -> 뷰어 수신, server: 서버가 보낼 때의 프레임 나이
+        "latency_ms": {
+            "e2e_p50": percentile(e2e, 50),
+            "e2e_p99": percentile(e2e, 99),
+            "server_p50": percentile(server_age, 50),
+            "server_p99": percentile(server_age, 99),
+        },
+        "server": {
+            "cpu_percent": round(cpu / elapsed * 100, 1),
+            "rss_mb_max": round(rss_max / 1024 / 1024, 1),
+            "rss_mb_end": round(rss_end / 1024 / 1024, 1),
+        },
+        "bench_cpu_percent": round(bench_cpu / elapsed * 100, 1),
+        "errors": {
+            "source": sum(s.errors for s in sources),
+            "viewer": sum(v.errors for v in clients),
+        },
+        "per_camera": per_camera,
+    }
+
+
+# ---------------- 회귀 비교 ----------------
+# (지표, 커질수록 좋은지)
+_COMPARED = (
+    ("fps_per_camera_avg", True),
+    ("detect_fps_avg", True),
+    ("latency_ms.e2e_p99", False),
+    ("server.cpu_percent", False),
+    ("server.rss_mb_max", False),
+)
+
+
+def _get(result, path):
+    for key in path.split("."):
+        result = result.get(key) if isinstance(result, dict) else None
+    return result
+
+
+def compare(report, baseline, tolerance):
+    old = {(r["cameras"], r["viewers"]): r for r in baseline.get("results", [])}
+    regressions = []
+    for result in report["results"]:
+        before = old.get((result["cameras"], result["viewers"]))
+        if before is None:
+            continue
+        for path, higher_is_better in _COMPARED:
+            a, b = _get(before, path), _get(result, path)
+            if not a or b is None:
+                continue
+            change = (b - a) / a
+            if (change < -tolerance) if higher_is_better else (change > tolerance):
+                regressions.append({
+                    "cameras": result["cameras"],
+                    "viewers": result["viewers"],
+                    "metric": path,
+                    "baseline": a,
+                    "current": b,
+                    "change_percent": round(change * 100, 1),
+                })
+    return regressions
+
+
+def git_rev():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ALGO_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cameras", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--viewers", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--seconds", type=float, default=20.0)
+    parser.add_argument("--warmup", type=float, default=5.0)
+    parser.add_argument("--source", choices=("upload", "rtsp"), default="upload")
+    parser.add_argument("--video", default=None, help="업로드 모드에서 반복 재생할 영상 (없으면 합성)")
+    parser.add_argument("--size", default="640x480", help="업로드 프레임 크기")
+    parser.add_argument("--source-fps", type=float, default=10.0)
+    parser.add_argument("--max-frames", type=int, default=150, help="미리 인코딩해 반복할 프레임 수")
+    parser.add_argument("--quality", type=int, default=80)
+    parser.add_argument("--rtsp-url", default="rtsp://127.0.0.1:8554/cam{i}")
+    parser.add_argument("--no-detect", dest="detect", action="store_false", help="감시(탐지) 없이 스트림만")
+    parser.add_argument("--env", action="append", default=[], help="서버 환경변수 KEY=VALUE (여러 번)")
+    parser.add_argument("--startup-timeout", type=float, default=120.0)
+    parser.add_argument("--baseline", default=None, help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.15, help="허용 악화 비율")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    size = tuple(int(v) for v in args.size.split("x"))
+    frames = load_frames(args.video, size, args.max_frames, args.quality) if args.source == "upload" else []
+
+    results = []
+    for cameras in args.cameras:
+        for viewers in args.viewers:
+            result = run_config(args, cameras, viewers, frames)
+            print(f"cameras={cameras} viewers={viewers} fps/cam={result['fps_per_camera_avg']} "
+                  f"detect/cam={result['detect_fps_avg']} e2e_p99={result['latency_ms']['e2e_p99']}ms "
+                  f"cpu={result['server']['cpu_percent']}% rss={result['server']['rss_mb_max']}MB", file=sys.stderr)
+            results.append(result)
+
+    report = {
+        "benchmark": "pipeline",
+        "git_rev": git_rev(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "source": args.source,
+        "video": args.video if args.source == "upload" else args.rtsp_url,
+        "size": list(size),
+        "source_fps": args.source_fps,
+        "detect": args.detect,
+        "env": dict(item.split("=", 1) for item in args.env),
+        "seconds": args.seconds,
+        "warmup": args.warmup,
+        "results": results,
+    }
+    regressions = None
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            regressions = compare(report, json.load(f), args.tolerance)
+        report["regressions"] = regressions
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+녹화 인코더 벤치마크: cv2.VideoWriter(mp4v) vs ffmpeg libx264 파이프
+
+사용 예:
+    python bench/bench_record_encoder.py --frames 150 --size 1920x1080 --presets ultrafast,veryfast
+결과는 JSON으로 출력되며 --out 으로 파일 저장도 가능합니다.
+CPU 시간은 이 프로세스(python_cpu_sec)와 종료된 자식 ffmpeg(child_cpu_sec)를 따로 재고 합계(total_cpu_sec)로 비교합니다.
+(자식 CPU 시간은 os.times()로 읽으므로 Windows에서는 0으로 나옵니다)
+PATH에 ffmpeg가 없으면 x264 항목은 "unavailable"로 표시합니다 (녹화기의 create_writer와 같이 OpenCV만 측정).
+"""
+import argparse
+import json
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.encoders import FfmpegX264Writer, OpenCVWriter  # noqa: E402
+
+
+def make_frames(count, size):
+    """움직이는 패턴 + 노이즈가 섞인 합성 프레임 (CCTV 화면과 비슷한 압축 난이도)"""
+    width, height = size
+    rng = np.random.default_rng(0)
+    base = np.zeros((height, width, 3), dtype=np.uint8)
+    cv2.rectangle(base, (0, height // 2), (width, height), (60, 70, 80), -1)
+    frames = []
+    for i in range(count):
+        frame = base.copy()
+        x = int((i * 7) % max(width - 200, 1))
+        cv2.rectangle(frame, (x, height // 3), (x + 120, height // 3 + 300), (40, 90, 200), -1)
+        cv2.putText(frame, f"CAM_1 {i:05d}", (40, 80), cv2.FONT_HERSHEY_SIMPLEX, 2, (255, 255, 255), 3)
+        noise = rng.integers(0, 12, size=(height, width, 1), dtype=np.uint8)
+        frames.append(cv2.add(frame, np.repeat(noise, 3, axis=2)))
+    return frames
+
+
+def _children_cpu():
+    # 기다려 준(wait) 자식 프로세스의 CPU 시간 합: release()가 ffmpeg 종료까지 기다리므로 인코딩 CPU가 포함됨
+    times = os.times()
+    return times.children_user + times.children_system
+
+
+def run(name, writer_factory, frames, path):
+    start = time.perf_counter()
+    cpu_start = time.process_time()
+    child_start = _children_cpu()
+    writer = writer_factory(path)
+    for frame in frames:
+        writer.write(frame)
+    writer.release()
+    elapsed = time.perf_counter() - start
+    python_cpu = time.process_time() - cpu_start
+    child_cpu = _children_cpu() - child_start
+    return {
+        "backend": name,
+        "frames": len(frames),
+        "seconds": round(elapsed, 3),
+        "encode_fps": round(len(frames) / elapsed, 1),
+        "python_cpu_sec": round(python_cpu, 3),
+        "child_cpu_sec": round(child_cpu, 3),
+        "total_cpu_sec": round(python_cpu + child_cpu, 3),
+        "file_bytes": os.path.getsize(path),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--frames", type=int, default=150)
+    parser.add_argument("--size", default="1920x1080")
+    parser.add_argument("--fps", type=float, default=15.0)
+    parser.add_argument("--presets", default="ultrafast,veryfast")
+    parser.add_argument("--crf", type=int, default=23)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    width, height = (int(v) for v in args.size.lower().split("x"))
+    size = (width, height)
+    frames = make_frames(args.frames, size)
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        results.append(run(
+            "opencv-mp4v",
+            lambda path: OpenCVWriter(path, args.fps, size),
+            frames,
+            os.path.join(tmp, "opencv.mp4"),
+        ))
+        ffmpeg_bin = shutil.which("ffmpeg")
+        for preset in [p.strip() for p in args.presets.split(",") if p.strip()]:
+            if ffmpeg_bin is None:
+                results.append({"backend": f"x264-{preset}-crf{args.crf}", "status": "unavailable", "reason": "ffmpeg not found"})
+                continue
+            results.append(run(
+                f"x264-{preset}-crf{args.crf}",
+                lambda path, preset=preset: FfmpegX264Writer(
+                    path, args.fps, size, preset=preset, crf=args.crf, ffmpeg_bin=ffmpeg_bin
+                ),
+                frames,
+                os.path.join(tmp, f"x264_{preset}.mp4"),
+            ))
+
+    baseline = results[0]
+    for item in results:
+        if item.get("status") == "unavailable":
+            continue
+        item["size_ratio_vs_opencv"] = round(item["file_bytes"] / max(baseline["file_bytes"], 1), 3)
+        item["speed_ratio_vs_opencv"] = round(item["encode_fps"] / max(baseline["encode_fps"], 0.001), 3)
+
+    report = {"benchmark": "record_encoder", "size": args.size, "fps": args.fps, "results": results}
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
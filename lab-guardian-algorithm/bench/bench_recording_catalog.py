@@ -0,0 +1,162 @@
+"""
+녹화 카탈로그(SQLite) 검색 벤치마크
+
+녹화 N건(카메라/종류 혼합)을 임시 DB에 넣고 /recordings/search와 같은 검색의
+첫 페이지와 깊은 커서(--depth 건 뒤) 페이지 조회 시간을 잽니다.
+(kind, started_at, id) 인덱스가 있을 때와 지웠을 때를 비교하고 쿼리 계획도 함께 출력합니다.
+
+사용 예:
+    python bench/bench_recording_catalog.py --rows 100000 --depth 1000 20000 --clip-ratio 0.05
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.recording_catalog import RecordingCatalog  # noqa: E402
+
+KIND_INDEX = "idx_recordings_kind_time"
+
+
+def seed(catalog, rows, cameras, clip_ratio):
+    """30일에 걸친 녹화/스냅샷 (clip_ratio 비율만 clip)"""
+    rng = random.Random(0)
+    now = time.time()
+    span = 30 * 86400
+    data = []
+    for i in range(rows):
+        kind = "clip" if rng.random() < clip_ratio else "snapshot"
+        started = now - span + span * i / rows
+        data.append((
+            f"CAM_{rng.randrange(cameras)}",
+            kind,
+            f"row_{i:07d}.{'mp4' if kind == 'clip' else 'jpg'}",
+            started,
+            started + (10 if kind == "clip" else 0),
+            rng.randrange(10_000, 5_000_000),
+        ))
+    start = time.perf_counter()
+    with catalog._lock:
+        catalog.conn.executemany(
+            "INSERT INTO recordings (cam_id, kind, filename, started_at, ended_at, size_bytes) VALUES (?, ?, ?, ?, ?, ?)",
+            data,
+        )
+        catalog.conn.commit()
+        catalog.conn.execute("ANALYZE")
+    return time.perf_counter() - start
+
+
+def cursor_at(catalog, depth, cam_id=None, kind=None):
+    """depth건 뒤 페이지의 커서 ("started_at:id"), 결과가 그만큼 없으면 None"""
+    where, params = [], []
+    if cam_id:
+        where.append("cam_id = ?")
+        params.append(cam_id)
+    if kind:
+        where.append("kind = ?")
+        params.append(kind)
+    sql = "SELECT started_at, id FROM recordings"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += " ORDER BY started_at DESC, id DESC LIMIT 1 OFFSET ?"
+    row = catalog.conn.execute(sql, params + [depth - 1]).fetchone()
+    return f"{row[0]}:{row[1]}" if row else None
+
+
+def query_plan(catalog, filters, cursor):
+    # search()와 같은 SQL의 계획 (인덱스 사용 여부 확인)
+    captured = []
+    catalog.conn.set_trace_callback(captured.append)
+    try:
+        catalog.search(**filters, cursor=cursor, limit=50)
+    finally:
+        catalog.conn.set_trace_callback(None)
+    sql = captured[-1]
+    return [row[-1] for row in catalog.conn.execute(f"EXPLAIN QUERY PLAN {sql}").fetchall()]
+
+
+def measure(catalog, filters, cursor, repeat, limit):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        items, _ = catalog.search(**filters, cursor=cursor, limit=limit)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "items": len(items),
+        "p50_ms": round(samples[len(samples) // 2], 3),
+        "max_ms": round(samples[-1], 3),
+    }
+
+
+def run(catalog, queries, depths, repeat, limit):
+    results = []
+    for name, filters in queries:
+        entry = {"query": name, "filters": filters, "pages": {}}
+        for depth in [0] + depths:
+            cursor = cursor_at(catalog, depth, **filters) if depth else None
+            if depth and cursor is None:
+                continue
+            page = measure(catalog, filters, cursor, repeat, limit)
+            page["plan"] = query_plan(catalog, filters, cursor)
+            entry["pages"]["first" if not depth else f"after_{depth}"] = page
+        results.append(entry)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--cameras", type=int, default=8)
+    parser.add_argument("--clip-ratio", type=float, default=0.05)
+    parser.add_argument("--depth", type=int, nargs="+", default=[1000, 20000])
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    queries = [
+        ("all", {}),
+        ("camera", {"cam_id": "CAM_1"}),
+        ("kind_clip", {"kind": "clip"}),
+        ("kind_snapshot", {"kind": "snapshot"}),
+        ("camera_kind_clip", {"cam_id": "CAM_1", "kind": "clip"}),
+    ]
+    directory = tempfile.mkdtemp(prefix="recording_catalog_bench_")
+    try:
+        catalog = RecordingCatalog(os.path.join(directory, "recordings.db"))
+        seed_sec = seed(catalog, args.rows, args.cameras, args.clip_ratio)
+        with_index = run(catalog, queries, args.depth, args.repeat, args.limit)
+        # 비교: kind 인덱스가 없던 이전 스키마
+        with catalog._lock:
+            catalog.conn.execute(f"DROP INDEX {KIND_INDEX}")
+            catalog.conn.execute("ANALYZE")
+        without_index = run(catalog, queries, args.depth, args.repeat, args.limit)
+        catalog.conn.close()
+    finally:
+        shutil.rmtree(directory, ignore_errors=True)
+
+    report = {
+        "benchmark": "recording_catalog",
+        "rows": args.rows,
+        "cameras": args.cameras,
+        "clip_ratio": args.clip_ratio,
+        "limit": args.limit,
+        "seed_sec": round(seed_sec, 2),
+        "results": {"kind_index": with_index, "no_kind_index": without_index},
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,174 @@
+"""
+RTSP 등록 검사 벤치마크: 기존(이벤트 루프 안에서 순차 검사) vs RtspProber(스레드 풀 + 자식 프로세스, 동시 검사)
+
+대상 카메라 N대를 섞어서 검사합니다.
+- ok: 로컬 영상 파일 (OpenCV FFmpeg로 열림 = 응답 빠른 카메라 대역)
+- refused: 닫힌 포트 (즉시 실패)
+- blackhole: 연결은 받지만 응답하지 않는 서버 (stimeout/제한 시간까지 대기)
+검사하는 동안 이벤트 루프 지연(최대 멈춤 시간)도 함께 측정합니다.
+
+사용 예:
+    python bench/bench_rtsp_probe.py --cameras 20 --concurrency 8
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.capture_process import open_rtsp_capture  # noqa: E402
+from functions.rtsp_probe import RtspProber  # noqa: E402
+
+
+def make_clip(path):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (320, 240))
+    for i in range(10):
+        frame = np.full((240, 320, 3), i * 20, dtype=np.uint8)
+        writer.write(frame)
+    writer.release()
+
+
+def blackhole():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(128)
+    held = []
+
+    def accept():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            held.append(conn)
+
+    threading.Thread(target=accept, daemon=True).start()
+    return server
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+def legacy_probe(url, transport):
+    # 기존 _test_rtsp_connection: 이벤트 루프 스레드에서 그대로 실행
+    cap = open_rtsp_capture(url, transport)
+    try:
+        if not cap.isOpened():
+            return False
+        ok, frame = cap.read()
+        return bool(ok and frame is not None)
+    finally:
+        cap.release()
+
+
+async def loop_lag(stop, result):
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - start - 0.01)
+    result["max_loop_stall_ms"] = round(worst * 1000, 1)
+
+
+async def run_legacy(targets):
+    stop, lag = asyncio.Event(), {}
+    ticker = asyncio.create_task(loop_lag(stop, lag))
+    await asyncio.sleep(0)
+    start = time.perf_counter()
+    connected = 0
+    for url in targets:
+        # 기존 auto 모드: UDP 실패 시 TCP 순차 재시도
+        if legacy_probe(url, "udp") or legacy_probe(url, "tcp"):
+            connected += 1
+        await asyncio.sleep(0)
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    return {"mode": "legacy_serial_in_loop", "seconds": round(elapsed, 2), "connected": connected, **lag}
+
+
+async def run_prober(targets, concurrency, timeout):
+    prober = RtspProber(max_workers=concurrency * 2, timeout=timeout)
+    semaphore = asyncio.Semaphore(concurrency)
+    stop, lag = asyncio.Event(), {}
+    ticker = asyncio.create_task(loop_lag(stop, lag))
+    start = time.perf_counter()
+
+    async def one(url):
+        async with semaphore:
+            return await prober.probe(url, "auto")
+
+    results = await asyncio.gather(*(one(url) for url in targets))
+    elapsed = time.perf_counter() - start
+    stop.set()
+    await ticker
+    stats = prober.stats()
+    prober.close()
+    return {
+        "mode": f"prober_concurrency_{concurrency}",
+        "seconds": round(elapsed, 2),
+        "connected": sum(1 for r in results if r),
+        **lag,
+        "probe_stats": stats,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--cameras", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8])
+    parser.add_argument("--timeout", type=float, default=6.0)
+    parser.add_argument("--mix", default="ok,refused,blackhole", help="대상 종류를 순서대로 반복")
+    parser.add_argument("--skip-legacy", action="store_true")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="rtsp_probe_bench_")
+    clip = os.path.join(workdir, "clip.avi")
+    make_clip(clip)
+    hole = blackhole()
+    kinds = args.mix.split(",")
+    urls = {
+        "ok": clip,
+        "refused": f"rtsp://127.0.0.1:{free_port()}/stream",
+        "blackhole": f"rtsp://127.0.0.1:{hole.getsockname()[1]}/stream",
+    }
+    targets = [urls[kinds[i % len(kinds)]] for i in range(args.cameras)]
+
+    results = []
+    if not args.skip_legacy:
+        results.append(asyncio.run(run_legacy(targets)))
+    for concurrency in args.concurrency:
+        results.append(asyncio.run(run_prober(targets, concurrency, args.timeout)))
+    hole.close()
+
+    report = {
+        "benchmark": "rtsp_probe",
+        "cameras": args.cameras,
+        "mix": kinds,
+        "timeout_sec": args.timeout,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+RTSP 재연결 벤치마크: 기존(이벤트 루프 안에서 0.5초마다 무한 재시도) vs RtspSupervisor(백오프 + 동시 재연결 상한)
+
+죽은 카메라 N대와 정상 카메라(로컬 영상 파일) 1대를 스트림 워커와 같은 방식으로 돌리면서
+- 재연결 시도 수(분당), 동시에 열고 있던 최대 연결 수
+- 이벤트 루프 최대 멈춤 시간
+- 정상 카메라가 그동안 읽은 프레임 수
+를 비교합니다. 죽은 카메라는 닫힌 포트(즉시 실패)와 응답 없는 서버(stimeout까지 대기)를 섞습니다.
+
+사용 예:
+    python bench/bench_rtsp_supervisor.py --dead 30 --seconds 30
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import sys
+import tempfile
+import threading
+import time
+
+import cv2
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.capture_process import open_rtsp_source  # noqa: E402
+from functions.rtsp_supervisor import RtspSupervisor  # noqa: E402
+
+
+def make_clip(path):
+    writer = cv2.VideoWriter(path, cv2.VideoWriter_fourcc(*"MJPG"), 10, (320, 240))
+    for i in range(50):
+        writer.write(np.full((240, 320, 3), i * 5, dtype=np.uint8))
+    writer.release()
+
+
+def blackhole():
+    server = socket.socket()
+    server.bind(("127.0.0.1", 0))
+    server.listen(128)
+    held = []
+
+    def accept():
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            held.append(conn)
+
+    threading.Thread(target=accept, daemon=True).start()
+    return server
+
+
+def free_port():
+    sock = socket.socket()
+    sock.bind(("127.0.0.1", 0))
+    port = sock.getsockname()[1]
+    sock.close()
+    return port
+
+
+class Counters:
+    def __init__(self):
+        self.attempts = 0
+        self.opening = 0
+        self.peak_opening = 0
+        self.frames = 0
+        self._lock = threading.Lock()
+
+    def open(self, url, transport):
+        with self._lock:
+            self.attempts += 1
+            self.opening += 1
+            self.peak_opening = max(self.peak_opening, self.opening)
+        try:
+            return open_rtsp_source(url, transport)
+        finally:
+            with self._lock:
+                self.opening -= 1
+
+
+async def loop_lag(stop, result):
+    worst = 0.0
+    while not stop.is_set():
+        start = time.perf_counter()
+        await asyncio.sleep(0.01)
+        worst = max(worst, time.perf_counter() - start - 0.01)
+    result["max_loop_stall_ms"] = round(worst * 1000, 1)
+
+
+async def legacy_worker(cam_id, url, counters, stop):
+    # 기존 _stream_worker: 루프 스레드에서 직접 열고, 실패하면 0.5초 뒤 다시
+    cap = None
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        if cap is None:
+            cap, _ = counters.open(url, "tcp")
+            if cap is None:
+                await asyncio.sleep(0.5)
+                continue
+        ok, frame = cap.read()
+        if not ok or frame is None:
+            cap.release()
+            cap = None
+            await asyncio.sleep(0.5)
+            continue
+        counters.frames += cam_id == "live"
+    if cap is not None:
+        cap.release()
+
+
+async def supervised_worker(cam_id, url, counters, stop, supervisor):
+    cap = None
+    while not stop.is_set():
+        await asyncio.sleep(0.01)
+        if cap is None:
+            if not supervisor.try_begin(cam_id):
+                await asyncio.sleep(0.5)
+                continue
+            cap, _ = await asyncio.to_thread(counters.open, url, "tcp")
+            supervisor.end(cam_id, cap is not None, None if cap is not None else "connect failed")
+            if cap is None:
+                await asyncio.sleep(0.5)
+                continue
+        ok, frame = cap.read()
+        if not ok or frame is None:
+            cap.release()
+            cap = None
+            supervisor.lost(cam_id, "read failed")
+            await asyncio.sleep(0.5)
+            continue
+        supervisor.frame(cam_id)
+        counters.frames += cam_id == "live"
+    if cap is not None:
+        cap.release()
+
+
+async def run(mode, targets, seconds, args):
+    counters = Counters()
+    stop, lag = asyncio.Event(), {}
+    ticker = asyncio.create_task(loop_lag(stop, lag))
+    transitions = []
+    supervisor = RtspSupervisor(
+        max_concurrent=args.max_concurrent,
+        backoff_base=args.backoff_base,
+        backoff_max=args.backoff_max,
+        down_after=args.down_after,
+        on_transition=lambda cam_id, prev, state, info: transitions.append(state),
+    )
+    if mode == "legacy":
+        workers = [asyncio.create_task(legacy_worker(c, u, counters, stop)) for c, u in targets]
+    else:
+        workers = [asyncio.create_task(supervised_worker(c, u, counters, stop, supervisor)) for c, u in targets]
+    start = time.perf_counter()
+    await asyncio.sleep(seconds)
+    stop.set()
+    await asyncio.gather(*workers, ticker)
+    elapsed = time.perf_counter() - start
+    result = {
+        "mode": mode,
+        "seconds": round(elapsed, 1),
+        "attempts": counters.attempts,
+        "attempts_per_min": round(counters.attempts / elapsed * 60, 1),
+        "peak_concurrent_opens": counters.peak_opening,
+        "live_camera_frames": counters.frames,
+        **lag,
+    }
+    if mode == "supervisor":
+        stats = supervisor.stats()
+        result.update({"states": stats["states"], "deferred": stats["deferred"], "transitions": len(transitions)})
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dead", type=int, default=30)
+    parser.add_argument("--seconds", type=float, default=30.0)
+    parser.add_argument("--mix", default="refused,blackhole", help="죽은 카메라 종류를 순서대로 반복")
+    parser.add_argument("--max-concurrent", type=int, default=4)
+    parser.add_argument("--backoff-base", type=float, default=1.0)
+    parser.add_argument("--backoff-max", type=float, default=60.0)
+    parser.add_argument("--down-after", type=int, default=3)
+    parser.add_argument("--skip-legacy", action="store_true")
+    parser.add_argument("--out", default=None)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="rtsp_supervisor_bench_")
+    clip = os.path.join(workdir, "clip.avi")
+    make_clip(clip)
+    hole = blackhole()
+    kinds = args.mix.split(",")
+    urls = {
+        "refused": f"rtsp://127.0.0.1:{free_port()}/stream",
+        "blackhole": f"rtsp://127.0.0.1:{hole.getsockname()[1]}/stream",
+    }
+    targets = [("live", clip)] + [(f"dead{i}", urls[kinds[i % len(kinds)]]) for i in range(args.dead)]
+
+    results = []
+    if not args.skip_legacy:
+        results.append(asyncio.run(run("legacy", targets, args.seconds, args)))
+    results.append(asyncio.run(run("supervisor", targets, args.seconds, args)))
+    hole.close()
+
+    report = {
+        "benchmark": "rtsp_supervisor",
+        "dead_cameras": args.dead,
+        "mix": kinds,
+        "max_concurrent": args.max_concurrent,
+        "backoff_sec": [args.backoff_base, args.backoff_max],
+        "results": results,
+    }
+    text = json.dumps(report, indent=2)
+    print(text)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text)
+
+
+if __name__ == "__main__":
+    main()
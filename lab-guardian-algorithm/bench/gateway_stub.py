@@ -0,0 +1,150 @@
+"""
+C# 게이트웨이(TCP 8888) 로컬 대역 서버.
+
+Program.cs와 같은 규칙으로 메시지를 나눕니다.
+- 연결의 첫 바이트가 0x00이면 길이 접두 바이너리 프레임 (functions/gateway_protocol.py)
+- 아니면 줄바꿈(\\n) 단위 텍스트. 연결이 닫힐 때 남은 바이트도 1건
+  (구버전 클라이언트는 줄바꿈 없이 1건 보내고 연결을 닫음)
+
+단독 실행 예:
+    python bench/gateway_stub.py --port 8888
+"""
+import argparse
+import os
+import socket
+import sys
+import threading
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from functions.gateway_protocol import FRAME_MARKER, FrameDecoder  # noqa: E402
+
+
+class GatewayStub:
+    def __init__(self, host="127.0.0.1", port=0):
+        self.host = host
+        self.messages = []
+        self.events = []
+        self.frames = 0
+        self.connections = 0
+        self._lock = threading.Lock()
+        self._server = None
+        self._clients = set()
+        self.port = port
+        self.start()
+
+    def start(self):
+        server = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        server.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        server.bind((self.host, self.port))
+        server.listen(128)
+        self.port = server.getsockname()[1]
+        self._server = server
+        threading.Thread(target=self._accept_loop, args=(server,), daemon=True).start()
+
+    def stop(self):
+        """게이트웨이 다운 흉내: 리스너와 기존 연결을 모두 닫음"""
+        server, self._server = self._server, None
+        if server is not None:
+            # 다른 스레드에서 accept() 중인 리스너는 shutdown 해야 포트가 바로 풀림
+            try:
+                server.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            server.close()
+        with self._lock:
+            clients, self._clients = self._clients, set()
+        for conn in clients:
+            try:
+                conn.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            conn.close()
+
+    def _accept_loop(self, server):
+        while True:
+            try:
+                conn, _ = server.accept()
+            except OSError:
+                return
+            with self._lock:
+                self.connections += 1
+                self._clients.add(conn)
+            threading.Thread(target=self._client_loop, args=(conn,), daemon=True).start()
+
+    def _client_loop(self, conn):
+        pending = b""
+        decoder = None
+        binary = None
+        try:
+            while True:
+                data = conn.recv(65536)
+                if not data:
+                    if pending:
+                        self._record([pending])
+                    break
+                if binary is None:
+                    binary = data[0] == FRAME_MARKER
+                    decoder = FrameDecoder() if binary else None
+                if binary:
+                    before = decoder.frames
+                    self._record_events(decoder.feed(data), decoder.frames - before)
+                    continue
+                pending += data
+                *lines, pending = pending.split(b"\n")
+                self._record(lines)
+        except (OSError, ValueError):
+            pass
+        finally:
+            with self._lock:
+                self._clients.discard(conn)
+            conn.close()
+
+    def _record(self, chunks):
+        texts = [c.decode("utf-8").strip() for c in chunks]
+        with self._lock:
+            self.messages.extend(t for t in texts if t)
+
+    def _record_events(self, events, frames):
+        with self._lock:
+            self.frames += frames
+            self.events.extend(events)
+            self.messages.extend(event.to_text() for event in events)
+
+    def reset(self):
+        with self._lock:
+            self.messages = []
+            self.events = []
+            self.frames = 0
+            self.connections = 0
+
+    def wait_for(self, count, timeout):
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                if len(self.messages) >= count:
+                    return True
+            time.sleep(0.005)
+        return False
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8888)
+    args = parser.parse_args()
+    stub = GatewayStub(args.host, args.port)
+    print(f"gateway stub listening on {args.host}:{stub.port}")
+    seen = 0
+    while True:
+        time.sleep(0.5)
+        with stub._lock:
+            new = stub.messages[seen:]
+            seen = len(stub.messages)
+        for msg in new:
+            print(msg)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,130 @@
+"""
+샤드 레지스트리 로컬 대역 서버 (알고리즘 노드 목록 관리)
+
+- POST   /nodes/heartbeat  {"node_id", "url"} -> {"version", "nodes": {node_id: url}}
+- DELETE /nodes/{node_id}  정상 종료한 노드 제거
+- GET    /nodes            현재 노드 목록
+하트비트가 ttl초 동안 없는 노드는 목록에서 빠지고, 구성이 바뀔 때마다 version이 올라갑니다.
+
+사용 예:
+    python bench/shard_registry_stub.py --port 8500 --ttl 6
+    SHARD_REGISTRY_URL=http://127.0.0.1:8500 SHARD_NODE_ID=node-a PORT_ALGO=3000 python main.py
+    SHARD_REGISTRY_URL=http://127.0.0.1:8500 SHARD_NODE_ID=node-b PORT_ALGO=3001 python main.py
+"""
+import argparse
+import json
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+class ShardRegistryStub:
+    def __init__(self, host="127.0.0.1", port=0, ttl=6.0):
+        self.ttl = ttl
+        self.nodes = {}  # { node_id: {"url", "seen"} }
+        self.version = 0
+        self._lock = threading.Lock()
+        registry = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _reply(self, code, body):
+                data = json.dumps(body).encode("utf-8")
+                self.send_response(code)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def do_GET(self):
+                if self.path.rstrip("/") == "/nodes":
+                    self._reply(200, registry.snapshot())
+                else:
+                    self._reply(404, {"detail": "not found"})
+
+            def do_POST(self):
+                if self.path.rstrip("/") != "/nodes/heartbeat":
+                    self._reply(404, {"detail": "not found"})
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                try:
+                    body = json.loads(self.rfile.read(length) or b"{}")
+                    node_id, url = body["node_id"], body["url"]
+                except (ValueError, KeyError):
+                    self._reply(400, {"detail": "node_id and url are required"})
+                    return
+                self._reply(200, registry.heartbeat(node_id, url))
+
+            def do_DELETE(self):
+                parts = self.path.strip("/").split("/")
+                if len(parts) == 2 and parts[0] == "nodes":
+                    registry.remove(parts[1])
+                    self._reply(200, registry.snapshot())
+                else:
+                    self._reply(404, {"detail": "not found"})
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_address[1]
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+
+    def _expire(self, now):
+        expired = [node_id for node_id, info in self.nodes.items() if now - info["seen"] > self.ttl]
+        for node_id in expired:
+            del self.nodes[node_id]
+        if expired:
+            self.version += 1
+
+    def heartbeat(self, node_id, url):
+        now = time.time()
+        with self._lock:
+            self._expire(now)
+            info = self.nodes.get(node_id)
+            if info is None or info["url"] != url:
+                self.version += 1
+            self.nodes[node_id] = {"url": url, "seen": now}
+            return self._snapshot()
+
+    def remove(self, node_id):
+        with self._lock:
+            if self.nodes.pop(node_id, None) is not None:
+                self.version += 1
+
+    def snapshot(self):
+        with self._lock:
+            self._expire(time.time())
+            return self._snapshot()
+
+    def _snapshot(self):
+        return {"version": self.version, "nodes": {k: v["url"] for k, v in self.nodes.items()}}
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8500)
+    parser.add_argument("--ttl", type=float, default=6.0)
+    args = parser.parse_args()
+    stub = ShardRegistryStub(args.host, args.port, args.ttl)
+    print(f"샤드 레지스트리 대역 서버: http://{args.host}:{stub.port} (ttl={args.ttl}s)")
+    last = None
+    try:
+        while True:
+            time.sleep(1.0)
+            snap = stub.snapshot()
+            if snap != last:
+                print(json.dumps(snap, ensure_ascii=False))
+                last = snap
+    except KeyboardInterrupt:
+        stub.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,6 +2,7 @@
 from ultralytics import YOLO
 import cv2
 import numpy as np
+import time
 import torch
 
 # 🔴 [수정] main.py 실행 위치 기준으로 경로 변경
@@ -19,16 +20,20 @@ class AIDetector:
         self.trackers = {}
         print("✅ [AI] 모델 및 트래커 준비 완료!")
 
-    def detect_and_track(self, cam_id, frame):
+    def detect_and_track(self, cam_id, frame, timings=None):
         """
         프레임을 분석하고, '사람(Person)' 객체의 ID 리스트를 반환합니다.
+        timings(dict)를 넘기면 단계별 소요 시간(초)을 inference/tracking/annotate 키로 채웁니다.
         """
+        t0 = time.perf_counter()
         # 🚀 [핵심 수정 1] classes=[0] -> 사람(0번)만 탐지하도록 강제
         # 🚀 [핵심 수정 2] conf=0.5 -> 확신이 50% 이상일 때만 탐지
         results = self.model(frame, verbose=False, classes=[0], conf=0.5)
+        t1 = time.perf_counter()
         
         # YOLO가 그린 그림 (사람만 그려져 있음)
         annotated_frame = results[0].plot()
+        t2 = time.perf_counter()
         
         person_rects = []
         
@@ -49,6 +54,7 @@ class AIDetector:
         
         # 이번 프레임에서 '새로' ID를 부여받은 목록 추출
         new_ids = getattr(self.trackers[cam_id], 'new_detected_ids', [])
+        t3 = time.perf_counter()
         
         # 화면에 추적 ID 그리기 (디버깅용)
         for (objectID, centroid) in objects.items():
@@ -58,6 +64,11 @@ class AIDetector:
             # 글자 쓰기
             cv2.putText(annotated_frame, text, (centroid[0] - 10, centroid[1] - 10),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.5, (0, 0, 255), 2)
+
+        if timings is not None:
+            timings["inference"] = t1 - t0
+            timings["tracking"] = t3 - t2
+            timings["annotate"] = (t2 - t1) + (time.perf_counter() - t3)
             
         return annotated_frame, new_ids, objects
 
@@ -0,0 +1,80 @@
+import threading
+
+
+class AlertBoostScheduler:
+    """
+    위험(DANGER) 카메라의 스트림 품질을 일정 시간 동안만 올려주는 스케줄러.
+    - 부스트는 hold_sec 동안 유지되고, 시간이 지나면 자동으로 원래 설정으로 복귀합니다.
+    - 동시에 부스트되는 카메라 수는 max_boosted(인코딩 예산)로 제한합니다.
+    """
+
+    def __init__(self, hold_sec=10.0, max_boosted=2, boost_preset=None):
+        self.hold_sec = max(float(hold_sec), 1.0)
+        self.max_boosted = max(int(max_boosted), 0)
+        self.boost_preset = boost_preset or {
+            "width": 1920,
+            "height": 1080,
+            "fps": 12,
+            "quality": 90,
+            "label": "alert-1080p",
+        }
+        # { "cam_id": { "until": float, "started": float } }
+        self.boosts = {}
+        self.denied = 0
+        self._lock = threading.Lock()
+
+    def _expire(self, now):
+        expired = [cam_id for cam_id, info in self.boosts.items() if now >= info["until"]]
+        for cam_id in expired:
+            del self.boosts[cam_id]
+            print(f"🔽 [품질 복귀] {cam_id}")
+
+    def request(self, cam_id, now):
+        """부스트 요청: 이미 부스트 중이면 유지 시간 연장, 예산 초과면 거절(False)"""
+        with self._lock:
+            self._expire(now)
+            info = self.boosts.get(cam_id)
+            if info is not None:
+                info["until"] = now + self.hold_sec
+                return True
+            if len(self.boosts) >= self.max_boosted:
+                self.denied += 1
+                return False
+            self.boosts[cam_id] = {"until": now + self.hold_sec, "started": now}
+            print(f"🔼 [경보 품질] {cam_id} -> {self.boost_preset['label']} ({self.hold_sec:.0f}초)")
+            return True
+
+    def release(self, cam_id):
+        with self._lock:
+            self.boosts.pop(cam_id, None)
+
+    def effective_config(self, cam_id, base_cfg, now):
+        """부스트 중이면 경보 설정을, 아니면 기본 설정을 반환"""
+        if not self.boosts:
+            return base_cfg
+        with self._lock:
+            self._expire(now)
+            if cam_id not in self.boosts:
+                return base_cfg
+        return {
+            "width": self.boost_preset["width"],
+            "height": self.boost_preset["height"],
+            "fps": max(float(base_cfg.get("fps", 0)), float(self.boost_preset["fps"])),
+            "quality": self.boost_preset["quality"],
+            "label": self.boost_preset["label"],
+            "auto": False,
+            "boost": True,
+        }
+
+    def status(self, now):
+        with self._lock:
+            self._expire(now)
+            return {
+                "hold_sec": self.hold_sec,
+                "max_boosted": self.max_boosted,
+                "denied": self.denied,
+                "active": {
+                    cam_id: round(info["until"] - now, 2)
+                    for cam_id, info in self.boosts.items()
+                },
+            }
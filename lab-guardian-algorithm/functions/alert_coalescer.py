@@ -0,0 +1,95 @@
+import threading
+import time
+
+
+class AlertCoalescer:
+    """
+    다중 카메라 경보 묶음 처리 (텔레그램 알림용).
+    - 조용하던 중 들어온 첫 경보는 기다리지 않고 바로 on_single로 보내고 window_sec 창을 엽니다.
+    - 창 안에 뒤따라 들어온 경보만 모아 창이 끝날 때 flush 합니다 (1건이면 on_single, 2건 이상이면 on_digest).
+      flush한 경보가 있으면 창을 다시 열어 경보가 이어지는 동안 계속 묶고, 없으면 창을 닫습니다.
+    - max_batch를 넘으면 창이 끝나기 전에 바로 flush 합니다 (텔레그램 미디어 그룹 최대 10장).
+    window_sec가 0이면 묶지 않고 바로 on_single을 호출합니다.
+    """
+
+    def __init__(self, on_single, on_digest, window_sec=3.0, max_batch=10):
+        self.on_single = on_single
+        self.on_digest = on_digest
+        self.window_sec = max(float(window_sec), 0.0)
+        self.max_batch = max(int(max_batch), 1)
+        self.pending = []
+        self.window_started = None
+        self.received = 0
+        self.flushed_messages = 0
+        self.digests = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        if self.window_sec > 0:
+            threading.Thread(target=self._loop, name="alert-coalescer", daemon=True).start()
+
+    def submit(self, event):
+        if self.window_sec <= 0:
+            with self._lock:
+                self.received += 1
+                self.flushed_messages += 1
+            self.on_single(event)
+            return
+        batch = None
+        with self._lock:
+            self.received += 1
+            if self.window_started is None:
+                # 첫 경보: 바로 보내고 뒤따르는 경보를 모을 창을 엶
+                self.window_started = time.time()
+                self._wake.notify()
+                batch = [event]
+            else:
+                self.pending.append(event)
+                if len(self.pending) >= self.max_batch:
+                    batch = self._take()
+        if batch:
+            self._flush(batch)
+
+    def _take(self):
+        # 창은 그대로 두고 모인 경보만 꺼냄 (창 끝에서 새 창을 열지 결정)
+        batch, self.pending = self.pending, []
+        return batch
+
+    def _loop(self):
+        while True:
+            with self._lock:
+                while self.window_started is None:
+                    self._wake.wait()
+                remaining = self.window_started + self.window_sec - time.time()
+                if remaining > 0:
+                    self._wake.wait(remaining)
+                    continue
+                batch = self._take()
+                # 모인 경보가 있으면 경보가 이어지는 중이므로 창을 다시 열고, 없으면 닫음
+                self.window_started = time.time() if batch else None
+            if batch:
+                self._flush(batch)
+
+    def _flush(self, batch):
+        with self._lock:
+            self.flushed_messages += 1
+            if len(batch) > 1:
+                self.digests += 1
+        try:
+            if len(batch) == 1:
+                self.on_single(batch[0])
+            else:
+                print(f"📦 [경보 묶음] {len(batch)}건 -> 1건 ({', '.join(e.cam_id for e in batch)})")
+                self.on_digest(batch)
+        except Exception as e:
+            print(f"❌ [경보 묶음 처리 실패] {e}")
+
+    def stats(self):
+        with self._lock:
+            return {
+                "window_sec": self.window_sec,
+                "pending": len(self.pending),
+                "received": self.received,
+                "sent": self.flushed_messages,
+                "digests": self.digests,
+                "saved_messages": self.received - self.flushed_messages - len(self.pending),
+            }
@@ -0,0 +1,113 @@
+import queue
+import threading
+import time
+
+
+class AlertEvent:
+    """탐지 루프가 만드는 경보 이벤트. 이후 처리(디스크/네트워크)는 파이프라인 워커가 담당"""
+
+    __slots__ = ("cam_id", "kind", "status", "frame", "created", "image_path", "jpeg_bytes", "meta")
+
+    def __init__(self, cam_id, kind, status, frame=None, created=None, meta=None):
+        self.cam_id = cam_id
+        # "intrusion": 스냅샷/알림/녹화/게이트웨이 전체, "status": 게이트웨이 상태 보고만,
+        # "digest": 묶음 창 안의 intrusion 여러 건 (meta["events"], 텔레그램 알림만)
+        self.kind = kind
+        self.status = status
+        self.frame = frame
+        self.created = created if created is not None else time.time()
+        self.image_path = None
+        self.jpeg_bytes = None
+        self.meta = meta or {}
+
+
+class _Stage:
+    def __init__(self, name, handler, workers, queue_size):
+        self.name = name
+        self.handler = handler
+        self.workers = workers
+        self.queue = queue.Queue(maxsize=queue_size)
+        self.processed = 0
+        self.dropped = 0
+        self.errors = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        self.handle_total = 0.0
+        self.handle_max = 0.0
+        self._lock = threading.Lock()
+
+    def record(self, wait, handle, ok):
+        with self._lock:
+            self.processed += 1
+            if not ok:
+                self.errors += 1
+            self.wait_total += wait
+            self.handle_total += handle
+            self.wait_max = max(self.wait_max, wait)
+            self.handle_max = max(self.handle_max, handle)
+
+    def stats(self):
+        with self._lock:
+            count = max(self.processed, 1)
+            return {
+                "workers": self.workers,
+                "depth": self.queue.qsize(),
+                "capacity": self.queue.maxsize,
+                "processed": self.processed,
+                "dropped": self.dropped,
+                "errors": self.errors,
+                "wait_ms_avg": round(self.wait_total / count * 1000, 2),
+                "wait_ms_max": round(self.wait_max * 1000, 2),
+                "handle_ms_avg": round(self.handle_total / count * 1000, 2),
+                "handle_ms_max": round(self.handle_max * 1000, 2),
+            }
+
+
+class AlertPipeline:
+    """
+    경보 후속 처리 파이프라인.
+    - 단계(stage)마다 제한된 큐와 전용 워커 스레드를 둡니다.
+    - submit()은 절대 막히지 않고, 큐가 가득 차면 이벤트를 버리고 dropped로 집계합니다.
+    - 핸들러는 다음 단계로 이벤트를 다시 submit 해서 단계를 이어 붙입니다.
+    """
+
+    def __init__(self, queue_size=64):
+        self.queue_size = max(int(queue_size), 1)
+        self.stages = {}
+
+    def add_stage(self, name, handler, workers=1, queue_size=None):
+        stage = _Stage(name, handler, max(int(workers), 1), queue_size or self.queue_size)
+        self.stages[name] = stage
+        for i in range(stage.workers):
+            threading.Thread(target=self._worker, args=(stage,), name=f"alert-{name}-{i}", daemon=True).start()
+        return stage
+
+    def submit(self, stage_name, event):
+        stage = self.stages[stage_name]
+        try:
+            stage.queue.put_nowait((event, time.perf_counter()))
+            return True
+        except queue.Full:
+            with stage._lock:
+                stage.dropped += 1
+            print(f"⚠️ [경보 파이프라인] {stage_name} 큐 가득 참 -> {event.cam_id} 이벤트 드랍")
+            return False
+
+    def _worker(self, stage):
+        while True:
+            event, enqueued = stage.queue.get()
+            started = time.perf_counter()
+            ok = True
+            try:
+                stage.handler(event)
+            except Exception as e:
+                ok = False
+                print(f"❌ [경보 파이프라인] {stage.name} 처리 실패 ({event.cam_id}): {e}")
+            stage.record(started - enqueued, time.perf_counter() - started, ok)
+
+    def depth(self, stage_name):
+        stage = self.stages.get(stage_name)
+        return stage.queue.qsize() if stage else 0
+
+    def stats(self):
+        return {name: stage.stats() for name, stage in self.stages.items()}
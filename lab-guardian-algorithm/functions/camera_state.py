@@ -0,0 +1,126 @@
+class CameraState:
+    """
+    카메라 1대의 런타임 상태.
+    핫패스(업로드/스트림 워커/뷰어)는 레지스트리에서 이 객체를 한 번 찾아 필드를 직접 읽고 씁니다.
+    """
+
+    __slots__ = (
+        "cam_id",
+        "source",             # RTSP 등록 정보 {"type", "url", "transport", "active_transport", "main_url", "main_transport"}
+        "frame",              # 업로드(로봇/USB) 최신 프레임
+        "annotated_frame",    # 마지막 탐지 결과 프레임 (탐지 주기 사이 화면용)
+        "jpeg",               # 스트림 워커가 인코딩한 최신 JPEG 바이트
+        "jpeg_ts",
+        "jpeg_seq",           # 발행한 JPEG 일련번호 (뷰어별 건너뛴 프레임 계산용)
+        "jpeg_trace",         # 최신 JPEG의 프레임 타임라인 (캡처 시각/일련번호, functions/frame_trace.py)
+        "frame_trace",        # 업로드 프레임의 타임라인
+        "annotated_trace",    # 탐지 결과 프레임의 타임라인
+        "capture_seq",        # 워커/업로드가 직접 읽는 소스의 캡처 일련번호
+        "status",             # "SAFE" / "DANGER"
+        "monitoring",
+        "verified",           # 뷰어가 실제로 화면을 보고 있음 (업로드 카메라 경보 조건)
+        "viewers",
+        "last_seen",
+        "last_heartbeat",
+        "last_alert",
+        "last_danger",
+        "last_stream_sent",
+        "last_detect",
+        "stream_config",
+        "stream_task",
+        "stream_stop",
+    )
+
+    def __init__(self, cam_id):
+        self.cam_id = cam_id
+        self.source = None
+        self.frame = None
+        self.annotated_frame = None
+        self.jpeg = None
+        self.jpeg_ts = 0.0
+        self.jpeg_seq = 0
+        self.jpeg_trace = None
+        self.frame_trace = None
+        self.annotated_trace = None
+        self.capture_seq = 0
+        self.status = "SAFE"
+        self.monitoring = False
+        self.verified = False
+        self.viewers = 0
+        self.last_seen = 0.0
+        self.last_heartbeat = 0.0
+        self.last_alert = 0.0
+        self.last_danger = 0.0
+        self.last_stream_sent = 0.0
+        self.last_detect = 0.0
+        self.stream_config = None
+        self.stream_task = None
+        self.stream_stop = None
+
+    def streaming(self):
+        return self.stream_task is not None and not self.stream_task.done()
+
+    def last_active(self):
+        return max(self.last_seen, self.last_stream_sent, self.last_detect, self.last_danger)
+
+    def release_frames(self):
+        """프레임/JPEG 참조 해제 (다음 프레임이 오면 다시 채워짐)"""
+        held = self.frame is not None or self.annotated_frame is not None or self.jpeg is not None
+        self.frame = None
+        self.annotated_frame = None
+        self.jpeg = None
+        self.jpeg_ts = 0.0
+        self.jpeg_trace = self.frame_trace = self.annotated_trace = None
+        return held
+
+    def frame_bytes(self):
+        total = len(self.jpeg) if self.jpeg is not None else 0
+        for frame in (self.frame, self.annotated_frame):
+            if frame is not None:
+                total += frame.nbytes
+        return total
+
+
+class CameraRegistry:
+    """cam_id -> CameraState. 카메라별 상태의 유일한 저장소"""
+
+    def __init__(self):
+        self._cameras = {}
+
+    def get(self, cam_id):
+        return self._cameras.get(cam_id)
+
+    def ensure(self, cam_id):
+        state = self._cameras.get(cam_id)
+        if state is None:
+            state = self._cameras[cam_id] = CameraState(cam_id)
+        return state
+
+    def remove(self, cam_id):
+        return self._cameras.pop(cam_id, None)
+
+    def __contains__(self, cam_id):
+        return cam_id in self._cameras
+
+    def __len__(self):
+        return len(self._cameras)
+
+    def states(self):
+        return list(self._cameras.values())
+
+    def idle(self, now, idle_sec):
+        """뷰어/스트림 워커가 없고 idle_sec 동안 활동이 없는 카메라"""
+        return [
+            state for state in self._cameras.values()
+            if state.viewers == 0 and not state.streaming() and now - state.last_active() >= idle_sec
+        ]
+
+    def stats(self):
+        states = list(self._cameras.values())
+        return {
+            "cameras": len(states),
+            "streaming": sum(1 for s in states if s.streaming()),
+            "monitoring": sum(1 for s in states if s.monitoring),
+            "viewers": sum(s.viewers for s in states),
+            "frame_bytes": sum(s.frame_bytes() for s in states),
+        }
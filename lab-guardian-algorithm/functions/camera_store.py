@@ -0,0 +1,207 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+try:
+    from cryptography.fernet import Fernet, InvalidToken
+except ImportError:  # 선택 의존성: 없으면 비밀 파일을 권한(0600)으로만 보호
+    Fernet = None
+    InvalidToken = Exception
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS cameras (
+    cam_id TEXT PRIMARY KEY,
+    source_type TEXT,
+    masked_url TEXT,
+    stream TEXT,
+    transport TEXT,
+    active_transport TEXT,
+    main_transport TEXT,
+    monitoring INTEGER NOT NULL DEFAULT 0,
+    stream_config TEXT,
+    updated_at REAL NOT NULL
+);
+"""
+
+_SECRET_PREFIX = "fernet:"
+# 듀얼 스트림 카메라의 메인 스트림 주소는 "<cam_id>#main" 키로 저장
+_MAIN_SUFFIX = "#main"
+
+
+class CameraStore:
+    """
+    카메라 등록 정보 영구 저장소 (재시작 후 자동 복구용).
+    - SQLite(cameras 테이블): 소스 종류, 마스킹된 주소, 전송 방식(서브/메인 스트림), 감시 여부, 수동 스트림 설정
+    - 계정이 들어간 RTSP 주소는 별도 비밀 파일(0600)에만 저장. secret_key가 있고 cryptography가 설치돼 있으면 암호화
+    """
+
+    def __init__(self, db_path="cameras.db", secrets_path="camera_secrets.json", secret_key=None):
+        self.db_path = db_path
+        self.secrets_path = secrets_path
+        self._lock = threading.Lock()
+        self._fernet = None
+        if secret_key:
+            if Fernet is None:
+                print("⚠️ [카메라 저장소] cryptography가 없어 RTSP 주소를 암호화하지 않습니다 (파일 권한 0600만 적용).")
+            else:
+                self._fernet = Fernet(secret_key.encode("utf-8") if isinstance(secret_key, str) else secret_key)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._migrate()
+        self.conn.commit()
+        self._secrets = self._load_secrets()
+        self.writes = 0
+
+    def _migrate(self):
+        # main_transport 열이 없던 이전 파일
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(cameras)")}
+        if "main_transport" not in columns:
+            self.conn.execute("ALTER TABLE cameras ADD COLUMN main_transport TEXT")
+
+    # --- 비밀(RTSP 주소) ---
+    def _load_secrets(self):
+        try:
+            with open(self.secrets_path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            return data if isinstance(data, dict) else {}
+        except (OSError, ValueError):
+            return {}
+
+    def _save_secrets(self):
+        tmp = self.secrets_path + ".tmp"
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            json.dump(self._secrets, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.secrets_path)
+
+    def _seal(self, url):
+        if self._fernet is None:
+            return url
+        return _SECRET_PREFIX + self._fernet.encrypt(url.encode("utf-8")).decode("ascii")
+
+    def _unseal(self, value):
+        if not value or not value.startswith(_SECRET_PREFIX):
+            return value
+        if self._fernet is None:
+            return None
+        try:
+            return self._fernet.decrypt(value[len(_SECRET_PREFIX):].encode("ascii")).decode("utf-8")
+        except InvalidToken:
+            return None
+
+    # --- 쓰기 (등록/감시/설정 변경 시점) ---
+    def save(self, state, masked_url=None, stream=None):
+        """CameraState의 영구 항목(소스, 감시 여부, 수동 스트림 설정)을 기록"""
+        source = state.source or {}
+        cfg = state.stream_config if state.stream_config and not state.stream_config.get("auto") else None
+        if not source and not state.monitoring and not cfg:
+            # 복구할 내용이 없는 카메라는 저장하지 않음
+            self.remove(state.cam_id)
+            return
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT masked_url, stream FROM cameras WHERE cam_id = ?", (state.cam_id,)
+            ).fetchone()
+            if row is not None:
+                masked_url = masked_url or row["masked_url"]
+                stream = stream or row["stream"]
+            self.conn.execute(
+                """
+                INSERT INTO cameras
+                    (cam_id, source_type, masked_url, stream, transport, active_transport, main_transport,
+                     monitoring, stream_config, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(cam_id) DO UPDATE SET
+                    source_type = excluded.source_type,
+                    masked_url = excluded.masked_url,
+                    stream = excluded.stream,
+                    transport = excluded.transport,
+                    active_transport = excluded.active_transport,
+                    main_transport = excluded.main_transport,
+                    monitoring = excluded.monitoring,
+                    stream_config = excluded.stream_config,
+                    updated_at = excluded.updated_at
+                """,
+                (
+                    state.cam_id,
+                    source.get("type"),
+                    masked_url,
+                    stream,
+                    source.get("transport"),
+                    source.get("active_transport"),
+                    source.get("main_transport") if source.get("main_url") else None,
+                    1 if state.monitoring else 0,
+                    json.dumps(cfg) if cfg else None,
+                    time.time(),
+                ),
+            )
+            self.conn.commit()
+            changed = False
+            for key, url in ((state.cam_id, source.get("url")), (state.cam_id + _MAIN_SUFFIX, source.get("main_url"))):
+                if url and self._unseal(self._secrets.get(key)) != url:
+                    self._secrets[key] = self._seal(url)
+                    changed = True
+                elif not url and key in self._secrets:
+                    del self._secrets[key]
+                    changed = True
+            if changed:
+                self._save_secrets()
+            self.writes += 1
+
+    def remove(self, cam_id):
+        with self._lock:
+            self.conn.execute("DELETE FROM cameras WHERE cam_id = ?", (cam_id,))
+            self.conn.commit()
+            removed = [self._secrets.pop(key, None) for key in (cam_id, cam_id + _MAIN_SUFFIX)]
+            if any(value is not None for value in removed):
+                self._save_secrets()
+
+    # --- 읽기 (시작 시 복구) ---
+    def load(self):
+        """저장된 카메라 목록 [{cam_id, source, monitoring, stream_config, masked_url}]"""
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM cameras ORDER BY cam_id").fetchall()
+        cameras = []
+        for row in rows:
+            source = None
+            if row["source_type"]:
+                url = self._unseal(self._secrets.get(row["cam_id"]))
+                if not url:
+                    print(f"⚠️ [카메라 저장소] {row['cam_id']} RTSP 주소를 복구할 수 없어 건너뜁니다.")
+                    continue
+                source = {"type": row["source_type"], "url": url, "transport": row["transport"] or "auto"}
+                if row["active_transport"]:
+                    source["active_transport"] = row["active_transport"]
+                main_url = self._unseal(self._secrets.get(row["cam_id"] + _MAIN_SUFFIX))
+                if main_url:
+                    source["main_url"] = main_url
+                    if row["main_transport"]:
+                        source["main_transport"] = row["main_transport"]
+            cameras.append({
+                "cam_id": row["cam_id"],
+                "source": source,
+                "monitoring": bool(row["monitoring"]),
+                "stream_config": json.loads(row["stream_config"]) if row["stream_config"] else None,
+                "masked_url": row["masked_url"],
+            })
+        return cameras
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM cameras").fetchone()[0]
+
+    def stats(self):
+        return {
+            "db_path": self.db_path,
+            "cameras": self.count(),
+            "secrets": len(self._secrets),
+            "encrypted": self._fernet is not None,
+            "writes": self.writes,
+        }
@@ -0,0 +1,315 @@
+import itertools
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+
+import cv2
+
+from functions import pyav_capture
+from functions.frame_bus import STATUS_CONNECTING, STATUS_DOWN, STATUS_LIVE, FrameRing
+
+_RTSP_CAPTURE_OPTIONS = "fflags;nobuffer|flags;low_delay|max_delay;0|reorder_queue_size;0|stimeout;2000000"
+# 연결/읽기 제한 시간: 응답 없는 카메라가 OpenCV 기본값(30초) 동안 재연결 슬롯을 잡고 있지 않게
+# (캡처/검사 자식 프로세스는 부모 환경변수를 그대로 물려받음)
+_OPEN_TIMEOUT_MS = int(float(os.getenv("RTSP_OPEN_TIMEOUT_SEC", "5")) * 1000)
+# 캡처 백엔드: opencv(cv2.VideoCapture) | pyav(스트림별 옵션, 디코드 생략, 디코더 안에서 축소)
+CAPTURE_BACKEND = os.getenv("CAPTURE_BACKEND", "opencv").lower()
+CAPTURE_MAX_WIDTH = int(os.getenv("CAPTURE_MAX_WIDTH", "1280"))
+CAPTURE_MAX_HEIGHT = int(os.getenv("CAPTURE_MAX_HEIGHT", "720"))
+CAPTURE_SKIP_FRAMES = os.getenv("CAPTURE_SKIP_FRAMES", "auto").lower()
+
+
+# OpenCV FFmpeg 옵션은 프로세스 환경변수로만 전달됨: 같은 옵션(전송 방식)끼리만 동시에 열고
+# 다른 옵션은 앞선 열기가 끝날 때까지 대기 (스레드에서 UDP/TCP가 섞이지 않게)
+_options_gate = threading.Condition()
+_options_active = {"value": None, "count": 0}
+
+
+def capture_backend():
+    """실제로 쓰는 캡처 백엔드 (pyav를 골랐어도 PyAV가 없으면 opencv)"""
+    return "pyav" if CAPTURE_BACKEND == "pyav" and pyav_capture.available() else "opencv"
+
+
+def open_rtsp_capture(url, transport, target_fps=None, full_size=False):
+    if capture_backend() == "pyav":
+        # 옵션이 스트림별로 전달되므로 환경변수/열기 게이트 없이 동시에 열어도 안전
+        return pyav_capture.PyAVCapture(
+            url,
+            transport,
+            max_width=0 if full_size else CAPTURE_MAX_WIDTH,
+            max_height=0 if full_size else CAPTURE_MAX_HEIGHT,
+            target_fps=target_fps,
+            skip=CAPTURE_SKIP_FRAMES,
+            timeout=_OPEN_TIMEOUT_MS / 1000,
+        )
+    options = f"rtsp_transport;{'udp' if transport == 'udp' else 'tcp'}|{_RTSP_CAPTURE_OPTIONS}"
+    with _options_gate:
+        _options_gate.wait_for(
+            lambda: _options_active["count"] == 0 or _options_active["value"] == options
+        )
+        os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = options
+        _options_active["value"] = options
+        _options_active["count"] += 1
+    try:
+        cap = cv2.VideoCapture(
+            url,
+            cv2.CAP_FFMPEG,
+            [cv2.CAP_PROP_OPEN_TIMEOUT_MSEC, _OPEN_TIMEOUT_MS, cv2.CAP_PROP_READ_TIMEOUT_MSEC, _OPEN_TIMEOUT_MS],
+        )
+    finally:
+        with _options_gate:
+            _options_active["count"] -= 1
+            _options_gate.notify_all()
+    try:
+        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+    except Exception:
+        pass
+    return cap
+
+
+def _transport_order(transport, last_transport):
+    if transport != "auto":
+        return [transport]
+    if last_transport in ("tcp", "udp"):
+        return [last_transport, "udp" if last_transport == "tcp" else "tcp"]
+    return ["udp", "tcp"]
+
+
+def open_rtsp_source(url, transport, last_transport=None, target_fps=None, full_size=False):
+    """전송 방식 후보를 차례로 열어 (cap, 성공한 전송 방식)을 돌려줌. 모두 실패하면 (None, None)"""
+    for candidate in _transport_order(transport, last_transport):
+        cap = open_rtsp_capture(url, candidate, target_fps, full_size)
+        if cap.isOpened():
+            return cap, candidate
+        cap.release()
+    return None, None
+
+
+def _fit(frame, ring):
+    # 슬롯보다 큰 프레임은 비율을 유지해 줄여서 기록 (버리지 않음)
+    if ring.fits(frame):
+        return frame
+    h, w = frame.shape[:2]
+    scale = (ring.slot_bytes / frame.nbytes) ** 0.5
+    return cv2.resize(frame, (max(int(w * scale) - 1, 1), max(int(h * scale) - 1, 1)), interpolation=cv2.INTER_AREA)
+
+
+def capture_main(ring_name, url, transport, max_fps, stop_event, connect_event):
+    """
+    캡처 프로세스 본체: RTSP 디코드 결과를 프레임 링에 기록만 함 (탐지/인코딩은 하지 않음)
+    연결(재연결)은 부모의 요청(connect_event)이 있을 때만 시도: 백오프/동시 재연결 상한은 부모의 RtspSupervisor가 결정
+    """
+    ring = FrameRing(ring_name)
+    min_interval = 1.0 / max_fps if max_fps > 0 else 0.0
+    last_transport = None
+    cap = None
+    last_write = 0.0
+    try:
+        while not stop_event.is_set():
+            ring.heartbeat()
+            if cap is None:
+                if not connect_event.wait(0.5):
+                    continue
+                connect_event.clear()
+                cap, candidate = open_rtsp_source(url, transport, last_transport, max_fps or None)
+                connect_event.clear()  # 시도 중에 겹쳐 온 요청은 이번 시도로 처리된 것으로 봄
+                if cap is None:
+                    ring.set_status(STATUS_DOWN)
+                    continue
+                last_transport = candidate
+                ring.set_status(STATUS_LIVE, last_transport)
+
+            now = time.time()
+            if min_interval and now - last_write < min_interval:
+                # 기록 주기 전에는 디코드 없이 버퍼만 비움 (항상 최신 프레임 유지)
+                if not cap.grab():
+                    cap.release()
+                    cap = None
+                    ring.set_status(STATUS_DOWN)
+                continue
+            # 캡처 시각은 프레임이 도착한 때(grab 직후)로 기록 (지연 추적의 기준점)
+            ok = cap.grab()
+            captured = time.time()
+            frame = None
+            if ok:
+                ok, frame = cap.retrieve()
+            if not ok or frame is None:
+                cap.release()
+                cap = None
+                ring.set_status(STATUS_DOWN)
+                continue
+            ring.write(_fit(frame, ring), captured)
+            # 부모가 연결 요청 시 표시한 CONNECTING이 겹쳐 써졌어도 프레임이 나오면 LIVE로 복구
+            ring.set_status(STATUS_LIVE, last_transport)
+            last_write = now
+    finally:
+        if cap is not None:
+            cap.release()
+        ring.close(unlink=False)
+
+
+def _watch_stdin(stop_event, connect_event):
+    # 부모 명령은 stdin 한 줄씩 ("connect" = 연결 시도 허가).
+    # 부모가 stdin을 닫거나(정상 종료) 부모 프로세스가 사라지면 EOF -> 종료
+    try:
+        for line in sys.stdin.buffer:
+            if line.strip() == b"connect":
+                connect_event.set()
+    finally:
+        stop_event.set()
+        connect_event.set()
+
+
+def _child_main():
+    # 설정은 인자 대신 stdin 첫 줄(JSON)로 받음: RTSP 주소의 계정 정보가 프로세스 목록에 보이지 않게
+    config = json.loads(sys.stdin.buffer.readline())
+    stop_event = threading.Event()
+    connect_event = threading.Event()
+    threading.Thread(target=_watch_stdin, args=(stop_event, connect_event), daemon=True).start()
+    capture_main(config["ring"], config["url"], config["transport"], config["max_fps"], stop_event, connect_event)
+
+
+class CaptureProcessHub:
+    """
+    RTSP 카메라별 캡처 프로세스 + 공유 메모리 링 관리 (FastAPI 프로세스 쪽).
+    - 디코드가 별도 프로세스에서 돌아 탐지/JPEG 인코딩/HTTP와 GIL을 다투지 않음
+    - 스트림 워커는 ensure()로 링을 받아 latest()로 최신 프레임을 복사 없이 읽음
+    - 자식은 multiprocessing(spawn) 대신 `python -m functions.capture_process`로 띄움
+      (spawn은 main.py를 다시 import해 모델 로딩/서버 초기화를 반복하기 때문)
+    """
+
+    _ids = itertools.count(1)
+
+    def __init__(self, slots=4, max_width=1920, max_height=1080, max_fps=15.0):
+        self.slots = slots
+        self.max_width = max_width
+        self.max_height = max_height
+        self.max_fps = max_fps
+        # { "cam_id": {"ring", "proc", "url", "transport", "started"} }
+        self._captures = {}
+        self._lock = threading.Lock()
+        self._cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.restarts = 0
+
+    def current(self, cam_id, url, transport):
+        """
+        살아 있는 캡처 프로세스의 링 (없거나 죽었거나 주소가 바뀌었으면 None -> ensure()로 재시작).
+        스트림 워커가 매 프레임 이벤트 루프에서 부르므로 잠금/프로세스 생성 없이 확인만 함.
+        """
+        entry = self._captures.get(cam_id)
+        if entry is None or entry["url"] != url or entry["transport"] != transport:
+            return None
+        if entry["proc"].poll() is not None:
+            return None
+        return entry["ring"]
+
+    def ensure(self, cam_id, url, transport):
+        """캡처 프로세스가 없거나 죽었거나 주소가 바뀌었으면 (재)시작하고 링을 돌려줌"""
+        with self._lock:
+            entry = self._captures.get(cam_id)
+            if entry is not None:
+                same = entry["url"] == url and entry["transport"] == transport
+                if same and entry["proc"].poll() is None:
+                    return entry["ring"]
+                if same:
+                    self.restarts += 1
+                self._stop_entry(self._captures.pop(cam_id))
+            ring = FrameRing(
+                f"lgbus_{os.getpid()}_{next(self._ids)}",
+                slots=self.slots,
+                max_width=self.max_width,
+                max_height=self.max_height,
+                create=True,
+            )
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "functions.capture_process"],
+                cwd=self._cwd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.DEVNULL,
+            )
+            config = {"ring": ring.name, "url": url, "transport": transport, "max_fps": self.max_fps}
+            proc.stdin.write(json.dumps(config).encode("utf-8") + b"\n")
+            proc.stdin.flush()
+            self._captures[cam_id] = {
+                "ring": ring,
+                "proc": proc,
+                "url": url,
+                "transport": transport,
+                "started": time.time(),
+            }
+            print(f"🎞️ [캡처 프로세스] {cam_id} 시작 (pid={proc.pid})")
+            return ring
+
+    def request_connect(self, cam_id):
+        """캡처 프로세스에 연결 시도 1회를 요청. 결과는 링 상태(CONNECTING -> LIVE/DOWN)로 확인"""
+        with self._lock:
+            entry = self._captures.get(cam_id)
+            if entry is None or entry["proc"].poll() is not None:
+                return False
+            entry["ring"].set_status(STATUS_CONNECTING)
+            try:
+                entry["proc"].stdin.write(b"connect\n")
+                entry["proc"].stdin.flush()
+            except OSError:
+                return False
+            return True
+
+    def stop(self, cam_id):
+        with self._lock:
+            entry = self._captures.pop(cam_id, None)
+        if entry is not None:
+            self._stop_entry(entry)
+
+    def _stop_entry(self, entry):
+        proc = entry["proc"]
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        try:
+            proc.wait(timeout=2.0)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+            proc.wait(timeout=1.0)
+        entry["ring"].close(unlink=True)
+
+    def close(self):
+        with self._lock:
+            entries = list(self._captures.values())
+            self._captures.clear()
+        for entry in entries:
+            self._stop_entry(entry)
+
+    def __contains__(self, cam_id):
+        return cam_id in self._captures
+
+    def stats(self):
+        with self._lock:
+            entries = dict(self._captures)
+        now = time.time()
+        cameras = {}
+        for cam_id, entry in entries.items():
+            if entry["ring"].closed:
+                continue
+            ring_stats = entry["ring"].stats()
+            ring_stats.update({
+                "pid": entry["proc"].pid,
+                "alive": entry["proc"].poll() is None,
+                "uptime_sec": round(now - entry["started"], 1),
+                "heartbeat_age_sec": round(now - entry["ring"].last_heartbeat(), 2),
+            })
+            cameras[cam_id] = ring_stats
+        return {
+            "slots": self.slots,
+            "max_size": [self.max_width, self.max_height],
+            "max_fps": self.max_fps,
+            "restarts": self.restarts,
+            "cameras": cameras,
+        }
+
+
+if __name__ == "__main__":
+    _child_main()
@@ -0,0 +1,97 @@
+import cv2
+import os
+import shutil
+import subprocess
+
+
+class OpenCVWriter:
+    """기존 방식: cv2.VideoWriter + mp4v (단일 스레드 인코딩, 브라우저 재생 불가)"""
+
+    def __init__(self, path, fps, size):
+        self.path = path
+        fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+        self.out = cv2.VideoWriter(path, fourcc, fps, size)
+
+    def write(self, frame):
+        self.out.write(frame)
+
+    def release(self):
+        self.out.release()
+
+    def abort(self):
+        """저장 실패: writer를 닫고 미완성 파일 삭제"""
+        self.out.release()
+        _remove(self.path)
+
+
+class FfmpegX264Writer:
+    """
+    ffmpeg libx264 파이프 인코더.
+    - BGR 원본 프레임을 stdin으로 넘기면 ffmpeg가 자체 스레드로 H.264 인코딩합니다.
+    - yuv420p + faststart MP4라서 /recordings에서 브라우저 인라인 재생이 가능합니다.
+    - yuv420p는 가로/세로가 짝수여야 하므로 홀수 크기는 오른쪽/아래에 1픽셀을 덧댑니다.
+    """
+
+    def __init__(self, path, fps, size, preset="veryfast", crf=23, ffmpeg_bin="ffmpeg"):
+        self.path = path
+        width, height = size
+        cmd = [
+            ffmpeg_bin,
+            "-hide_banner",
+            "-loglevel", "error",
+            "-y",
+            "-f", "rawvideo",
+            "-pix_fmt", "bgr24",
+            "-s", f"{width}x{height}",
+            "-r", f"{fps:.3f}",
+            "-i", "-",
+            "-an",
+            "-vf", "pad=ceil(iw/2)*2:ceil(ih/2)*2",
+            "-c:v", "libx264",
+            "-preset", str(preset),
+            "-crf", str(crf),
+            "-pix_fmt", "yuv420p",
+            "-movflags", "+faststart",
+            path,
+        ]
+        self.proc = subprocess.Popen(
+            cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE
+        )
+
+    def write(self, frame):
+        self.proc.stdin.write(frame.tobytes())
+
+    def release(self):
+        # communicate()가 stdin을 닫아 EOF를 전달하고 ffmpeg 종료까지 기다림
+        _, err = self.proc.communicate()
+        if self.proc.returncode != 0:
+            raise RuntimeError(f"ffmpeg 종료 코드 {self.proc.returncode}: {err.decode(errors='ignore').strip()}")
+
+    def abort(self):
+        """저장 실패(ffmpeg 비정상 종료로 BrokenPipe 등): 프로세스를 정리(좀비 방지)하고 미완성 파일 삭제"""
+        if self.proc.poll() is None:
+            self.proc.kill()
+        for pipe in (self.proc.stdin, self.proc.stderr):
+            try:
+                pipe.close()
+            except OSError:
+                pass
+        self.proc.wait()
+        _remove(self.path)
+
+
+def _remove(path):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def create_writer(backend, path, fps, size, preset="veryfast", crf=23):
+    """녹화 백엔드 선택: "x264"(ffmpeg 필요) 또는 "opencv". ffmpeg가 없으면 opencv로 대체"""
+    if backend == "x264":
+        ffmpeg_bin = shutil.which("ffmpeg")
+        if ffmpeg_bin:
+            return FfmpegX264Writer(path, fps, size, preset=preset, crf=crf, ffmpeg_bin=ffmpeg_bin)
+        print("⚠️ [녹화] ffmpeg를 찾을 수 없어 OpenCV(mp4v) 인코더를 사용합니다.")
+    return OpenCVWriter(path, fps, size)
@@ -0,0 +1,91 @@
+import threading
+import time
+
+from functions.capture_process import open_rtsp_source
+
+
+class EvidenceGrabber:
+    """
+    듀얼 스트림 카메라의 증거용 고화질 프레임 획득.
+    탐지/미리보기는 서브스트림만 디코드하고, 경보가 났을 때만 원본 해상도 프레임 1장을 구합니다.
+    1) segment_source(패스스루 녹화가 받아 둔 메인 스트림 세그먼트)에서 경보 시각에 가장 가까운 프레임
+    2) 없으면 메인 스트림을 잠깐 열어 1장 받고 닫음 (평상시 메인 스트림 디코드 비용 없음)
+    어느 쪽이든 경보 시각과 max_age_sec 넘게 차이 나는 프레임은 쓰지 않습니다
+    (큐 대기/연결 지연으로 사람이 이미 지나간 화면이 증거로 남지 않게).
+    """
+
+    def __init__(self, read_attempts=5, max_age_sec=2.0, segment_source=None):
+        self.read_attempts = read_attempts
+        self.max_age_sec = float(max_age_sec)
+        # segment_source(cam_id, ts, max_skew) -> (frame, frame_ts) 또는 (None, None)
+        self.segment_source = segment_source
+        self._lock = threading.Lock()
+        self.grabs = 0
+        self.successes = 0
+        self.failures = 0
+        self.segment_hits = 0
+        self.stale = 0
+        self.total_sec = 0.0
+        self.max_sec = 0.0
+
+    def evidence(self, cam_id, url, event_ts, transport="tcp", last_transport=None):
+        """경보 시각(event_ts)의 증거 프레임 -> (frame, frame_ts, "segment"|"main"). 없으면 (None, None, None)"""
+        if self.segment_source is not None:
+            frame, frame_ts = self.segment_source(cam_id, event_ts, self.max_age_sec)
+            if frame is not None:
+                with self._lock:
+                    self.segment_hits += 1
+                return frame, frame_ts, "segment"
+        if time.time() - event_ts > self.max_age_sec:
+            # 메인 스트림을 열기도 전에 이미 늦음
+            with self._lock:
+                self.stale += 1
+            return None, None, None
+        frame = self.grab(url, transport, last_transport)
+        frame_ts = time.time()
+        if frame is None:
+            return None, None, None
+        if frame_ts - event_ts > self.max_age_sec:
+            with self._lock:
+                self.stale += 1
+            return None, None, None
+        return frame, frame_ts, "main"
+
+    def grab(self, url, transport="tcp", last_transport=None):
+        """메인 스트림 프레임 1장 (실패하면 None)"""
+        start = time.monotonic()
+        frame = None
+        cap, _ = open_rtsp_source(url, transport, last_transport, full_size=True)
+        if cap is not None:
+            try:
+                # 연결 직후 첫 몇 프레임은 비어 있을 수 있어 몇 번 더 읽음
+                for _ in range(self.read_attempts):
+                    ok, frame = cap.read()
+                    if ok and frame is not None:
+                        break
+                    frame = None
+            finally:
+                cap.release()
+        elapsed = time.monotonic() - start
+        with self._lock:
+            self.grabs += 1
+            if frame is not None:
+                self.successes += 1
+            else:
+                self.failures += 1
+            self.total_sec += elapsed
+            self.max_sec = max(self.max_sec, elapsed)
+        return frame
+
+    def stats(self):
+        with self._lock:
+            return {
+                "max_age_sec": self.max_age_sec,
+                "segment_hits": self.segment_hits,
+                "grabs": self.grabs,
+                "successes": self.successes,
+                "failures": self.failures,
+                "stale": self.stale,
+                "avg_ms": round(self.total_sec / self.grabs * 1000, 1) if self.grabs else None,
+                "max_ms": round(self.max_sec * 1000, 1),
+            }
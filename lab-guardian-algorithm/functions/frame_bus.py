@@ -0,0 +1,199 @@
+import time
+from multiprocessing import resource_tracker, shared_memory
+
+import numpy as np
+
+# 카메라 1대 = 공유 메모리 블록 1개 (고정 크기 슬롯 링)
+# [헤더 64B][슬롯 메타 (seq, h, w, c) u64 x 4 x slots][슬롯 시각 f64 x slots][슬롯 데이터 slot_bytes x slots]
+# - 쓰기(캡처 프로세스): 슬롯 seq=0(무효) -> 데이터 복사 -> 크기/시각 -> 슬롯 seq -> 헤더 head
+# - 읽기(추론/스트림): head가 가리키는 슬롯을 복사 없이 ndarray 뷰로 받고, 사용 후 valid()로
+#   그 사이에 캡처가 슬롯을 덮어쓰지 않았는지 확인 (seqlock). 뷰를 오래 보관하려면 copy() 필요
+_HEADER_BYTES = 64
+_H_HEAD_SEQ, _H_HEAD_SLOT, _H_SLOTS, _H_SLOT_BYTES, _H_STATUS, _H_TRANSPORT, _H_OVERSIZE = range(7)
+_H_HEARTBEAT = 7  # float64 (같은 8바이트 칸을 float 뷰로 읽음)
+
+STATUS_CONNECTING = 0
+STATUS_LIVE = 1
+STATUS_DOWN = 2
+STATUS_NAMES = {STATUS_CONNECTING: "CONNECTING", STATUS_LIVE: "LIVE", STATUS_DOWN: "DOWN"}
+TRANSPORTS = {0: None, 1: "tcp", 2: "udp"}
+TRANSPORT_CODES = {v: k for k, v in TRANSPORTS.items()}
+
+
+def _attach(name):
+    # 붙기만 하는 쪽은 블록을 소유하지 않음. Python 3.13 미만은 붙을 때도 resource_tracker에 등록되는데,
+    # 별도로 띄운 프로세스(자기 tracker)면 그 프로세스가 끝날 때 만든 쪽의 블록까지 지워버리므로 등록 해제.
+    # multiprocessing 자식(부모 tracker 공유)은 같은 이름이 이미 등록돼 있으므로 그대로 둠
+    try:
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        own_tracker = getattr(resource_tracker._resource_tracker, "_fd", None) is None
+        shm = shared_memory.SharedMemory(name=name)
+        if own_tracker:
+            resource_tracker.unregister(shm._name, "shared_memory")
+        return shm
+
+
+class FrameRef:
+    """링 슬롯 1개를 가리키는 읽기 참조 (array는 공유 메모리 뷰)"""
+
+    __slots__ = ("ring", "slot", "seq", "ts", "array")
+
+    def __init__(self, ring, slot, seq, ts, array):
+        self.ring = ring
+        self.slot = slot
+        self.seq = seq
+        self.ts = ts
+        self.array = array
+
+    def valid(self):
+        """읽는 동안 캡처가 이 슬롯을 덮어썼으면 False (읽은 결과를 버려야 함)"""
+        slot_meta = self.ring._slot_meta
+        ok = slot_meta is not None and int(slot_meta[self.slot, 0]) == self.seq
+        if not ok:
+            self.ring.torn += 1
+        return ok
+
+
+class FrameRing:
+    """
+    카메라별 공유 메모리 프레임 링.
+    - 만든 쪽(create=True)이 close(unlink=True)로 블록을 지움
+    - 쓰는 프로세스는 1개, 읽는 프로세스는 여러 개 가능 (읽기는 잠금 없음)
+    """
+
+    def __init__(self, name=None, slots=4, max_width=1920, max_height=1080, channels=3, create=False):
+        if create:
+            slots = max(int(slots), 2)
+            slot_bytes = int(max_width) * int(max_height) * int(channels)
+            size = _HEADER_BYTES + slots * 40 + slots * slot_bytes
+            self.shm = shared_memory.SharedMemory(name=name, create=True, size=size)
+        else:
+            self.shm = _attach(name)
+        self.name = self.shm.name
+        self.owner = create
+        buf = self.shm.buf
+        self._header = np.ndarray((8,), dtype=np.uint64, buffer=buf, offset=0)
+        self._header_f = np.ndarray((8,), dtype=np.float64, buffer=buf, offset=0)
+        if create:
+            self._header[:] = 0
+            self._header[_H_SLOTS] = slots
+            self._header[_H_SLOT_BYTES] = slot_bytes
+            self._header_f[_H_HEARTBEAT] = 0.0
+        self.slots = int(self._header[_H_SLOTS])
+        self.slot_bytes = int(self._header[_H_SLOT_BYTES])
+        meta_offset = _HEADER_BYTES
+        ts_offset = meta_offset + self.slots * 32
+        data_offset = ts_offset + self.slots * 8
+        self._slot_meta = np.ndarray((self.slots, 4), dtype=np.uint64, buffer=buf, offset=meta_offset)
+        self._slot_ts = np.ndarray((self.slots,), dtype=np.float64, buffer=buf, offset=ts_offset)
+        self._data = np.ndarray((self.slots, self.slot_bytes), dtype=np.uint8, buffer=buf, offset=data_offset)
+        if create:
+            self._slot_meta[:] = 0
+            self._slot_ts[:] = 0.0
+        # 프로세스 로컬 카운터 (통계용)
+        self.writes = 0
+        self.reads = 0
+        self.torn = 0
+
+    # --- 쓰기 (캡처 프로세스) ---
+    def fits(self, frame):
+        return frame.nbytes <= self.slot_bytes
+
+    def write(self, frame, ts=None):
+        """프레임 1장을 다음 슬롯에 복사 (프레임당 복사 1회). 슬롯보다 크면 버리고 False"""
+        if frame.dtype != np.uint8 or not self.fits(frame):
+            self._header[_H_OVERSIZE] += 1
+            return False
+        seq = int(self._header[_H_HEAD_SEQ]) + 1
+        slot = seq % self.slots
+        meta = self._slot_meta[slot]
+        meta[0] = 0
+        h, w = frame.shape[:2]
+        c = frame.shape[2] if frame.ndim == 3 else 1
+        dst = self._data[slot, : frame.nbytes].reshape(frame.shape)
+        np.copyto(dst, frame)
+        meta[1] = h
+        meta[2] = w
+        meta[3] = c
+        self._slot_ts[slot] = ts if ts is not None else time.time()
+        meta[0] = seq
+        self._header[_H_HEAD_SLOT] = slot
+        self._header[_H_HEAD_SEQ] = seq
+        self.writes += 1
+        return True
+
+    def set_status(self, status, transport=None):
+        self._header[_H_STATUS] = status
+        if transport is not None:
+            self._header[_H_TRANSPORT] = TRANSPORT_CODES.get(transport, 0)
+
+    def heartbeat(self, ts=None):
+        self._header_f[_H_HEARTBEAT] = ts if ts is not None else time.time()
+
+    # --- 읽기 (추론/스트림 프로세스) ---
+    @property
+    def head_seq(self):
+        return int(self._header[_H_HEAD_SEQ])
+
+    def latest(self, after_seq=0):
+        """가장 최근 프레임 참조 (after_seq 이후 새 프레임이 없거나 링이 닫혔으면 None)"""
+        if self.closed:
+            return None
+        for _ in range(3):
+            seq = int(self._header[_H_HEAD_SEQ])
+            if seq == 0 or seq <= after_seq:
+                return None
+            slot = seq % self.slots
+            meta = self._slot_meta[slot]
+            if int(meta[0]) != seq:
+                continue
+            h, w, c = int(meta[1]), int(meta[2]), int(meta[3])
+            ts = float(self._slot_ts[slot])
+            shape = (h, w, c) if c > 1 else (h, w)
+            array = self._data[slot, : h * w * c].reshape(shape)
+            if int(meta[0]) != seq:
+                continue
+            self.reads += 1
+            return FrameRef(self, slot, seq, ts, array)
+        self.torn += 1
+        return None
+
+    @property
+    def closed(self):
+        return self._header is None
+
+    def status(self):
+        return STATUS_NAMES.get(int(self._header[_H_STATUS]), "UNKNOWN")
+
+    def transport(self):
+        return TRANSPORTS.get(int(self._header[_H_TRANSPORT]))
+
+    def last_heartbeat(self):
+        return float(self._header_f[_H_HEARTBEAT])
+
+    def close(self, unlink=None):
+        # ndarray 뷰가 남아 있으면 shm.close()가 BufferError를 내므로 먼저 해제
+        self._header = self._header_f = self._slot_meta = self._slot_ts = self._data = None
+        try:
+            self.shm.close()
+        except BufferError:
+            pass
+        if unlink if unlink is not None else self.owner:
+            try:
+                self.shm.unlink()
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        return {
+            "name": self.name,
+            "slots": self.slots,
+            "slot_bytes": self.slot_bytes,
+            "head_seq": self.head_seq,
+            "status": self.status(),
+            "transport": self.transport(),
+            "oversize_drops": int(self._header[_H_OVERSIZE]),
+            "reads": self.reads,
+            "torn_reads": self.torn,
+        }
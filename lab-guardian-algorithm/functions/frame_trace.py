@@ -0,0 +1,172 @@
+import json
+import os
+import queue
+import threading
+import time
+from collections import deque
+
+# 캡처 시각 기준 누적 지연을 재는 지점 (캡처 -> 워커가 집어 듦 -> 탐지 끝 -> JPEG 인코딩 -> 뷰어 전송)
+POINTS = ("picked", "detected", "encoded", "sent")
+_MAX_SENDS = 16
+
+
+class FrameTrace:
+    """
+    프레임 1장의 타임라인. 캡처 시각/일련번호를 달고 탐지, 인코딩, /video_feed 전송까지 따라감.
+    시각은 모두 time.time() (캡처 프로세스와 같은 시계).
+    """
+
+    __slots__ = ("cam_id", "seq", "source", "capture_ts", "marks", "sends", "reused", "sampled", "jpeg_seq")
+
+    def __init__(self, cam_id, seq, source, capture_ts, marks=None, reused=False):
+        self.cam_id = cam_id
+        self.seq = seq
+        self.source = source
+        self.capture_ts = capture_ts
+        self.marks = marks if marks is not None else {}
+        self.sends = []
+        self.reused = reused
+        self.sampled = False
+        self.jpeg_seq = 0
+
+    def mark(self, name, ts=None):
+        ts = ts if ts is not None else time.time()
+        self.marks[name] = ts
+        return ts - self.capture_ts
+
+    def derive(self):
+        """
+        같은 캡처 프레임을 다시 발행할 때의 새 타임라인 (탐지 주기 사이에 재사용하는 탐지 결과 화면).
+        캡처/탐지 시각은 그대로 두어 화면이 실제로 얼마나 오래된 것인지 드러나게 함.
+        """
+        marks = {k: v for k, v in self.marks.items() if k in ("picked", "detect_start", "detected")}
+        return FrameTrace(self.cam_id, self.seq, self.source, self.capture_ts, marks, reused=True)
+
+    def sent(self, ts):
+        if len(self.sends) < _MAX_SENDS:
+            self.sends.append(ts)
+        return ts - self.capture_ts
+
+    def to_dict(self):
+        base = self.capture_ts
+        return {
+            "cam_id": self.cam_id,
+            "seq": self.seq,
+            "source": self.source,
+            "reused": self.reused,
+            "jpeg_seq": self.jpeg_seq,
+            "capture_ts": round(base, 6),
+            # 캡처 시각 기준 경과(ms)
+            "marks_ms": {k: round((v - base) * 1000, 2) for k, v in self.marks.items()},
+            "sends_ms": [round((ts - base) * 1000, 2) for ts in self.sends],
+        }
+
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return None
+    index = min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+class FrameTracer:
+    """
+    프레임 지연 집계 + 선택적 샘플링 기록.
+    - 카메라/지점별 최근 window개 지연으로 p50/p90/p99 계산 (/system/latency)
+    - trace_path가 있으면 발행 프레임 sample_every장 중 1장의 전체 타임라인을 JSONL로 기록
+      (파일 쓰기는 전용 스레드 + 제한된 큐, 가득 차거나 max_bytes를 넘으면 버림)
+    """
+
+    def __init__(self, window=512, trace_path=None, sample_every=100, max_bytes=100 * 1024 * 1024, queue_size=1024):
+        self.window = max(int(window), 16)
+        self.trace_path = trace_path or None
+        self.sample_every = max(int(sample_every), 1)
+        self.max_bytes = int(max_bytes)
+        self._samples = {}
+        self._lock = threading.Lock()
+        self._published = 0
+        self.written = 0
+        self.dropped = 0
+        self.queue = None
+        if self.trace_path:
+            directory = os.path.dirname(os.path.abspath(self.trace_path))
+            os.makedirs(directory, exist_ok=True)
+            self.queue = queue.Queue(maxsize=max(int(queue_size), 1))
+            threading.Thread(target=self._writer, name="frame-trace", daemon=True).start()
+
+    def observe(self, cam_id, point, seconds):
+        key = (cam_id, point)
+        samples = self._samples.get(key)
+        if samples is None:
+            with self._lock:
+                samples = self._samples.setdefault(key, deque(maxlen=self.window))
+        samples.append(seconds)
+
+    def published(self, trace):
+        """JPEG로 발행된 프레임. 샘플링 대상이면 표시 (기록은 다음 프레임으로 교체될 때)"""
+        if self.queue is not None:
+            self._published += 1
+            trace.sampled = self._published % self.sample_every == 0
+
+    def finish(self, trace):
+        """더 이상 전송되지 않는 프레임(새 프레임으로 교체/카메라 해제): 샘플이면 파일 기록 예약"""
+        if trace is None or not trace.sampled or self.queue is None:
+            return
+        try:
+            self.queue.put_nowait(trace.to_dict())
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+
+    def _writer(self):
+        with open(self.trace_path, "a", encoding="utf-8") as f:
+            size = f.tell()
+            while True:
+                records = [self.queue.get()]
+                while len(records) < 256:
+                    try:
+                        records.append(self.queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if self.max_bytes and size >= self.max_bytes:
+                    with self._lock:
+                        self.dropped += len(records)
+                    continue
+                data = "".join(json.dumps(r, ensure_ascii=False) + "\n" for r in records)
+                f.write(data)
+                f.flush()
+                size += len(data.encode("utf-8"))
+                with self._lock:
+                    self.written += len(records)
+
+    def remove(self, cam_id):
+        with self._lock:
+            for key in [k for k in self._samples if k[0] == cam_id]:
+                del self._samples[key]
+
+    def stats(self):
+        with self._lock:
+            items = [(key, list(samples)) for key, samples in self._samples.items()]
+            written, dropped = self.written, self.dropped
+        cameras = {}
+        for (cam_id, point), values in items:
+            values.sort()
+            cameras.setdefault(cam_id, {})[point] = {
+                "count": len(values),
+                "p50_ms": round(_percentile(values, 50) * 1000, 1),
+                "p90_ms": round(_percentile(values, 90) * 1000, 1),
+                "p99_ms": round(_percentile(values, 99) * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1),
+            }
+        return {
+            "window": self.window,
+            "points": list(POINTS),
+            "cameras": cameras,
+            "trace": {
+                "path": self.trace_path,
+                "sample_every": self.sample_every if self.trace_path else None,
+                "written": written,
+                "dropped": dropped,
+                "pending": self.queue.qsize() if self.queue is not None else 0,
+            },
+        }
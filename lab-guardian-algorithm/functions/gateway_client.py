@@ -0,0 +1,265 @@
+import collections
+import json
+import random
+import select
+import socket
+import threading
+import time
+
+from functions.gateway_protocol import (
+    MAX_FRAME_BYTES,
+    GatewayEvent,
+    decode_event,
+    encode_event,
+    encode_frames,
+    event_from_text,
+)
+
+
+class GatewayClient:
+    """
+    C# 게이트웨이(TCP) 송신 클라이언트.
+    - 연결 1개를 유지하고 끊기면 지터가 섞인 지수 백오프로 재연결합니다.
+    - send()는 메모리 큐(outbox)에 넣기만 하므로 호출자는 절대 막히지 않습니다.
+      큐가 가득 차면 가장 오래된 메시지를 버립니다 (최신 상태 우선).
+    - 송신 스레드는 쌓인 메시지를 한 번의 sendall로 묶어 보냅니다.
+      protocol="framed": 길이 접두 바이너리 프레임 (여러 이벤트 + 시각 + 메타, gateway_protocol 참고)
+      protocol="text": 구버전 "cam:status:path" 줄바꿈(\\n) 구분
+    - spool(GatewaySpool)을 주면 연결이 안 될 때 outbox를 디스크로 옮겨 두고,
+      다시 연결되면 새 메시지보다 먼저 순서대로 재전송합니다.
+    """
+
+    def __init__(
+        self,
+        host,
+        port,
+        queue_size=1024,
+        batch_max=64,
+        batch_wait=0.02,
+        connect_timeout=2.0,
+        send_timeout=2.0,
+        backoff_base=0.5,
+        backoff_max=10.0,
+        spool=None,
+        protocol="framed",
+    ):
+        self.host = host
+        self.protocol = protocol
+        self.port = int(port)
+        self.batch_max = max(int(batch_max), 1)
+        self.batch_wait = max(float(batch_wait), 0.0)
+        self.connect_timeout = float(connect_timeout)
+        self.send_timeout = float(send_timeout)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.outbox = collections.deque(maxlen=max(int(queue_size), 1))
+        self.spool = spool
+        # 스풀에 재전송할 레코드가 남아 있는지 (송신 스레드만 갱신)
+        self._replay = spool is not None and spool.pending()
+        self.sent = 0
+        self.batches = 0
+        self.dropped = 0
+        # 프레임 1개(MAX_FRAME_BYTES)에 들어가지 않아 버린 이벤트 (dropped에도 포함)
+        self.oversized = 0
+        self.reconnects = 0
+        self.connected = False
+        self.last_error = None
+        self._sock = None
+        self._attempt = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, name="gateway-client", daemon=True)
+        self._thread.start()
+
+    def send(self, cam_id, status_msg, image_path=None, meta=None, ts=None):
+        """이벤트 예약 (막히지 않음). ts는 이벤트 발생 시각 (기본: 지금)"""
+        event = GatewayEvent(cam_id, status_msg, ts=ts, image_path=image_path, meta=meta)
+        with self._lock:
+            if len(self.outbox) == self.outbox.maxlen:
+                self.dropped += 1
+            self.outbox.append(event)
+            self._wake.notify()
+
+    def close(self, timeout=2.0):
+        """남은 메시지를 최대 timeout초 동안 보낸 뒤 연결 종료"""
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            with self._lock:
+                if not self.outbox:
+                    break
+            time.sleep(0.01)
+        self._stop.set()
+        with self._lock:
+            self._wake.notify()
+        self._thread.join(timeout=self.connect_timeout + 1.0)
+        self._disconnect()
+        if self.spool is not None:
+            # 못 보낸 메시지는 다음 실행 때 재전송되도록 스풀에 남김
+            self._spill()
+            self.spool.close()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            with self._lock:
+                while not self.outbox and not self._replay and not self._stop.is_set():
+                    self._wake.wait()
+            if self._stop.is_set():
+                break
+            # 짧게 기다려 같은 순간에 나온 메시지를 한 번에 보냄 (이미 한 배치 이상 쌓였으면 바로 전송)
+            if self.batch_wait and len(self.outbox) < self.batch_max:
+                time.sleep(self.batch_wait)
+            if self._sock is None and not self._connect():
+                self._spill()
+                self._stop.wait(self._backoff())
+                continue
+            if self._replay:
+                self._replay_step()
+                continue
+            with self._lock:
+                batch = [self.outbox.popleft() for _ in range(min(len(self.outbox), self.batch_max))]
+            records = self._fit([encode_event(event) for event in batch])
+            if not records or self._write(records):
+                continue
+            if self.spool is not None:
+                # 보내지 못한 배치와 그 뒤의 outbox를 순서대로 디스크에 보관
+                self.spool.append_many(records)
+                self._spill()
+                continue
+            # 스풀이 없으면 보내지 못한 배치를 순서를 유지한 채 큐 앞쪽으로 되돌림
+            with self._lock:
+                for event in reversed(batch):
+                    if len(self.outbox) == self.outbox.maxlen:
+                        self.dropped += 1
+                        break
+                    self.outbox.appendleft(event)
+
+    def _replay_step(self):
+        # 재전송 중 새로 들어온 메시지도 스풀 뒤에 붙여 전체 순서를 유지
+        self._spill()
+        records, position = self.spool.read_batch(self.batch_max)
+        if not records:
+            self._replay = self.spool.pending()
+            return
+        # 이전 버전이 남긴 텍스트 레코드("cam:status:path")는 이벤트로 변환
+        records = self._fit(
+            [r if r.startswith(b"[") else encode_event(event_from_text(r.decode("utf-8"))) for r in records]
+        )
+        if not records:
+            # 읽은 레코드가 모두 너무 커서 버려짐: 건너뛰고 다음 배치로
+            self.spool.ack(position, 0)
+            self._replay = self.spool.pending()
+            return
+        if self._write(records):
+            self.spool.ack(position, len(records))
+            self._replay = self.spool.pending()
+            if not self._replay:
+                print(f"📡 [게이트웨이 스풀] 재전송 완료 (누적 {self.spool.replayed}건)")
+
+    def _spill(self):
+        if self.spool is None:
+            return
+        with self._lock:
+            batch = list(self.outbox)
+            self.outbox.clear()
+        records = self._fit([encode_event(event) for event in batch])
+        if records:
+            self.spool.append_many(records)
+            self._replay = True
+        self.spool.sync()
+
+    def _fit(self, records):
+        """프레임 1개에 들어가지 않는 레코드는 버림 (encode_frames의 ValueError로 송신 스레드가 멈추지 않게)"""
+        fit = [record for record in records if len(record) + 2 <= MAX_FRAME_BYTES]
+        if len(fit) < len(records):
+            skipped = len(records) - len(fit)
+            with self._lock:
+                self.dropped += skipped
+                self.oversized += skipped
+            print(f"⚠️ [게이트웨이] 이벤트가 프레임 한도({MAX_FRAME_BYTES} bytes)보다 커서 {skipped}건 버림")
+        return fit
+
+    def _encode(self, records):
+        if self.protocol == "text":
+            return b"".join(
+                decode_event(json.loads(record)).to_text().encode("utf-8") + b"\n" for record in records
+            )
+        return encode_frames(records)
+
+    def _write(self, records):
+        """records: encode_event() 결과 목록 (스풀 레코드와 같은 형식)"""
+        try:
+            if self._peer_closed():
+                raise ConnectionResetError("gateway closed the connection")
+            self._sock.sendall(self._encode(records))
+        except OSError as e:
+            self._on_error(e)
+            self._disconnect()
+            return False
+        with self._lock:
+            self.sent += len(records)
+            self.batches += 1
+        return True
+
+    def _connect(self):
+        try:
+            sock = socket.create_connection((self.host, self.port), timeout=self.connect_timeout)
+            sock.settimeout(self.send_timeout)
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+        except OSError as e:
+            self._on_error(e)
+            return False
+        if self._attempt:
+            self.reconnects += 1
+            print(f"📡 [게이트웨이 재연결] {self.host}:{self.port}")
+        self._sock = sock
+        self._attempt = 0
+        self.connected = True
+        return True
+
+    def _disconnect(self):
+        sock, self._sock = self._sock, None
+        self.connected = False
+        if sock is not None:
+            try:
+                sock.close()
+            except OSError:
+                pass
+
+    def _peer_closed(self):
+        # 게이트웨이는 이 연결로 응답을 보내지 않으므로 읽을 게 있다면 종료(EOF) 신호
+        readable, _, _ = select.select([self._sock], [], [], 0)
+        if not readable:
+            return False
+        try:
+            return self._sock.recv(1, socket.MSG_PEEK) == b""
+        except BlockingIOError:
+            return False
+
+    def _on_error(self, e):
+        self._attempt += 1
+        # 게이트웨이가 내려가 있을 때 로그가 넘치지 않도록 첫 실패만 출력
+        if self._attempt == 1:
+            print(f"❌ [게이트웨이 전송 실패] {e}")
+        self.last_error = str(e)
+
+    def _backoff(self):
+        # full jitter: 0 ~ base * 2^attempt
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** min(self._attempt, 16))))
+
+    def stats(self):
+        with self._lock:
+            return {
+                "connected": self.connected,
+                "protocol": self.protocol,
+                "depth": len(self.outbox),
+                "capacity": self.outbox.maxlen,
+                "sent": self.sent,
+                "batches": self.batches,
+                "dropped": self.dropped,
+                "oversized": self.oversized,
+                "reconnects": self.reconnects,
+                "last_error": self.last_error,
+                "spool": self.spool.stats() if self.spool is not None else None,
+            }
@@ -0,0 +1,100 @@
+import json
+import struct
+import time
+
+# 프레임: [0x00][버전 1B][payload 길이 4B, big-endian][payload]
+# - 첫 바이트 0x00은 텍스트("cam:status:path") 메시지에 나올 수 없어 게이트웨이가 두 형식을 구분할 수 있음
+# - payload(v1): 이벤트 배열을 담은 UTF-8 JSON. 이벤트는 필드 이름 없이 위치 배열로 보냄
+#   [cam_id, status, ts_ms, image_path 또는 null, meta 또는 null]
+FRAME_MARKER = 0x00
+PROTOCOL_VERSION = 1
+MAX_FRAME_BYTES = 1024 * 1024
+_FRAME_HEADER = struct.Struct(">BBI")
+
+
+class GatewayEvent:
+    """게이트웨이로 보내는 상태/경보 이벤트 1건"""
+
+    __slots__ = ("cam_id", "status", "ts", "image_path", "meta")
+
+    def __init__(self, cam_id, status, ts=None, image_path=None, meta=None):
+        self.cam_id = cam_id
+        self.status = status
+        self.ts = ts if ts is not None else time.time()
+        self.image_path = image_path
+        self.meta = meta
+
+    def to_text(self):
+        """구버전 텍스트 형식 ("cam:status[:path]")"""
+        text = f"{self.cam_id}:{self.status}"
+        if self.image_path:
+            text += f":{self.image_path}"
+        return text
+
+
+def event_from_text(text):
+    """구버전 텍스트 메시지 -> 이벤트 (게이트웨이와 같은 규칙: ':'로 최대 3개 필드)"""
+    parts = text.split(":", 2)
+    return GatewayEvent(parts[0], parts[1] if len(parts) > 1 else "SAFE", image_path=parts[2] if len(parts) > 2 else None)
+
+
+def encode_event(event):
+    """이벤트 1건 -> 위치 배열 JSON 바이트 (스풀 레코드로도 그대로 사용)"""
+    return json.dumps(
+        [event.cam_id, event.status, int(event.ts * 1000), event.image_path, event.meta or None],
+        ensure_ascii=False,
+        separators=(",", ":"),
+    ).encode("utf-8")
+
+
+def decode_event(item):
+    cam_id, status, ts_ms, image_path, meta = (list(item) + [None] * 5)[:5]
+    return GatewayEvent(cam_id, status, ts=ts_ms / 1000.0 if ts_ms is not None else None, image_path=image_path, meta=meta)
+
+
+def encode_frame(encoded_events):
+    """encode_event() 결과 여러 건을 프레임 1개로 묶음 (이벤트를 다시 직렬화하지 않음)"""
+    payload = b"[" + b",".join(encoded_events) + b"]"
+    if len(payload) > MAX_FRAME_BYTES:
+        raise ValueError(f"frame too large: {len(payload)} bytes")
+    return _FRAME_HEADER.pack(FRAME_MARKER, PROTOCOL_VERSION, len(payload)) + payload
+
+
+def encode_frames(encoded_events, max_bytes=MAX_FRAME_BYTES):
+    """프레임 크기 한도에 맞춰 여러 프레임으로 나눠 이어 붙임"""
+    frames = []
+    chunk = []
+    size = 2
+    for item in encoded_events:
+        if chunk and size + len(item) + 1 > max_bytes:
+            frames.append(encode_frame(chunk))
+            chunk, size = [], 2
+        chunk.append(item)
+        size += len(item) + 1
+    if chunk:
+        frames.append(encode_frame(chunk))
+    return b"".join(frames)
+
+
+class FrameDecoder:
+    """수신 바이트를 받아 완성된 프레임의 이벤트를 돌려주는 점진 디코더 (나뉘어 온 프레임 처리)"""
+
+    def __init__(self):
+        self.buffer = bytearray()
+        self.frames = 0
+
+    def feed(self, data):
+        self.buffer += data
+        events = []
+        while len(self.buffer) >= _FRAME_HEADER.size:
+            marker, version, length = _FRAME_HEADER.unpack_from(self.buffer)
+            if marker != FRAME_MARKER or version != PROTOCOL_VERSION or length > MAX_FRAME_BYTES:
+                raise ValueError(f"bad frame header: marker={marker} version={version} length={length}")
+            end = _FRAME_HEADER.size + length
+            if len(self.buffer) < end:
+                break
+            payload = bytes(self.buffer[_FRAME_HEADER.size:end])
+            del self.buffer[:end]
+            self.frames += 1
+            events.extend(decode_event(item) for item in json.loads(payload))
+        return events
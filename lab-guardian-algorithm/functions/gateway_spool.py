@@ -0,0 +1,268 @@
+import os
+import struct
+import threading
+import time
+import zlib
+
+_HEADER = struct.Struct(">II")  # payload 길이, crc32
+_SEGMENT_PREFIX = "seg_"
+_SEGMENT_SUFFIX = ".log"
+
+
+class GatewaySpool:
+    """
+    게이트웨이 장애 중 이벤트를 보관하는 디스크 스풀 (추가 전용 세그먼트 파일).
+    - 레코드: [길이 4B][crc32 4B][payload]. 꼬리가 잘린/손상된 레코드는 재시작 시 잘라냄
+    - fsync는 레코드마다가 아니라 fsync_batch건 또는 fsync_interval초마다 한 번
+    - 읽기 위치(cursor)는 ack 때 파일로 남겨 재시작 후 이어서 재전송 (최소 1회 전달)
+    - 전체 크기가 max_bytes를 넘으면 가장 오래된 세그먼트부터 버림
+    쓰기/읽기/ack는 게이트웨이 송신 스레드가, stats()는 요청 스레드가 호출하므로 공개 메서드는 _lock으로 직렬화합니다.
+    """
+
+    def __init__(
+        self,
+        directory,
+        segment_bytes=1024 * 1024,
+        max_bytes=64 * 1024 * 1024,
+        fsync_batch=64,
+        fsync_interval=0.2,
+    ):
+        self.directory = directory
+        self.segment_bytes = max(int(segment_bytes), 4096)
+        self.max_bytes = max(int(max_bytes), self.segment_bytes)
+        self.fsync_batch = max(int(fsync_batch), 1)
+        self.fsync_interval = float(fsync_interval)
+        self.cursor_path = os.path.join(directory, "cursor")
+        self.appended = 0
+        self.replayed = 0
+        self.fsyncs = 0
+        self.dropped_bytes = 0
+        self.dropped_segments = 0
+        self._writer = None
+        self._unsynced = 0
+        self._last_sync = time.time()
+        # 재진입 가능 (append_many -> sync, ack -> pending 등 공개 메서드끼리 호출)
+        self._lock = threading.RLock()
+        os.makedirs(directory, exist_ok=True)
+        self._segments = self._scan()
+        self._read_pos = self._load_cursor()
+        self._recover_tail()
+
+    # ---- 세그먼트 관리 ----
+
+    def _segment_path(self, seg_id):
+        return os.path.join(self.directory, f"{_SEGMENT_PREFIX}{seg_id:012d}{_SEGMENT_SUFFIX}")
+
+    def _scan(self):
+        ids = []
+        for name in os.listdir(self.directory):
+            if name.startswith(_SEGMENT_PREFIX) and name.endswith(_SEGMENT_SUFFIX):
+                try:
+                    ids.append(int(name[len(_SEGMENT_PREFIX):-len(_SEGMENT_SUFFIX)]))
+                except ValueError:
+                    continue
+        return sorted(ids)
+
+    def _load_cursor(self):
+        try:
+            with open(self.cursor_path, "r", encoding="utf-8") as f:
+                seg_id, offset = (int(v) for v in f.read().split())
+        except (OSError, ValueError):
+            return (self._segments[0], 0) if self._segments else (0, 0)
+        if self._segments and seg_id < self._segments[0]:
+            return (self._segments[0], 0)
+        return (seg_id, offset)
+
+    def _save_cursor(self):
+        tmp = self.cursor_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            f.write(f"{self._read_pos[0]} {self._read_pos[1]}")
+        os.replace(tmp, self.cursor_path)
+
+    def _recover_tail(self):
+        """마지막 세그먼트의 잘린/손상된 꼬리 레코드를 잘라냄 (쓰던 중 전원이 꺼진 경우)"""
+        if not self._segments:
+            return
+        path = self._segment_path(self._segments[-1])
+        valid = 0
+        with open(path, "rb") as f:
+            while True:
+                header = f.read(_HEADER.size)
+                if len(header) < _HEADER.size:
+                    break
+                length, crc = _HEADER.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length or zlib.crc32(payload) != crc:
+                    break
+                valid += _HEADER.size + length
+        if valid < os.path.getsize(path):
+            print(f"⚠️ [게이트웨이 스풀] 손상된 꼬리 {os.path.getsize(path) - valid}B 잘라냄")
+            with open(path, "r+b") as f:
+                f.truncate(valid)
+
+    def _open_writer(self):
+        if not self._segments:
+            self._segments.append(self._read_pos[0])
+        path = self._segment_path(self._segments[-1])
+        self._writer = open(path, "ab")
+        if self._writer.tell() >= self.segment_bytes:
+            self._roll()
+
+    def _roll(self):
+        self.sync()
+        self._writer.close()
+        self._segments.append(self._segments[-1] + 1)
+        self._writer = open(self._segment_path(self._segments[-1]), "ab")
+
+    def _enforce_limit(self):
+        # 읽기 중인 세그먼트가 버려지면 다음 세그먼트 처음부터 읽음
+        while len(self._segments) > 1 and self.size_bytes() > self.max_bytes:
+            seg_id = self._segments.pop(0)
+            path = self._segment_path(seg_id)
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                size = 0
+            self.dropped_bytes += size
+            self.dropped_segments += 1
+            if self._read_pos[0] <= seg_id:
+                self._read_pos = (self._segments[0], 0)
+                self._save_cursor()
+            print(f"⚠️ [게이트웨이 스풀] 용량 초과로 오래된 세그먼트 버림 ({size}B)")
+
+    # ---- 쓰기 ----
+
+    def append_many(self, payloads):
+        with self._lock:
+            if not payloads:
+                return
+            if self._writer is None:
+                self._open_writer()
+            for payload in payloads:
+                if isinstance(payload, str):
+                    payload = payload.encode("utf-8")
+                self._writer.write(_HEADER.pack(len(payload), zlib.crc32(payload)))
+                self._writer.write(payload)
+                self._unsynced += 1
+                self.appended += 1
+                if self._writer.tell() >= self.segment_bytes:
+                    self._roll()
+                elif self._unsynced >= self.fsync_batch:
+                    self.sync()
+            self._writer.flush()
+            if time.time() - self._last_sync >= self.fsync_interval:
+                self.sync()
+            self._enforce_limit()
+
+    def sync(self):
+        with self._lock:
+            if self._writer is None or not self._unsynced:
+                return
+            self._writer.flush()
+            os.fsync(self._writer.fileno())
+            self._unsynced = 0
+            self._last_sync = time.time()
+            self.fsyncs += 1
+
+    # ---- 읽기 ----
+
+    def read_batch(self, limit):
+        """(payload 목록, 다음 위치). 전송 성공 후 ack(다음 위치)로 확정"""
+        with self._lock:
+            seg_id, offset = self._read_pos
+            records = []
+            while len(records) < limit and self._segments:
+                if seg_id not in self._segments:
+                    later = [s for s in self._segments if s > seg_id]
+                    if not later:
+                        break
+                    seg_id, offset = later[0], 0
+                try:
+                    with open(self._segment_path(seg_id), "rb") as f:
+                        f.seek(offset)
+                        while len(records) < limit:
+                            header = f.read(_HEADER.size)
+                            if len(header) < _HEADER.size:
+                                break
+                            length, _ = _HEADER.unpack(header)
+                            payload = f.read(length)
+                            if len(payload) < length:
+                                break
+                            records.append(payload)
+                            offset += _HEADER.size + length
+                except FileNotFoundError:
+                    pass
+                if len(records) >= limit or seg_id == self._segments[-1]:
+                    break
+                seg_id, offset = seg_id + 1, 0
+            return records, (seg_id, offset)
+
+    def ack(self, position, count):
+        with self._lock:
+            self._read_pos = position
+            self.replayed += count
+            # 다 읽은(쓰기 중이 아닌) 세그먼트 삭제
+            while len(self._segments) > 1 and self._segments[0] < position[0]:
+                try:
+                    os.remove(self._segment_path(self._segments.pop(0)))
+                except OSError:
+                    pass
+            if not self.pending():
+                # 모두 전송됨: 세그먼트를 비우고 다음 번호로 새로 시작
+                if self._writer is not None:
+                    self._writer.close()
+                    self._writer = None
+                for seg_id in self._segments:
+                    try:
+                        os.remove(self._segment_path(seg_id))
+                    except OSError:
+                        pass
+                next_id = (self._segments[-1] + 1) if self._segments else position[0]
+                self._segments = []
+                self._read_pos = (next_id, 0)
+                self._unsynced = 0
+            self._save_cursor()
+
+    def pending(self):
+        with self._lock:
+            if not self._segments:
+                return False
+            last = self._segments[-1]
+            if self._read_pos[0] < last:
+                return True
+            try:
+                return os.path.getsize(self._segment_path(last)) > self._read_pos[1]
+            except OSError:
+                return False
+
+    def size_bytes(self):
+        with self._lock:
+            total = 0
+            for seg_id in self._segments:
+                try:
+                    total += os.path.getsize(self._segment_path(seg_id))
+                except OSError:
+                    pass
+            return total
+
+    def close(self):
+        with self._lock:
+            if self._writer is not None:
+                self.sync()
+                self._writer.close()
+                self._writer = None
+
+    def stats(self):
+        with self._lock:
+            return {
+                "pending": self.pending(),
+                "segments": len(self._segments),
+                "bytes": self.size_bytes(),
+                "max_bytes": self.max_bytes,
+                "appended": self.appended,
+                "replayed": self.replayed,
+                "fsyncs": self.fsyncs,
+                "dropped_bytes": self.dropped_bytes,
+                "dropped_segments": self.dropped_segments,
+            }
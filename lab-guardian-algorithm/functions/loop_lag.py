@@ -0,0 +1,65 @@
+import asyncio
+import time
+from collections import deque
+
+
+def _percentile(ordered, pct):
+    if not ordered:
+        return None
+    return ordered[min(int(round(pct / 100.0 * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+class LoopLagMonitor:
+    """
+    asyncio 이벤트 루프 지연 측정: interval마다 잠들었다 깨어난 시각이 예정보다 늦은 만큼이 지연.
+    (탐지/인코딩/동기 I/O가 루프를 막으면 커짐 -> 모든 스트림/뷰어/HTTP 응답이 함께 늦어짐)
+    최근 history_sec 동안의 표본을 보관하고, bucket_sec 단위 최대/평균 시계열로 보여줌.
+    """
+
+    def __init__(self, interval=0.5, history_sec=600, bucket_sec=10, on_sample=None):
+        self.interval = max(float(interval), 0.01)
+        self.bucket_sec = max(float(bucket_sec), self.interval)
+        self.samples = deque(maxlen=max(int(history_sec / self.interval), 1))
+        self.on_sample = on_sample
+        self.max_lag = 0.0
+        self.max_lag_ts = None
+
+    async def run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(loop.time() - expected, 0.0)
+            now = time.time()
+            self.samples.append((now, lag))
+            if lag > self.max_lag:
+                self.max_lag, self.max_lag_ts = lag, now
+            if self.on_sample is not None:
+                self.on_sample(lag)
+
+    def stats(self, window_sec=60):
+        samples = list(self.samples)
+        now = time.time()
+        recent = sorted(lag for ts, lag in samples if now - ts <= window_sec)
+        series = []
+        for ts, lag in samples:
+            start = ts - ts % self.bucket_sec
+            if not series or series[-1]["ts"] != start:
+                series.append({"ts": start, "max_ms": 0.0, "sum": 0.0, "n": 0})
+            bucket = series[-1]
+            bucket["max_ms"] = max(bucket["max_ms"], lag * 1000)
+            bucket["sum"] += lag * 1000
+            bucket["n"] += 1
+        return {
+            "interval_sec": self.interval,
+            "window_sec": window_sec,
+            "p50_ms": round(_percentile(recent, 50) * 1000, 2) if recent else None,
+            "p99_ms": round(_percentile(recent, 99) * 1000, 2) if recent else None,
+            "max_ms": round(recent[-1] * 1000, 2) if recent else None,
+            "max_ever_ms": round(self.max_lag * 1000, 2),
+            "max_ever_ts": self.max_lag_ts,
+            "series": [
+                {"ts": b["ts"], "max_ms": round(b["max_ms"], 2), "avg_ms": round(b["sum"] / b["n"], 2)}
+                for b in series
+            ],
+        }
@@ -0,0 +1,195 @@
+import bisect
+import math
+import threading
+import time
+
+# Prometheus 텍스트 노출 형식(0.0.4)을 직접 생성하는 경량 지표 모듈 (prometheus_client 의존 없음).
+# 기록 경로는 잠금 없이 동작: 지표마다 스레드별 샤드(dict)를 두고 각 스레드는 자기 샤드만 갱신하며,
+# 수집(/metrics) 시에만 샤드를 합산합니다. 잠금은 스레드가 처음 기록할 때 샤드를 등록하는 한 번뿐.
+
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra=None):
+    pairs = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _number(value):
+    if value == math.inf:
+        return "+Inf"
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = tuple(labelnames)
+        self._local = threading.local()
+        self._shards = []
+        self._lock = threading.Lock()
+
+    def _shard(self):
+        shard = getattr(self._local, "shard", None)
+        if shard is None:
+            shard = self._local.shard = {}
+            with self._lock:
+                self._shards.append(shard)
+        return shard
+
+    def _snapshot(self):
+        with self._lock:
+            shards = list(self._shards)
+        # 다른 스레드가 기록 중인 dict를 순회하지 않도록 항목 목록을 먼저 복사
+        return [list(shard.items()) for shard in shards]
+
+    def remove(self, label, value):
+        """해당 라벨 값의 시계열 제거 (해제된 카메라 등, 라벨 수가 끝없이 늘지 않게)"""
+        index = self.labelnames.index(label)
+        with self._lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key in [k for k in list(shard) if k[index] == value]:
+                shard.pop(key, None)
+
+    def header(self):
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount=1):
+        shard = self._shard()
+        shard[labels] = shard.get(labels, 0) + amount
+
+    def collect(self):
+        totals = {}
+        for items in self._snapshot():
+            for key, value in items:
+                totals[key] = totals.get(key, 0) + value
+        lines = self.header()
+        for key in sorted(totals):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(totals[key])}")
+        return lines
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, *labels):
+        shard = self._shard()
+        cell = shard.get(labels)
+        if cell is None:
+            # [버킷별 개수..., +Inf 개수, 합계]
+            cell = shard[labels] = [0] * (len(self.buckets) + 1) + [0.0]
+        cell[bisect.bisect_left(self.buckets, value)] += 1
+        cell[-1] += value
+
+    def time(self, *labels):
+        return _Timer(self, labels)
+
+    def collect(self):
+        totals = {}
+        for items in self._snapshot():
+            for key, cell in items:
+                total = totals.get(key)
+                if total is None:
+                    totals[key] = list(cell)
+                else:
+                    for i, v in enumerate(cell):
+                        total[i] += v
+        lines = self.header()
+        bounds = list(self.buckets) + [math.inf]
+        for key in sorted(totals):
+            cell = totals[key]
+            cumulative = 0
+            for bound, count in zip(bounds, cell):
+                cumulative += count
+                le = 'le="' + _number(bound) + '"'
+                lines.append(f"{self.name}_bucket{_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.labelnames, key)} {_number(round(cell[-1], 6))}")
+            lines.append(f"{self.name}_count{_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+class _Timer:
+    __slots__ = ("histogram", "labels", "start")
+
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.start, *self.labels)
+
+
+class Gauge(_Metric):
+    """
+    수집 시점에 callback()이 돌려주는 {라벨 튜플: 값}을 그대로 노출 (큐 깊이, 뷰어 수 등).
+    다른 컴포넌트가 이미 세고 있는 누적값(드롭 수 등)은 kind="counter"로 노출.
+    """
+
+    def __init__(self, name, help_text, labelnames=(), callback=None, kind="gauge"):
+        super().__init__(name, help_text, labelnames)
+        self.callback = callback
+        self.kind = kind
+
+    def collect(self):
+        lines = self.header()
+        values = self.callback() if self.callback is not None else {}
+        for key in sorted(values):
+            lines.append(f"{self.name}{_labels(self.labelnames, key)} {_number(values[key])}")
+        return lines
+
+
+class MetricsRegistry:
+    def __init__(self, prefix=""):
+        self.prefix = prefix
+        self.metrics = []
+
+    def _add(self, metric):
+        self.metrics.append(metric)
+        return metric
+
+    def counter(self, name, help_text, labelnames=()):
+        return self._add(Counter(self.prefix + name, help_text, labelnames))
+
+    def histogram(self, name, help_text, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self._add(Histogram(self.prefix + name, help_text, labelnames, buckets))
+
+    def gauge(self, name, help_text, labelnames=(), callback=None, kind="gauge"):
+        return self._add(Gauge(self.prefix + name, help_text, labelnames, callback, kind))
+
+    def remove(self, label, value):
+        for metric in self.metrics:
+            if label in metric.labelnames and not isinstance(metric, Gauge):
+                metric.remove(label, value)
+
+    def render(self):
+        lines = []
+        for metric in self.metrics:
+            try:
+                lines.extend(metric.collect())
+            except Exception as e:
+                lines.append(f"# {metric.name} collect failed: {_escape(e)}")
+        return "\n".join(lines) + "\n"
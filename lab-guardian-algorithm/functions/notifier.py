@@ -1,33 +1,177 @@
-import requests
-import cv2
+import json
+import queue
+import random
 import threading
+import time
+
+import cv2
+import requests
+from requests.adapters import HTTPAdapter
+
 
 class TelegramNotifier:
-    def __init__(self, token, chat_id):
+    """
+    텔레그램 사진 알림 서비스.
+    - 고정 개수 워커 스레드 + 제한된 큐 (알림 폭주 시 스레드가 무한히 늘지 않음)
+    - keep-alive 세션 재사용, 실패 시 지터가 섞인 지수 백오프로 재시도 (429는 retry_after 준수)
+    - 이미 인코딩된 JPEG(스냅샷)를 넘기면 재인코딩하지 않음
+    """
+
+    def __init__(
+        self,
+        token,
+        chat_id,
+        workers=2,
+        queue_size=32,
+        max_retries=3,
+        backoff_base=0.5,
+        backoff_max=10.0,
+        timeout=5.0,
+        api_base="https://api.telegram.org",
+        verify=False,
+    ):
         self.token = token
         self.chat_id = chat_id
-        self.base_url = f"https://api.telegram.org/bot{token}/sendPhoto"
+        self.base_url = f"{api_base.rstrip('/')}/bot{token}/sendPhoto"
+        self.group_url = f"{api_base.rstrip('/')}/bot{token}/sendMediaGroup"
+        self.max_retries = max(int(max_retries), 0)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.timeout = float(timeout)
+        self.verify = verify
+        self.workers = max(int(workers), 1)
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.workers)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.queue = queue.Queue(maxsize=max(int(queue_size), 1))
+        self.sent = 0
+        self.failed = 0
+        self.retries = 0
+        self.dropped = 0
+        self._lock = threading.Lock()
+        for i in range(self.workers):
+            threading.Thread(target=self._worker, name=f"telegram-{i}", daemon=True).start()
+
+    def send_photo(self, cam_id, frame=None, jpeg_bytes=None, caption=None):
+        """알림 예약 (막히지 않음). 큐가 가득 차면 드랍 후 False"""
+        return self._enqueue(cam_id, (self._send, (cam_id, frame, jpeg_bytes, caption)))
+
+    def send_media_group(self, items, caption=None):
+        """
+        여러 카메라 스냅샷을 메시지 1건(미디어 그룹, 최대 10장)으로 전송.
+        items: [(cam_id, frame, jpeg_bytes), ...]
+        """
+        label = ",".join(item[0] for item in items)
+        return self._enqueue(label, (self._send_group, (items[:10], caption)))
+
+    def _enqueue(self, label, job):
+        try:
+            self.queue.put_nowait(job)
+            return True
+        except queue.Full:
+            with self._lock:
+                self.dropped += 1
+            print(f"⚠️ [알림 큐 가득 참] {label} 알림 드랍")
+            return False
+
+    def _worker(self):
+        while True:
+            func, args = self.queue.get()
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"⚠️ [알림 전송 오류] {e}")
+
+    def _encode(self, frame, jpeg_bytes):
+        if jpeg_bytes is not None:
+            return jpeg_bytes
+        ret, buffer = cv2.imencode('.jpg', frame)
+        return buffer.tobytes() if ret else None
+
+    def _send(self, cam_id, frame, jpeg_bytes, caption):
+        jpeg_bytes = self._encode(frame, jpeg_bytes)
+        if jpeg_bytes is None:
+            return
+        data = {
+            'chat_id': self.chat_id,
+            'caption': caption or f"🚨 [침입 감지] {cam_id}\n위험 상황이 포착되었습니다!",
+        }
+        files = {'photo': ('snapshot.jpg', jpeg_bytes, 'image/jpeg')}
+        self._post(self.base_url, files, data, cam_id)
+
+    def _send_group(self, items, caption):
+        files = {}
+        media = []
+        for i, (cam_id, frame, jpeg_bytes) in enumerate(items):
+            jpeg_bytes = self._encode(frame, jpeg_bytes)
+            if jpeg_bytes is None:
+                continue
+            name = f"photo{i}"
+            files[name] = (f"{name}.jpg", jpeg_bytes, 'image/jpeg')
+            media.append({"type": "photo", "media": f"attach://{name}", "caption": cam_id})
+        if not media:
+            return
+        cam_ids = ", ".join(item["caption"] for item in media)
+        media[0]["caption"] = caption or f"🚨 [침입 감지] {len(media)}대: {cam_ids}\n위험 상황이 포착되었습니다!"
+        data = {'chat_id': self.chat_id, 'media': json.dumps(media, ensure_ascii=False)}
+        self._post(self.group_url, files, data, cam_ids)
+
+    def _post(self, url, files, data, label):
+        for attempt in range(self.max_retries + 1):
+            delay = None
+            try:
+                res = self.session.post(
+                    url,
+                    files=files,
+                    data=data,
+                    verify=self.verify,
+                    timeout=self.timeout,
+                )
+                if res.status_code == 200:
+                    with self._lock:
+                        self.sent += 1
+                    print(f"📨 [텔레그램 전송 완료] {label}")
+                    return
+                if res.status_code == 429:
+                    delay = self._retry_after(res)
+                elif res.status_code < 500:
+                    # 4xx(토큰/채팅 ID 오류 등)는 재시도해도 같은 결과
+                    print(f"⚠️ [알림 전송 오류] {label}: HTTP {res.status_code}")
+                    break
+            except requests.exceptions.ConnectionError:
+                if attempt == self.max_retries:
+                    print(f"🔒 [보안 정책 알림] 방화벽에 의해 텔레그램이 차단됨. (Skip)")
+            except requests.exceptions.Timeout:
+                pass
+            if attempt == self.max_retries:
+                break
+            with self._lock:
+                self.retries += 1
+            time.sleep(delay if delay is not None else self._backoff(attempt))
+        with self._lock:
+            self.failed += 1
 
-    def send_photo(self, cam_id, frame):
-        # 메인 서버가 멈추지 않도록 별도 스레드에서 전송
-        threading.Thread(target=self._send_thread, args=(cam_id, frame)).start()
+    def _backoff(self, attempt):
+        # full jitter: 0 ~ base * 2^attempt
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** attempt)))
 
-    def _send_thread(self, cam_id, frame):
+    def _retry_after(self, res):
         try:
-            ret, buffer = cv2.imencode('.jpg', frame)
-            if not ret: return
+            return min(float(res.json()["parameters"]["retry_after"]), self.backoff_max)
+        except Exception:
+            return self.backoff_max
 
-            files = {'photo': buffer.tobytes()}
-            data = {
-                'chat_id': self.chat_id, 
-                'caption': f"🚨 [침입 감지] {cam_id}\n위험 상황이 포착되었습니다!"
+    def stats(self):
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "depth": self.queue.qsize(),
+                "capacity": self.queue.maxsize,
+                "sent": self.sent,
+                "failed": self.failed,
+                "retries": self.retries,
+                "dropped": self.dropped,
             }
-            
-            # 타임아웃 3초, 인증서 무시(verify=False)
-            requests.post(self.base_url, files=files, data=data, verify=False, timeout=3)
-            print(f"📨 [텔레그램 전송 완료] {cam_id}")
-            
-        except requests.exceptions.ConnectionError:
-            print(f"🔒 [보안 정책 알림] 방화벽에 의해 텔레그램이 차단됨. (Skip)")
-        except Exception as e:
-            print(f"⚠️ [알림 전송 오류] {e}")
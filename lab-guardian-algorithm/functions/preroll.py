@@ -0,0 +1,75 @@
+import cv2
+import threading
+from collections import deque
+
+
+class PrerollBuffer:
+    """
+    카메라별 사전 녹화(pre-roll) 링 버퍼.
+    - 최근 seconds 초 분량을 원본 ndarray가 아닌 JPEG 바이트로 보관해 메모리를 줄입니다.
+    - 카메라당 max_bytes를 넘으면 가장 오래된 프레임부터 버립니다.
+    """
+
+    def __init__(self, seconds=3.0, fps=5.0, max_bytes=4 * 1024 * 1024, quality=80):
+        self.seconds = max(float(seconds), 0.0)
+        self.min_interval = 1.0 / max(float(fps), 0.1)
+        self.max_bytes = max(int(max_bytes), 0)
+        self.quality = int(quality)
+        # { "cam_id": deque[(ts, jpeg_bytes)] }
+        self.buffers = {}
+        self.sizes = {}
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self):
+        return self.seconds > 0 and self.max_bytes > 0
+
+    def wants(self, cam_id, ts):
+        """샘플링 간격이 지났는지 확인 (인코딩 전에 호출해 불필요한 imencode를 피함)"""
+        buf = self.buffers.get(cam_id)
+        return not buf or ts - buf[-1][0] >= self.min_interval
+
+    def push(self, cam_id, ts, frame=None, jpeg_bytes=None):
+        """프레임 추가: 이미 인코딩된 JPEG가 있으면 그대로 사용"""
+        if not self.enabled or not self.wants(cam_id, ts):
+            return
+        if jpeg_bytes is None:
+            ret, buf = cv2.imencode('.jpg', frame, [int(cv2.IMWRITE_JPEG_QUALITY), self.quality])
+            if not ret:
+                return
+            jpeg_bytes = buf.tobytes()
+        with self._lock:
+            buf = self.buffers.setdefault(cam_id, deque())
+            buf.append((ts, jpeg_bytes))
+            size = self.sizes.get(cam_id, 0) + len(jpeg_bytes)
+            while buf and (ts - buf[0][0] > self.seconds or size > self.max_bytes):
+                _, old = buf.popleft()
+                size -= len(old)
+            self.sizes[cam_id] = size
+
+    def drain(self, cam_id):
+        """녹화 시작 시 버퍼 내용을 꺼내 비움 [(ts, jpeg_bytes), ...]"""
+        with self._lock:
+            buf = self.buffers.pop(cam_id, None)
+            self.sizes.pop(cam_id, None)
+        return list(buf) if buf else []
+
+    def clear(self, cam_id):
+        self.drain(cam_id)
+
+    def stats(self):
+        with self._lock:
+            cameras = {
+                cam_id: {
+                    "frames": len(buf),
+                    "bytes": self.sizes.get(cam_id, 0),
+                    "span_sec": round(buf[-1][0] - buf[0][0], 2) if buf else 0.0,
+                }
+                for cam_id, buf in self.buffers.items()
+            }
+        return {
+            "seconds": self.seconds,
+            "max_bytes_per_camera": self.max_bytes,
+            "total_bytes": sum(info["bytes"] for info in cameras.values()),
+            "cameras": cameras,
+        }
@@ -0,0 +1,321 @@
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+
+# 실행 중인 서버를 재시작하지 않고 프로파일링 (관리자 전용 /admin/profile/* 에서 사용)
+# - sample: 전용 스레드가 hz 주기로 모든 스레드의 파이썬 스택을 읽어 접힌 스택(folded) 파일로 기록
+#           (flamegraph.pl, speedscope, inferno에서 바로 열림, 모든 스레드 포함, 부하 작음)
+# - cprofile: 이벤트 루프 스레드(스트림 워커, 탐지, HTTP 핸들러)의 호출별 시간을 .prof(pstats)로 기록
+#             (snakeviz, flameprof, gprof2dot로 변환)
+MODES = ("sample", "cprofile")
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def _frame_label(code):
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+class StackSampler:
+    """sys._current_frames() 주기 표본 -> '스레드;바깥 함수;...;안쪽 함수' 별 표본 수"""
+
+    def __init__(self, hz=100):
+        self.interval = 1.0 / max(float(hz), 1.0)
+        self.stacks = Counter()
+        self.samples = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        me = threading.get_ident()
+        while not self._stop.wait(self.interval):
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me:
+                    continue
+                labels = []
+                while frame is not None:
+                    labels.append(_frame_label(frame.f_code))
+                    frame = frame.f_back
+                labels.append(names.get(ident, f"thread-{ident}"))
+                self.stacks[";".join(reversed(labels))] += 1
+            self.samples += 1
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def folded(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class ProfileSession:
+    def __init__(self, session_id, mode, seconds, hz):
+        self.id = session_id
+        self.mode = mode
+        self.seconds = seconds
+        self.hz = hz
+        self.started = time.time()
+        self.finished = None
+        self.file = None
+        self.summary = None
+        self.error = None
+        self.sampler = StackSampler(hz) if mode == "sample" else None
+        self.profile = cProfile.Profile() if mode == "cprofile" else None
+
+    def info(self):
+        return {
+            "id": self.id,
+            "mode": self.mode,
+            "seconds": self.seconds,
+            "hz": self.hz if self.mode == "sample" else None,
+            "started": self.started,
+            "finished": self.finished,
+            "running": self.finished is None,
+            "file": self.file,
+            "error": self.error,
+            "summary": self.summary,
+        }
+
+
+class ProfilerManager:
+    """
+    한 번에 하나의 프로파일 세션. start/stop은 이벤트 루프 스레드에서 호출
+    (cProfile은 켠 스레드만 기록하므로 켜고 끄는 것 모두 루프 스레드에서, 종료는 loop.call_later).
+    결과 파일은 out_dir에 최근 keep개만 남김.
+    """
+
+    def __init__(self, out_dir="profiles", max_sec=300, keep=10, summary_rows=25):
+        self.out_dir = out_dir
+        self.max_sec = float(max_sec)
+        self.keep = max(int(keep), 1)
+        self.summary_rows = summary_rows
+        self.current = None
+        self.history = []
+        self._timer = None
+        self._seq = 0
+
+    def start(self, loop, mode="sample", seconds=30.0, hz=100):
+        if mode not in MODES:
+            raise ValueError(f"mode must be one of {', '.join(MODES)}")
+        if self.current is not None:
+            raise RuntimeError(f"profile {self.current.id} is already running")
+        seconds = min(max(float(seconds), 1.0), self.max_sec)
+        self._seq += 1
+        session = ProfileSession(f"{time.strftime('%Y%m%d-%H%M%S')}-{mode}-{self._seq}", mode, seconds, int(hz))
+        if session.profile is not None:
+            # 다른 프로파일러(디버거 등)가 켜져 있으면 ValueError
+            session.profile.enable()
+        else:
+            session.sampler.start()
+        self.current = session
+        self._timer = loop.call_later(seconds, self.stop)
+        print(f"🔬 [프로파일] {session.id} 시작 ({seconds:.0f}초)")
+        return session.info()
+
+    def stop(self):
+        session, self.current = self.current, None
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if session is None:
+            return None
+        os.makedirs(self.out_dir, exist_ok=True)
+        try:
+            if session.profile is not None:
+                session.profile.disable()
+                session.file = f"{session.id}.prof"
+                session.profile.dump_stats(os.path.join(self.out_dir, session.file))
+                text = io.StringIO()
+                stats = pstats.Stats(session.profile, stream=text)
+                stats.sort_stats("cumulative").print_stats(self.summary_rows)
+                session.summary = text.getvalue()
+            else:
+                session.sampler.stop()
+                session.file = f"{session.id}.folded"
+                with open(os.path.join(self.out_dir, session.file), "w", encoding="utf-8") as f:
+                    f.write(session.sampler.folded())
+                session.summary = {
+                    "samples": session.sampler.samples,
+                    "top": [
+                        {"stack": stack.rsplit(";", 3)[-3:], "samples": count}
+                        for stack, count in session.sampler.stacks.most_common(self.summary_rows)
+                    ],
+                }
+        except Exception as e:
+            session.error = str(e)
+        session.finished = time.time()
+        self.history.append(session)
+        self._prune()
+        print(f"🔬 [프로파일] {session.id} 종료 -> {session.file}")
+        return session.info()
+
+    def _prune(self):
+        while len(self.history) > self.keep:
+            old = self.history.pop(0)
+            if old.file:
+                try:
+                    os.remove(os.path.join(self.out_dir, old.file))
+                except OSError:
+                    pass
+
+    def path(self, name):
+        """다운로드할 결과 파일 경로 (이 관리자가 만든 파일만)"""
+        for session in self.history:
+            if session.file == name:
+                return os.path.join(self.out_dir, name)
+        return None
+
+    def stats(self):
+        return {
+            "running": self.current.info() if self.current is not None else None,
+            "max_sec": self.max_sec,
+            "history": [s.info() for s in reversed(self.history)],
+        }
+
+
+class MemoryProfiler:
+    """
+    tracemalloc 스냅샷. 추적은 켜 둔 동안만 할당마다 비용이 들어 필요할 때만 켬.
+    numpy/OpenCV 프레임 버퍼도 파이썬 할당자로 잡혀, 프레임을 만든 코드 줄(main.py, functions/*)별로 보임.
+    직전 스냅샷과의 차이로 늘어나는 곳(누수 후보)을 확인. dump 파일은 out_dir에 최근 keep개만 남김.
+    """
+
+    def __init__(self, out_dir="profiles", keep=10):
+        self.out_dir = out_dir
+        self.keep = max(int(keep), 1)
+        self.previous = None
+        self.previous_ts = None
+        self.dumps = []
+        self._seq = 0
+        self._lock = threading.Lock()
+
+    def start(self, frames=16):
+        # 호출 스택을 frames 단계까지 저장: 라이브러리 안에서 할당돼도 그 할당을 부른 서버 코드 줄을 찾을 수 있음
+        # (frames=1이면 가장 안쪽 줄만 남아 numpy/OpenCV 내부 할당은 code_only 집계에서 빠짐)
+        if not tracemalloc.is_tracing():
+            tracemalloc.start(max(int(frames), 1))
+        return self.status()
+
+    def stop(self):
+        with self._lock:
+            self.previous = None
+            self.previous_ts = None
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        return self.status()
+
+    def status(self):
+        tracing = tracemalloc.is_tracing()
+        current, peak = tracemalloc.get_traced_memory() if tracing else (0, 0)
+        return {
+            "tracing": tracing,
+            "frames": tracemalloc.get_traceback_limit() if tracing else None,
+            "traced_mb": round(current / 1024 / 1024, 2),
+            "peak_mb": round(peak / 1024 / 1024, 2),
+        }
+
+    @staticmethod
+    def _by_line(snapshot, code_only):
+        """(파일, 줄) -> [바이트, 할당 수]"""
+        lines = {}
+        for trace in snapshot.traces:
+            frame = trace.traceback[-1]
+            if code_only:
+                # 스택에서 가장 안쪽의 서버 코드 줄: 라이브러리 내부 할당은 그것을 부른 줄로 합산
+                # (저장된 frames 단계 안에 서버 코드가 없으면 제외)
+                frame = next((f for f in reversed(trace.traceback) if f.filename.startswith(_ROOT + os.sep)), None)
+                if frame is None:
+                    continue
+            entry = lines.setdefault((frame.filename, frame.lineno), [0, 0])
+            entry[0] += trace.size
+            entry[1] += 1
+        return lines
+
+    def snapshot(self, top=25, code_only=True, dump=False):
+        if not tracemalloc.is_tracing():
+            raise RuntimeError("tracemalloc is not tracing (start it first)")
+        snapshot = tracemalloc.take_snapshot()
+        filtered = snapshot.filter_traces([
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+        ])
+        lines = self._by_line(filtered, code_only)
+        ranked = sorted(lines.items(), key=lambda item: item[1][0], reverse=True)
+        result = {
+            **self.status(),
+            "code_only": code_only,
+            "top": [self._row(where, size, count) for where, (size, count) in ranked[:top]],
+        }
+        with self._lock:
+            previous, previous_ts = self.previous, self.previous_ts
+            # 집계 방식이 다른 스냅샷끼리는 비교하지 않음
+            self.previous, self.previous_ts = (code_only, lines), time.time()
+        if previous is not None and previous[0] == code_only:
+            old = previous[1]
+            growth = []
+            for where in lines.keys() | old.keys():
+                size, count = lines.get(where, (0, 0))
+                old_size, old_count = old.get(where, (0, 0))
+                if size > old_size:
+                    growth.append((size - old_size, where, size, count, count - old_count))
+            growth.sort(key=lambda item: item[0], reverse=True)
+            result["since_sec"] = round(self.previous_ts - previous_ts, 1)
+            result["growth"] = [
+                self._row(where, size, count, size_diff, count_diff)
+                for size_diff, where, size, count, count_diff in growth[:top]
+            ]
+        if dump:
+            # tracemalloc.Snapshot.load()로 오프라인 분석 (전체 스택 포함, 필터 전 원본)
+            os.makedirs(self.out_dir, exist_ok=True)
+            with self._lock:
+                self._seq += 1
+                name = f"{time.strftime('%Y%m%d-%H%M%S')}-tracemalloc-{self._seq}.snapshot"
+            snapshot.dump(os.path.join(self.out_dir, name))
+            result["file"] = name
+            with self._lock:
+                self.dumps.append(name)
+                self._prune()
+        return result
+
+    def _prune(self):
+        while len(self.dumps) > self.keep:
+            try:
+                os.remove(os.path.join(self.out_dir, self.dumps.pop(0)))
+            except OSError:
+                pass
+
+    def path(self, name):
+        """다운로드할 스냅샷 파일 경로 (이 관리자가 만든 파일만)"""
+        with self._lock:
+            if name in self.dumps:
+                return os.path.join(self.out_dir, name)
+        return None
+
+    @staticmethod
+    def _row(where, size, count, size_diff=None, count_diff=None):
+        filename, lineno = where
+        if filename.startswith(_ROOT + os.sep):
+            filename = os.path.relpath(filename, _ROOT)
+        elif not filename.startswith("<"):
+            # 라이브러리는 마지막 두 단계만 (예: numpy/core/numeric.py -> core/numeric.py)
+            filename = os.path.join(*filename.split(os.sep)[-2:])
+        row = {
+            "where": f"{filename}:{lineno}",
+            "size_kb": round(size / 1024, 1),
+            "count": count,
+        }
+        if size_diff is not None:
+            row["size_diff_kb"] = round(size_diff / 1024, 1)
+            row["count_diff"] = count_diff
+        return row
@@ -0,0 +1,178 @@
+import cv2
+
+try:
+    import av
+except ImportError:  # 선택 의존성: 없으면 OpenCV 캡처만 사용
+    av = None
+
+_RTSP_OPTIONS = {
+    "fflags": "nobuffer",
+    "flags": "low_delay",
+    "max_delay": "0",
+    "reorder_queue_size": "0",
+}
+# 소비 fps가 카메라 fps의 이 비율 이하이면 비참조 프레임(B 등)은 디코드하지 않음
+_NONREF_RATIO = 0.5
+# 키프레임 간격 추정에 쓰는 키프레임 수
+_KEYFRAMES_TO_LEARN = 2
+
+
+def available():
+    return av is not None
+
+
+class PyAVCapture:
+    """
+    PyAV(FFmpeg) 캡처. cv2.VideoCapture와 같은 메서드(isOpened/read/grab/set/get/release)로 교체해 사용.
+    - RTSP 옵션(전송 방식, 제한 시간)은 스트림별로 전달: 프로세스 환경변수를 바꾸지 않아 동시 열기에 안전
+    - 소비 fps(target_fps)가 카메라 fps보다 훨씬 낮으면 디코드 자체를 줄임 (skip="auto")
+        * 키프레임 간격이 소비 주기보다 짧으면 키프레임만 디코드 (NONKEY)
+        * 소비 fps <= 카메라 fps x 0.5 이면 비참조 프레임 생략 (NONREF)
+    - BGR 변환과 축소(max_width/max_height 안으로, 비율 유지)를 swscale 한 번에 처리
+    """
+
+    def __init__(
+        self,
+        url,
+        transport="tcp",
+        max_width=0,
+        max_height=0,
+        target_fps=None,
+        skip="auto",
+        timeout=5.0,
+    ):
+        self.url = url
+        self.max_width = max_width
+        self.max_height = max_height
+        self.skip = skip
+        self.target_fps = target_fps
+        self.skip_mode = "DEFAULT"
+        self.camera_fps = None
+        self.keyframe_fps = None
+        self.decoded = 0
+        self.position = 0.0  # 마지막으로 디코드한 프레임의 스트림 시각(초)
+        self._keyframes = []
+        self._out_size = None
+        self._container = None
+        self._stream = None
+        self._frames = None
+        self._grabbed = None  # grab()으로 디코드했지만 아직 retrieve()하지 않은 프레임
+        options = {}
+        if url.startswith(("rtsp://", "rtsps://")):
+            options = dict(_RTSP_OPTIONS, rtsp_transport="udp" if transport == "udp" else "tcp")
+        try:
+            self._container = av.open(url, options=options, timeout=(timeout, timeout))
+            self._stream = self._container.streams.video[0]
+        except (av.FFmpegError, IndexError, OSError):
+            self.release()
+            return
+        rate = self._stream.average_rate or self._stream.guessed_rate
+        self.camera_fps = float(rate) if rate else None
+        self._frames = self._container.decode(self._stream)
+        self._apply_skip()
+
+    # --- 디코드량 조절 ---
+    def _apply_skip(self):
+        mode = "DEFAULT"
+        if self.skip in ("nonref", "nonkey"):
+            mode = self.skip.upper()
+        elif self.skip == "auto" and self.target_fps:
+            if self.keyframe_fps and self.target_fps <= self.keyframe_fps:
+                mode = "NONKEY"
+            elif self.camera_fps and self.target_fps <= self.camera_fps * _NONREF_RATIO:
+                mode = "NONREF"
+        if mode != self.skip_mode:
+            self._stream.codec_context.skip_frame = mode
+            self.skip_mode = mode
+
+    def _learn_keyframes(self, frame):
+        # 키프레임 간격(GOP) 추정: 처음 몇 개 키프레임의 시각 차이
+        if self.keyframe_fps is not None or not frame.key_frame or frame.time is None:
+            return
+        self._keyframes.append(frame.time)
+        if len(self._keyframes) >= _KEYFRAMES_TO_LEARN:
+            span = self._keyframes[-1] - self._keyframes[0]
+            if span > 0:
+                self.keyframe_fps = (len(self._keyframes) - 1) / span
+                self._apply_skip()
+
+    def _next(self):
+        if self._frames is None:
+            return None
+        try:
+            frame = next(self._frames)
+        except (StopIteration, av.FFmpegError, OSError):
+            self.release()
+            return None
+        self.decoded += 1
+        if frame.time is not None:
+            self.position = frame.time
+        self._learn_keyframes(frame)
+        return frame
+
+    def _size(self, frame):
+        if self._out_size is None:
+            w, h = frame.width, frame.height
+            scale = 1.0
+            if self.max_width and w > self.max_width:
+                scale = self.max_width / w
+            if self.max_height and h * scale > self.max_height:
+                scale = self.max_height / h
+            # swscale 출력은 짝수 크기가 안전
+            self._out_size = (max(int(w * scale) // 2 * 2, 2), max(int(h * scale) // 2 * 2, 2))
+        return self._out_size
+
+    # --- cv2.VideoCapture 호환 ---
+    def isOpened(self):
+        return self._container is not None
+
+    def grab(self):
+        """다음 프레임을 디코드만 함 (BGR 변환/축소는 retrieve()에서, 안 부르면 버려짐)"""
+        self._grabbed = self._next()
+        return self._grabbed is not None
+
+    def retrieve(self):
+        frame, self._grabbed = self._grabbed, None
+        if frame is None:
+            return False, None
+        width, height = self._size(frame)
+        return True, frame.to_ndarray(width=width, height=height, format="bgr24", interpolation="AREA")
+
+    def read(self):
+        self.grab()
+        return self.retrieve()
+
+    def set(self, prop, value):
+        # CAP_PROP_FPS = 소비 fps 변경 (디코드 생략 모드 재결정), 나머지는 무시
+        if prop == cv2.CAP_PROP_FPS and self._stream is not None:
+            self.target_fps = float(value) if value else None
+            self._apply_skip()
+            return True
+        return False
+
+    def get(self, prop):
+        if prop == cv2.CAP_PROP_FPS:
+            return self.camera_fps or 0.0
+        if prop == cv2.CAP_PROP_POS_MSEC:
+            return self.position * 1000.0
+        return 0.0
+
+    def release(self):
+        container, self._container, self._frames = self._container, None, None
+        self._grabbed = None
+        if container is not None:
+            try:
+                container.close()
+            except (av.FFmpegError, OSError):
+                pass
+
+    def stats(self):
+        return {
+            "backend": "pyav",
+            "skip_mode": self.skip_mode,
+            "camera_fps": round(self.camera_fps, 2) if self.camera_fps else None,
+            "keyframe_fps": round(self.keyframe_fps, 3) if self.keyframe_fps else None,
+            "target_fps": self.target_fps,
+            "output_size": list(self._out_size) if self._out_size else None,
+            "decoded": self.decoded,
+        }
@@ -1,82 +1,361 @@
 import cv2
+import numpy as np
 import os
+import queue
 import threading
+import time
 from datetime import datetime
 
+from functions.encoders import create_writer
+
+
+class _Recording:
+    """녹화 1건: 제한된 큐를 통해 전용 writer 스레드가 프레임을 바로 인코딩"""
+
+    def __init__(self, cam_id, filename, timestamp, start_time, end_time, queue_size):
+        self.cam_id = cam_id
+        self.filename = filename
+        self.timestamp = timestamp
+        self.start_time = start_time
+        self.end_time = end_time
+        self.last_time = start_time
+        self.frames = queue.Queue(maxsize=queue_size)
+        self.queued_bytes = 0
+        self.frame_count = 0
+        self.dropped = 0
+        self.fps = 0.0
+        self.size = None
+        # 사전 녹화(pre-roll) JPEG 프레임 [(ts, jpeg_bytes), ...]
+        self.preroll = []
+        # 카탈로그용: 경보(탐지) 횟수와 썸네일 원본 프레임
+        self.detections = 1
+        self.thumb_frame = None
+        self.finished = threading.Event()
+        self.thread = None
+
+
 class VideoRecorder:
-    def __init__(self, save_dir="recordings", on_video_saved=None):
+    def __init__(
+        self,
+        save_dir="recordings",
+        on_video_saved=None,
+        queue_size=30,
+        max_duration=60.0,
+        fps_probe_frames=8,
+        idle_timeout=5.0,
+        preroll=None,
+        backend="opencv",
+        x264_preset="veryfast",
+        x264_crf=23,
+        catalog=None,
+        thumb_width=320,
+    ):
         self.save_dir = save_dir
         os.makedirs(self.save_dir, exist_ok=True)
-        # 녹화 상태 관리 { "cam_id": { ... } }
-        self.recording_state = {} 
+        # 녹화 상태 관리 { "cam_id": _Recording }
+        self.recording_state = {}
         self.on_video_saved = on_video_saved
+        # 큐 길이 = 녹화 1건당 메모리에 머무를 수 있는 최대 프레임 수
+        self.queue_size = max(int(queue_size), 1)
+        self.max_duration = float(max_duration)
+        self.fps_probe_frames = max(int(fps_probe_frames), 2)
+        self.idle_timeout = float(idle_timeout)
+        # 사전 녹화 링 버퍼 (PrerollBuffer, 없으면 비활성)
+        self.preroll = preroll
+        # 인코더 백엔드: "opencv"(mp4v) 또는 "x264"(ffmpeg libx264 파이프)
+        self.backend = backend
+        self.x264_preset = x264_preset
+        self.x264_crf = x264_crf
+        # 녹화 색인 (RecordingCatalog, 없으면 기록하지 않음)
+        self.catalog = catalog
+        self.thumb_dir = os.path.join(self.save_dir, "thumbs")
+        self.thumb_width = int(thumb_width)
+        os.makedirs(self.thumb_dir, exist_ok=True)
+        self._lock = threading.Lock()
+        # 메모리 측정용 통계
+        self.queued_bytes = 0
+        self.peak_queued_bytes = 0
+        self.dropped_frames = 0
 
     def save_snapshot(self, cam_id, frame):
         """스냅샷 저장 후 '웹 경로' 반환"""
+        web_path, _ = self.write_snapshot(cam_id, frame)
+        return web_path
+
+    def write_snapshot(self, cam_id, frame):
+        """스냅샷을 한 번만 인코딩해 저장하고 (웹 경로, JPEG 바이트) 반환 (알림에서 재사용)"""
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
         filename = f"{cam_id}_{timestamp}.jpg"
-        
-        # 1. 로컬 폴더에 파일 저장
+
+        ret, buf = cv2.imencode('.jpg', frame)
+        if not ret:
+            print(f"❌ [스냅샷 인코딩 실패] {cam_id}")
+            return f"/recordings/{filename}", None
+        jpeg_bytes = buf.tobytes()
+
+        # 1. 로컬 폴더에 파일 저장 (디스크 부족 등으로 실패하면 로그)
         file_path = os.path.join(self.save_dir, filename)
-        cv2.imwrite(file_path, frame)
-        
+        try:
+            with open(file_path, "wb") as f:
+                f.write(jpeg_bytes)
+        except OSError as e:
+            print(f"❌ [스냅샷 저장 실패] {file_path}: {e}")
+        else:
+            if self.catalog is not None:
+                now = time.time()
+                self.catalog.add(
+                    cam_id, "snapshot", filename, now, ended_at=now,
+                    size_bytes=len(jpeg_bytes), detection_count=1,
+                )
+
         # 2. 🚀 [핵심 수정] 날짜가 아니라 '웹 경로'를 리턴해야 함!
         # (수정 전: return timestamp)
-        return f"/recordings/{filename}"
+        return f"/recordings/{filename}", jpeg_bytes
 
     def start_recording(self, cam_id, duration=10.0, current_time=0):
-        """녹화 시작 예약"""
-        if cam_id not in self.recording_state:
-            print(f"🎥 [녹화 시작] {cam_id} (10초)")
-            self.recording_state[cam_id] = {
-                "end_time": current_time + duration,
-                "frames": [],
-                "timestamp": datetime.now().strftime("%Y%m%d_%H%M%S"),
-                "start_time": current_time,
-                "last_time": current_time,
-            }
+        """녹화 시작 예약 (이미 녹화 중이면 종료 시각만 연장)"""
+        with self._lock:
+            rec = self.recording_state.get(cam_id)
+            if rec is not None:
+                self._extend(rec, current_time + duration)
+                return
+            print(f"🎥 [녹화 시작] {cam_id} ({duration:.0f}초)")
+            timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+            filename = os.path.join(self.save_dir, f"{cam_id}_{timestamp}.mp4")
+            rec = _Recording(
+                cam_id,
+                filename,
+                timestamp,
+                current_time,
+                current_time + duration,
+                self.queue_size,
+            )
+            if self.preroll is not None:
+                rec.preroll = self.preroll.drain(cam_id)
+            rec.thread = threading.Thread(target=self._writer_thread, args=(rec,), daemon=True)
+            self.recording_state[cam_id] = rec
+            rec.thread.start()
+
+    def extend_recording(self, cam_id, current_time, duration=10.0):
+        """경보가 계속되는 동안 녹화 종료 시각을 연장 (max_duration 상한)"""
+        with self._lock:
+            rec = self.recording_state.get(cam_id)
+            if rec is not None:
+                self._extend(rec, current_time + duration)
+
+    def _extend(self, rec, end_time):
+        rec.detections += 1
+        limit = rec.start_time + self.max_duration
+        rec.end_time = min(max(rec.end_time, end_time), limit)
+
+    def process_frame(self, cam_id, frame, current_time, jpeg_bytes=None):
+        """
+        프레임을 writer 스레드 큐에 전달 (큐가 가득 차면 드랍).
+        녹화 중이 아니면 사전 녹화 버퍼에 넣습니다 (jpeg_bytes가 있으면 재인코딩 없이 보관).
+        """
+        rec = self.recording_state.get(cam_id)
+        if rec is None:
+            if self.preroll is not None:
+                self.preroll.push(cam_id, current_time, frame=frame, jpeg_bytes=jpeg_bytes)
+            return
 
-    def process_frame(self, cam_id, frame, current_time):
-        """프레임 수집 및 저장 처리"""
-        if cam_id in self.recording_state:
-            rec_info = self.recording_state[cam_id]
-            
-            # 녹화 중: 프레임 추가
-            if current_time < rec_info["end_time"]:
-                rec_info["frames"].append(frame.copy())
-                rec_info["last_time"] = current_time
-            
-            # 녹화 종료: 파일 저장 (스레드)
-            else:
-                print(f"⏹ [녹화 종료] {cam_id} -> 파일 저장 중...")
-                threading.Thread(
-                    target=self._save_file_thread, 
-                    args=(
-                        cam_id,
-                        rec_info["frames"],
-                        rec_info["timestamp"],
-                        rec_info["start_time"],
-                        rec_info["last_time"],
-                    ),
-                    daemon=True,
-                ).start()
+        # 녹화 중: 큐에 추가 (원본 프레임은 이후 수정되지 않으므로 복사하지 않음)
+        if current_time < rec.end_time:
+            size = frame.nbytes
+            # 큐에 넣기 전에 집계: writer 스레드가 바로 꺼내 _release()해도 음수가 되지 않게
+            with self._lock:
+                rec.queued_bytes += size
+                self.queued_bytes += size
+                self.peak_queued_bytes = max(self.peak_queued_bytes, self.queued_bytes)
+            try:
+                rec.frames.put_nowait((frame, current_time))
+            except queue.Full:
+                rec.dropped += 1
+                with self._lock:
+                    rec.queued_bytes -= size
+                    self.queued_bytes -= size
+                    self.dropped_frames += 1
+                return
+            rec.last_time = current_time
+
+        # 녹화 종료: writer 스레드에 종료 신호
+        else:
+            print(f"⏹ [녹화 종료] {cam_id} -> 파일 마무리 중...")
+            self._finish(cam_id, rec)
+
+    def _finish(self, cam_id, rec):
+        with self._lock:
+            if self.recording_state.get(cam_id) is rec:
                 del self.recording_state[cam_id]
+        rec.finished.set()
 
-    def _save_file_thread(self, cam_id, frames, timestamp, start_time, last_time):
-        if not frames: return
+    def _release(self, rec, frame):
+        """기록(또는 폐기)이 끝난 프레임의 메모리 집계 해제"""
+        with self._lock:
+            rec.queued_bytes -= frame.nbytes
+            self.queued_bytes -= frame.nbytes
+
+    def _writer_thread(self, rec):
+        out = None
+        probe = []
+        last_frame_at = time.time()
         try:
-            filename = os.path.join(self.save_dir, f"{cam_id}_{timestamp}.mp4")
-            height, width, _ = frames[0].shape
-            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
-            duration = max(0.1, last_time - start_time)
-            fps = max(1.0, min(20.0, len(frames) / duration))
-            out = cv2.VideoWriter(filename, fourcc, fps, (width, height))
-            
-            for frame in frames:
-                out.write(frame)
-            out.release()
-            print(f"💾 [저장 완료] {filename} ({len(frames)} frames @ {fps:.1f}fps)")
+            while True:
+                try:
+                    item = rec.frames.get(timeout=0.5)
+                except queue.Empty:
+                    if rec.finished.is_set():
+                        break
+                    # 프레임 공급이 idle_timeout 이상 끊기면(카메라 이탈 등) 스스로 마무리
+                    if time.time() - last_frame_at > self.idle_timeout:
+                        print(f"⏹ [녹화 종료] {rec.cam_id} (프레임 없음)")
+                        self._finish(rec.cam_id, rec)
+                        break
+                    continue
+                last_frame_at = time.time()
+                frame, ts = item
+
+                # 처음 몇 프레임의 간격으로 FPS를 추정한 뒤 writer를 연다
+                # (추정용으로 들고 있는 프레임도 기록될 때까지 메모리 집계에 포함)
+                if out is None:
+                    probe.append((frame, ts))
+                    if len(probe) < self.fps_probe_frames:
+                        continue
+                    out = self._flush_probe(rec, probe)
+                    continue
+                try:
+                    self._write(out, rec, frame)
+                finally:
+                    self._release(rec, frame)
+
+            if out is None and probe:
+                out = self._flush_probe(rec, probe)
+            if out is None:
+                return
+            writer, out = out, None
+            try:
+                writer.release()
+            except Exception:
+                writer.abort()
+                raise
+            print(
+                f"💾 [저장 완료] {rec.filename} ({rec.frame_count} frames @ {rec.fps:.1f}fps,"
+                f" dropped {rec.dropped})"
+            )
+            self._catalog_clip(rec)
             if self.on_video_saved:
-                self.on_video_saved(cam_id, filename)
+                self.on_video_saved(rec.cam_id, rec.filename)
         except Exception as e:
             print(f"❌ [저장 실패] {e}")
+            # 이 녹화는 끝냄 (더 이상 프레임을 받지 않고, 다음 경보는 새 녹화로 시작)
+            self._finish(rec.cam_id, rec)
+            if out is not None:
+                # 기록 중 실패(ffmpeg 종료 등): writer를 정리하고 색인되지 않는 미완성 파일 삭제
+                out.abort()
+        finally:
+            # 예외로 빠져나온 경우 추정용/큐에 남은 프레임의 메모리 집계를 정리
+            for probe_frame, _ in probe:
+                self._release(rec, probe_frame)
+            while True:
+                try:
+                    self._release(rec, rec.frames.get_nowait()[0])
+                except queue.Empty:
+                    break
+
+    def _flush_probe(self, rec, probe):
+        """FPS 추정이 끝난 프레임들로 writer를 열고 사전 녹화 + 추정용 프레임을 기록"""
+        rec.thumb_frame = probe[0][0]
+        out = self._open_writer(rec, probe)
+        try:
+            self._write_preroll(out, rec, probe[0][1])
+            while probe:
+                self._write(out, rec, probe[0][0])
+                self._release(rec, probe.pop(0)[0])
+        except Exception:
+            out.abort()
+            raise
+        return out
+
+    def save_thumbnail(self, frame, name):
+        """썸네일 저장 후 '웹 경로' 반환 (실패 시 None)"""
+        height, width = frame.shape[:2]
+        if width > self.thumb_width:
+            frame = cv2.resize(frame, (self.thumb_width, int(height * self.thumb_width / width)))
+        path = os.path.join(self.thumb_dir, f"{name}.jpg")
+        if not cv2.imwrite(path, frame, [int(cv2.IMWRITE_JPEG_QUALITY), 75]):
+            return None
+        return f"/recordings/thumbs/{name}.jpg"
+
+    def _catalog_clip(self, rec):
+        if self.catalog is None:
+            return
+        name = os.path.basename(rec.filename)
+        thumbnail = None
+        if rec.thumb_frame is not None:
+            thumbnail = self.save_thumbnail(rec.thumb_frame, os.path.splitext(name)[0])
+            rec.thumb_frame = None
+        self.catalog.add(
+            rec.cam_id,
+            "clip",
+            name,
+            rec.start_time,
+            ended_at=rec.last_time,
+            frame_count=rec.frame_count,
+            size_bytes=os.path.getsize(rec.filename),
+            detection_count=rec.detections,
+            thumbnail=thumbnail,
+        )
+
+    def _open_writer(self, rec, probe):
+        height, width = probe[0][0].shape[:2]
+        duration = max(0.1, probe[-1][1] - probe[0][1])
+        fps = (len(probe) - 1) / duration if len(probe) > 1 else 1.0
+        rec.fps = max(1.0, min(20.0, fps))
+        rec.size = (width, height)
+        return create_writer(
+            self.backend,
+            rec.filename,
+            rec.fps,
+            rec.size,
+            preset=self.x264_preset,
+            crf=self.x264_crf,
+        )
+
+    def _write_preroll(self, out, rec, first_live_ts):
+        """사전 녹화 프레임을 앞에 붙임 (샘플링 간격만큼 반복해 재생 속도를 맞춤)"""
+        preroll, rec.preroll = rec.preroll, []
+        for i, (ts, jpeg_bytes) in enumerate(preroll):
+            frame = cv2.imdecode(np.frombuffer(jpeg_bytes, np.uint8), cv2.IMREAD_COLOR)
+            if frame is None:
+                continue
+            next_ts = preroll[i + 1][0] if i + 1 < len(preroll) else first_live_ts
+            repeat = max(1, min(int(round((next_ts - ts) * rec.fps)), int(rec.fps)))
+            for _ in range(repeat):
+                self._write(out, rec, frame)
+
+    def _write(self, out, rec, frame):
+        if (frame.shape[1], frame.shape[0]) != rec.size:
+            frame = cv2.resize(frame, rec.size)
+        out.write(frame)
+        rec.frame_count += 1
+
+    def stats(self):
+        """녹화 버퍼 메모리 사용량 (바이트 단위)"""
+        with self._lock:
+            return {
+                "active": {
+                    cam_id: {
+                        "queued_frames": rec.frames.qsize(),
+                        "queued_bytes": rec.queued_bytes,
+                        "written_frames": rec.frame_count,
+                        "dropped_frames": rec.dropped,
+                        "seconds_left": round(max(0.0, rec.end_time - rec.last_time), 2),
+                    }
+                    for cam_id, rec in self.recording_state.items()
+                },
+                "queue_size": self.queue_size,
+                "queued_bytes": self.queued_bytes,
+                "peak_queued_bytes": self.peak_queued_bytes,
+                "dropped_frames": self.dropped_frames,
+                "preroll": self.preroll.stats() if self.preroll is not None else None,
+            }
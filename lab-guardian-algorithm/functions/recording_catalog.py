@@ -0,0 +1,201 @@
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS recordings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    cam_id TEXT NOT NULL,
+    kind TEXT NOT NULL,
+    filename TEXT NOT NULL UNIQUE,
+    started_at REAL NOT NULL,
+    ended_at REAL,
+    frame_count INTEGER,
+    size_bytes INTEGER NOT NULL DEFAULT 0,
+    detection_count INTEGER,
+    thumbnail TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_recordings_cam_time ON recordings (cam_id, started_at, id);
+CREATE INDEX IF NOT EXISTS idx_recordings_time ON recordings (started_at, id);
+CREATE INDEX IF NOT EXISTS idx_recordings_kind_time ON recordings (kind, started_at, id);
+"""
+
+MEDIA_KINDS = {".mp4": "clip", ".jpg": "snapshot"}
+
+
+class RecordingCatalog:
+    """
+    recordings/ 폴더의 SQLite 색인.
+    - 녹화/스냅샷 저장 시점에 메타데이터를 기록해 디렉터리 전체 조회 없이 검색합니다.
+    - (cam_id, started_at, id) / (kind, started_at, id) 인덱스 + 키셋 페이지네이션이라
+      파일 수가 늘어도 조회 시간이 일정합니다 (kind만 거는 검색도 시간 인덱스를 훑지 않음).
+    """
+
+    def __init__(self, db_path="recordings.db"):
+        self.db_path = db_path
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self.conn.commit()
+
+    def add(
+        self,
+        cam_id,
+        kind,
+        filename,
+        started_at,
+        ended_at=None,
+        frame_count=None,
+        size_bytes=0,
+        detection_count=None,
+        thumbnail=None,
+    ):
+        """파일 1건 등록 (같은 파일명이 있으면 갱신). 등록된 id 반환"""
+        with self._lock:
+            cur = self.conn.execute(
+                """
+                INSERT INTO recordings
+                    (cam_id, kind, filename, started_at, ended_at, frame_count,
+                     size_bytes, detection_count, thumbnail)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(filename) DO UPDATE SET
+                    ended_at = excluded.ended_at,
+                    frame_count = excluded.frame_count,
+                    size_bytes = excluded.size_bytes,
+                    detection_count = excluded.detection_count,
+                    thumbnail = excluded.thumbnail
+                """,
+                (cam_id, kind, filename, started_at, ended_at, frame_count,
+                 size_bytes, detection_count, thumbnail),
+            )
+            self.conn.commit()
+            return cur.lastrowid
+
+    def get(self, rec_id):
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM recordings WHERE id = ?", (rec_id,)).fetchone()
+        return dict(row) if row else None
+
+    def search(self, cam_id=None, kind=None, start=None, end=None, cursor=None, limit=50):
+        """
+        최신순 검색. cursor는 이전 페이지의 next_cursor("started_at:id")
+        반환: (items, next_cursor)
+        """
+        where = []
+        params = []
+        if cam_id:
+            where.append("cam_id = ?")
+            params.append(cam_id)
+        if kind:
+            where.append("kind = ?")
+            params.append(kind)
+        if start is not None:
+            where.append("started_at >= ?")
+            params.append(start)
+        if end is not None:
+            where.append("started_at < ?")
+            params.append(end)
+        if cursor:
+            cursor_ts, cursor_id = cursor.split(":", 1)
+            # 행 값 비교: (started_at, id) 인덱스에서 커서 위치로 바로 찾아감
+            # (OR로 풀어 쓰면 최신 행부터 커서까지 훑어 깊은 페이지일수록 느려짐)
+            where.append("(started_at, id) < (?, ?)")
+            params.extend([float(cursor_ts), int(cursor_id)])
+        sql = "SELECT * FROM recordings"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY started_at DESC, id DESC LIMIT ?"
+        params.append(limit + 1)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        items = [dict(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            last = items[-1]
+            next_cursor = f"{last['started_at']}:{last['id']}"
+        return items, next_cursor
+
+    def delete(self, rec_ids):
+        if not rec_ids:
+            return
+        with self._lock:
+            self.conn.executemany("DELETE FROM recordings WHERE id = ?", [(i,) for i in rec_ids])
+            self.conn.commit()
+
+    def oldest(self, cam_id=None, before=None, limit=100):
+        """오래된 순 조회 (보관 정책 삭제 대상 선정용)"""
+        where = []
+        params = []
+        if cam_id:
+            where.append("cam_id = ?")
+            params.append(cam_id)
+        if before is not None:
+            where.append("started_at < ?")
+            params.append(before)
+        sql = "SELECT * FROM recordings"
+        if where:
+            sql += " WHERE " + " AND ".join(where)
+        sql += " ORDER BY started_at ASC, id ASC LIMIT ?"
+        params.append(limit)
+        with self._lock:
+            rows = self.conn.execute(sql, params).fetchall()
+        return [dict(row) for row in rows]
+
+    def after_id(self, last_id, limit=100):
+        """id 순 페이지 조회 (파일 존재 여부 점진 점검용)"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT * FROM recordings WHERE id > ? ORDER BY id LIMIT ?", (last_id, limit)
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def usage(self):
+        """카메라별 { cam_id: (bytes, count) }"""
+        with self._lock:
+            rows = self.conn.execute(
+                "SELECT cam_id, COALESCE(SUM(size_bytes), 0), COUNT(*) FROM recordings GROUP BY cam_id"
+            ).fetchall()
+        return {row[0]: (row[1], row[2]) for row in rows}
+
+    def count(self):
+        with self._lock:
+            return self.conn.execute("SELECT COUNT(*) FROM recordings").fetchone()[0]
+
+    def backfill(self, save_dir):
+        """카탈로그 도입 이전 파일 등록: "{cam_id}_{YYYYmmdd}_{HHMMSS}.ext" 형식만 인식"""
+        with self._lock:
+            known = {row[0] for row in self.conn.execute("SELECT filename FROM recordings")}
+        added = 0
+        try:
+            entries = os.scandir(save_dir)
+        except FileNotFoundError:
+            return 0
+        for entry in entries:
+            if not entry.is_file() or entry.name in known:
+                continue
+            stem, ext = os.path.splitext(entry.name)
+            kind = MEDIA_KINDS.get(ext.lower())
+            parts = stem.rsplit("_", 2)
+            if kind is None or len(parts) != 3:
+                continue
+            try:
+                started_at = datetime.strptime(f"{parts[1]}_{parts[2]}", "%Y%m%d_%H%M%S").timestamp()
+            except ValueError:
+                continue
+            stat = entry.stat()
+            self.add(
+                parts[0],
+                kind,
+                entry.name,
+                started_at,
+                ended_at=stat.st_mtime if kind == "clip" else started_at,
+                size_bytes=stat.st_size,
+            )
+            added += 1
+        if added:
+            print(f"🗂️ [카탈로그] 기존 파일 {added}건 등록")
+        return added
@@ -0,0 +1,256 @@
+import os
+import shutil
+import threading
+import time
+
+
+class RetentionManager:
+    """
+    recordings/ 보관 정책 관리 (백그라운드 스레드).
+    - 카탈로그를 기준으로 나이/용량/개수 한도를 넘은 파일을 오래된 순으로 배치 삭제합니다.
+    - 한 번에 batch_size 건씩만 처리하고 배치 사이에 쉬어 디스크 I/O가 몰리지 않게 합니다.
+    - 카탈로그 행을 id 순으로 조금씩 훑어 이미 사라진 파일의 행을 정리합니다.
+    한도 값이 0이면 해당 정책은 사용하지 않습니다 (기본값은 모두 0: 켜야만 삭제).
+    - 디스크 여유 공간 하한(min_free_bytes)은 녹화가 아닌 파일이 디스크를 채운 경우에도 발동하므로,
+      부족분이 녹화 용량의 min_free_max_share 비율을 넘으면 녹화를 지우지 않고 경고만 남깁니다.
+    """
+
+    def __init__(
+        self,
+        catalog,
+        save_dir="recordings",
+        max_age_days=0,
+        max_total_bytes=0,
+        per_camera_max_bytes=0,
+        per_camera_max_count=0,
+        min_free_bytes=0,
+        min_free_max_share=0.5,
+        batch_size=200,
+        interval=60.0,
+        batch_pause=0.05,
+    ):
+        self.catalog = catalog
+        self.save_dir = save_dir
+        self.max_age_sec = float(max_age_days) * 86400
+        self.max_total_bytes = int(max_total_bytes)
+        self.per_camera_max_bytes = int(per_camera_max_bytes)
+        self.per_camera_max_count = int(per_camera_max_count)
+        self.min_free_bytes = int(min_free_bytes)
+        self.min_free_max_share = min(max(float(min_free_max_share), 0.0), 1.0)
+        self.batch_size = max(int(batch_size), 1)
+        self.interval = max(float(interval), 1.0)
+        self.batch_pause = float(batch_pause)
+        self.reclaimed_bytes = 0
+        self.deleted_files = 0
+        # 지우지 못한 파일 (권한/사용 중 등). 카탈로그 행은 남겨 다음 회차에 다시 시도
+        self.failed_files = 0
+        self.last_run = None
+        self.last_duration = 0.0
+        self.min_free_deleted_bytes = 0
+        self.min_free_refused = 0
+        self.last_min_free = None
+        self._reconcile_cursor = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _loop(self):
+        while not self._stop.is_set():
+            try:
+                self.run_once()
+            except Exception as e:
+                print(f"❌ [보관 정책 오류] {e}")
+            self._stop.wait(self.interval)
+
+    def run_once(self, now=None):
+        started = time.time()
+        now = now or started
+        freed = 0
+
+        # 1. 보관 기간 초과
+        if self.max_age_sec > 0:
+            freed += self._drain(lambda limit: self.catalog.oldest(before=now - self.max_age_sec, limit=limit))
+
+        # 2. 카메라별 용량/개수
+        if self.per_camera_max_bytes > 0 or self.per_camera_max_count > 0:
+            for cam_id, (size, count) in self.catalog.usage().items():
+                freed += self._trim(
+                    lambda limit, cam_id=cam_id: self.catalog.oldest(cam_id=cam_id, limit=limit),
+                    size - self.per_camera_max_bytes if self.per_camera_max_bytes > 0 else 0,
+                    count - self.per_camera_max_count if self.per_camera_max_count > 0 else 0,
+                )
+
+        # 3. 전체 용량
+        total = sum(size for size, _ in self.catalog.usage().values())
+        if self.max_total_bytes > 0 and total > self.max_total_bytes:
+            trimmed = self._trim(lambda limit: self.catalog.oldest(limit=limit), total - self.max_total_bytes, 0)
+            freed += trimmed
+            total -= trimmed
+
+        # 4. 디스크 여유 공간
+        if self.min_free_bytes > 0:
+            freed += self._ensure_free_space(total, now)
+
+        # 5. 사라진 파일의 카탈로그 행 정리 (매 회차 batch_size 행씩)
+        self._reconcile_step()
+
+        self.last_run = now
+        self.last_duration = time.time() - started
+        if freed:
+            print(f"🧹 [보관 정책] {freed / (1024 * 1024):.1f}MB 정리")
+        return freed
+
+    def _ensure_free_space(self, total, now):
+        """여유 공간 부족분만큼 오래된 녹화 삭제. 녹화로 메울 수 없는 부족분이면 지우지 않음"""
+        free = self._free_bytes()
+        shortfall = self.min_free_bytes - free
+        if shortfall <= 0:
+            return 0
+        limit = int(total * self.min_free_max_share)
+        mb = 1024 * 1024
+        if shortfall > limit:
+            self.min_free_refused += 1
+            self.last_min_free = {"ts": now, "shortfall": shortfall, "deleted": 0, "refused": True}
+            print(
+                f"🚨 [보관 정책] 디스크 여유 공간 부족 {shortfall / mb:.0f}MB"
+                f" (여유 {free / mb:.0f}MB < 하한 {self.min_free_bytes / mb:.0f}MB)."
+                f" 녹화 {total / mb:.0f}MB의 {self.min_free_max_share:.0%}로 메울 수 없어 삭제하지 않음"
+                f" - 녹화 외 파일을 확인하세요"
+            )
+            return 0
+        print(
+            f"🚨 [보관 정책] 디스크 여유 공간 부족 {shortfall / mb:.0f}MB"
+            f" (여유 {free / mb:.0f}MB < 하한 {self.min_free_bytes / mb:.0f}MB): 오래된 녹화 삭제"
+        )
+        freed = self._trim(lambda limit: self.catalog.oldest(limit=limit), shortfall, 0)
+        self.min_free_deleted_bytes += freed
+        self.last_min_free = {"ts": now, "shortfall": shortfall, "deleted": freed, "refused": False}
+        return freed
+
+    def _drain(self, fetch):
+        """
+        fetch(limit)가 빈 목록을 줄 때까지 배치 삭제.
+        이번 회차에 지우지 못한 행은 오래된 순 앞쪽에 계속 나오므로 그만큼 더 읽고 건너뜀
+        """
+        freed = 0
+        failed = set()
+        while not self._stop.is_set():
+            rows = [row for row in fetch(self.batch_size + len(failed)) if row["id"] not in failed]
+            if not rows:
+                break
+            batch_freed, _ = self._delete(rows, failed)
+            freed += batch_freed
+            time.sleep(self.batch_pause)
+        return freed
+
+    def _trim(self, fetch, excess_bytes, excess_count):
+        """초과 용량/개수만큼 오래된 순으로 삭제 (지우지 못한 행은 초과분에서 빼지 않고 건너뜀)"""
+        freed = 0
+        failed = set()
+        while (excess_bytes > 0 or excess_count > 0) and not self._stop.is_set():
+            rows = [row for row in fetch(self.batch_size + len(failed)) if row["id"] not in failed]
+            if not rows:
+                break
+            batch = []
+            for row in rows:
+                if excess_bytes <= 0 and excess_count <= 0:
+                    break
+                batch.append(row)
+                excess_bytes -= row["size_bytes"] or 0
+                excess_count -= 1
+            batch_freed, deleted = self._delete(batch, failed)
+            freed += batch_freed
+            excess_bytes += sum(row["size_bytes"] or 0 for row in batch) - batch_freed
+            excess_count += len(batch) - deleted
+            time.sleep(self.batch_pause)
+        return freed
+
+    def _delete(self, rows, failed):
+        """
+        -> (확보한 바이트, 삭제한 행 수). 파일을 지운(또는 이미 없는) 행만 카탈로그에서 제거하고,
+        지우지 못한 행 id는 failed에 모음 (카탈로그에 남겨 다음 회차에 다시 시도)
+        """
+        freed = 0
+        deleted = []
+        for row in rows:
+            if not self._remove_file(os.path.join(self.save_dir, row["filename"])):
+                self.failed_files += 1
+                failed.add(row["id"])
+                continue
+            if row.get("thumbnail"):
+                self._remove_file(os.path.join(self.save_dir, "thumbs", os.path.basename(row["thumbnail"])))
+            freed += row["size_bytes"] or 0
+            deleted.append(row["id"])
+        self.catalog.delete(deleted)
+        self.reclaimed_bytes += freed
+        self.deleted_files += len(deleted)
+        return freed, len(deleted)
+
+    def _remove_file(self, path):
+        """지웠거나 이미 없으면 True"""
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"⚠️ [보관 정책] 삭제 실패 {path}: {e}")
+            return False
+        return True
+
+    def _reconcile_step(self):
+        rows = self.catalog.after_id(self._reconcile_cursor, limit=self.batch_size)
+        if not rows:
+            self._reconcile_cursor = 0
+            return
+        self._reconcile_cursor = rows[-1]["id"]
+        missing = [
+            row["id"] for row in rows
+            if not os.path.exists(os.path.join(self.save_dir, row["filename"]))
+        ]
+        self.catalog.delete(missing)
+
+    def _free_bytes(self):
+        try:
+            return shutil.disk_usage(self.save_dir).free
+        except OSError:
+            return self.min_free_bytes
+
+    def stats(self):
+        usage = self.catalog.usage()
+        try:
+            disk = shutil.disk_usage(self.save_dir)
+            disk_info = {"total": disk.total, "used": disk.used, "free": disk.free}
+        except OSError:
+            disk_info = None
+        return {
+            "policy": {
+                "max_age_days": self.max_age_sec / 86400,
+                "max_total_bytes": self.max_total_bytes,
+                "per_camera_max_bytes": self.per_camera_max_bytes,
+                "per_camera_max_count": self.per_camera_max_count,
+                "min_free_bytes": self.min_free_bytes,
+                "min_free_max_share": self.min_free_max_share,
+            },
+            "min_free": {
+                "deleted_bytes": self.min_free_deleted_bytes,
+                "refused": self.min_free_refused,
+                "last": self.last_min_free,
+            },
+            "reclaimed_bytes": self.reclaimed_bytes,
+            "deleted_files": self.deleted_files,
+            "failed_files": self.failed_files,
+            "last_run": self.last_run,
+            "last_duration_sec": round(self.last_duration, 3),
+            "usage_bytes": sum(size for size, _ in usage.values()),
+            "cameras": {cam_id: {"bytes": size, "files": count} for cam_id, (size, count) in usage.items()},
+            "disk": disk_info,
+        }
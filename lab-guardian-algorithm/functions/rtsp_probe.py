@@ -0,0 +1,143 @@
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+# 프로브 1건 = 자식 프로세스 1개 (`python -m functions.rtsp_probe`)
+# - OpenCV FFmpeg 옵션은 프로세스 환경변수(OPENCV_FFMPEG_CAPTURE_OPTIONS)로만 전달되므로
+#   같은 프로세스의 스레드에서 UDP/TCP를 동시에 열면 옵션이 섞임 -> 프로세스로 분리
+# - 응답 없는 카메라에서 VideoCapture가 오래 멈춰도 제한 시간에 강제 종료 가능
+
+
+class RtspProber:
+    """
+    RTSP 연결 검사를 이벤트 루프 밖(전용 스레드 풀 + 자식 프로세스)에서 수행.
+    auto 모드는 UDP/TCP를 동시에 시도해 먼저 성공한 쪽을 사용하고 나머지는 중단합니다.
+    """
+
+    def __init__(self, max_workers=16, timeout=6.0):
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="rtsp-probe")
+        self._cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self._lock = threading.Lock()
+        self.in_flight = 0
+        self.probes = 0
+        self.successes = 0
+        self.failures = 0
+        self.timeouts = 0
+        self.cancelled = 0
+        self.total_sec = 0.0
+
+    def _count(self, field, elapsed=None):
+        with self._lock:
+            setattr(self, field, getattr(self, field) + 1)
+            if elapsed is not None:
+                self.total_sec += elapsed
+
+    def _probe_blocking(self, url, transport, cancel):
+        start = time.monotonic()
+        with self._lock:
+            self.in_flight += 1
+            self.probes += 1
+        proc = None
+        try:
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "functions.rtsp_probe"],
+                cwd=self._cwd,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,
+            )
+            # 주소(계정 포함)는 인자 대신 stdin으로 전달
+            proc.stdin.write(json.dumps({"url": url, "transport": transport}).encode("utf-8"))
+            proc.stdin.close()
+            deadline = start + self.timeout
+            while True:
+                try:
+                    proc.wait(timeout=0.05)
+                    break
+                except subprocess.TimeoutExpired:
+                    if cancel.is_set():
+                        proc.kill()
+                        self._count("cancelled")
+                        return False
+                    if time.monotonic() >= deadline:
+                        proc.kill()
+                        self._count("timeouts", time.monotonic() - start)
+                        return False
+            ok = proc.returncode == 0 and proc.stdout.read().strip() == b"ok"
+            self._count("successes" if ok else "failures", time.monotonic() - start)
+            return ok
+        except OSError:
+            self._count("failures", time.monotonic() - start)
+            return False
+        finally:
+            if proc is not None:
+                if proc.poll() is None:
+                    proc.kill()
+                proc.wait()
+                proc.stdout.close()
+            with self._lock:
+                self.in_flight -= 1
+
+    async def probe(self, url, transport):
+        """성공한 전송 방식("udp"/"tcp")을 돌려줌, 모두 실패하면 None"""
+        order = ["udp", "tcp"] if transport == "auto" else [transport]
+        loop = asyncio.get_running_loop()
+        cancel = threading.Event()
+        pending = {
+            loop.run_in_executor(self.executor, self._probe_blocking, url, candidate, cancel): candidate
+            for candidate in order
+        }
+        try:
+            while pending:
+                done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for fut in done:
+                    candidate = pending.pop(fut)
+                    if fut.result():
+                        return candidate
+            return None
+        finally:
+            # 먼저 성공한 쪽이 있으면(또는 요청이 취소되면) 남은 시도는 중단
+            cancel.set()
+
+    def close(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self):
+        with self._lock:
+            finished = self.successes + self.failures + self.timeouts
+            return {
+                "timeout_sec": self.timeout,
+                "in_flight": self.in_flight,
+                "probes": self.probes,
+                "successes": self.successes,
+                "failures": self.failures,
+                "timeouts": self.timeouts,
+                "cancelled": self.cancelled,
+                "avg_sec": round(self.total_sec / finished, 3) if finished else None,
+            }
+
+
+def _child_main():
+    from functions.capture_process import open_rtsp_capture
+
+    config = json.loads(sys.stdin.buffer.read())
+    cap = open_rtsp_capture(config["url"], config["transport"])
+    try:
+        ok = cap.isOpened()
+        if ok:
+            ok, frame = cap.read()
+            ok = bool(ok and frame is not None)
+    finally:
+        cap.release()
+    sys.stdout.write("ok" if ok else "fail")
+    sys.stdout.flush()
+
+
+if __name__ == "__main__":
+    _child_main()
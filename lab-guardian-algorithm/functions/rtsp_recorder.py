@@ -0,0 +1,408 @@
+import json
+import os
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from datetime import datetime
+
+from functions import pyav_capture
+from functions.rtsp_segmenter import SEGMENT_PREFIX, SEGMENT_TIME_FORMAT
+
+av = pyav_capture.av
+CLIP_TIME_FORMAT = "%Y%m%d_%H%M%S"
+
+
+class _SegmentSource:
+    """카메라 1대의 세그먼트 프로세스 상태"""
+
+    def __init__(self, cam_id, url, transport, segment_dir):
+        self.cam_id = cam_id
+        self.url = url
+        self.transport = transport
+        self.segment_dir = segment_dir
+        self.proc = None
+        self.restarts = 0
+        self.next_start = 0.0
+        self.backoff = 1.0
+        # 예약된 클립 [{ "start", "end", "event_time", "timestamp", "detections" }]
+        self.pending = []
+        self.saved = 0
+
+
+class RtspSegmentRecorder:
+    """
+    RTSP 카메라 패스스루 녹화.
+    - 세그먼트 프로세스(functions.rtsp_segmenter, PyAV)가 카메라의 H.264/H.265 패킷을
+      디코딩 없이 짧은 TS 세그먼트로 계속 잘라 둡니다.
+      RTSP 주소(계정 정보 포함)는 명령줄이 아닌 stdin으로 넘겨 ps//proc/*/cmdline에 보이지 않게 합니다.
+    - 클립 이어 붙이기/썸네일은 ffmpeg (로컬 파일 경로만 인자로 전달)
+    - 스트림 복사 세그먼트는 키프레임에서만 끊기므로, 경보 시각 전후 세그먼트를 이어 붙이면
+      재인코딩 없이 키프레임 경계의 MP4 클립이 됩니다 (녹화당 CPU 비용은 거의 0).
+    """
+
+    def __init__(
+        self,
+        save_dir="recordings",
+        segment_dir="rtsp_segments",
+        segment_sec=2.0,
+        keep_sec=30.0,
+        max_clip_sec=60.0,
+        ffmpeg_bin="ffmpeg",
+        on_video_saved=None,
+        catalog=None,
+        thumb_width=320,
+    ):
+        self.save_dir = save_dir
+        self.segment_dir = segment_dir
+        self.segment_sec = max(float(segment_sec), 1.0)
+        self.keep_sec = max(float(keep_sec), self.segment_sec * 3)
+        self.max_clip_sec = float(max_clip_sec)
+        self.ffmpeg_bin = shutil.which(ffmpeg_bin)
+        self.on_video_saved = on_video_saved
+        # 녹화 색인 (RecordingCatalog, 없으면 기록하지 않음)
+        self.catalog = catalog
+        self.thumb_dir = os.path.join(self.save_dir, "thumbs")
+        self.thumb_width = int(thumb_width)
+        self._cwd = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        self.sources = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        os.makedirs(self.save_dir, exist_ok=True)
+        os.makedirs(self.segment_dir, exist_ok=True)
+        os.makedirs(self.thumb_dir, exist_ok=True)
+        if not self.ffmpeg_bin:
+            print("⚠️ [RTSP 녹화] ffmpeg를 찾을 수 없어 패스스루 녹화를 사용하지 않습니다.")
+        elif not pyav_capture.available():
+            print("⚠️ [RTSP 녹화] PyAV(av)가 없어 패스스루 녹화를 사용하지 않습니다.")
+
+    @property
+    def available(self):
+        return self.ffmpeg_bin is not None and pyav_capture.available()
+
+    def is_active(self, cam_id):
+        return cam_id in self.sources
+
+    def start(self, cam_id, url, transport="tcp"):
+        """카메라 세그먼트 녹화 시작 (이미 실행 중이면 무시)"""
+        if not self.available:
+            return False
+        with self._lock:
+            if cam_id in self.sources:
+                return True
+            segment_dir = os.path.join(self.segment_dir, cam_id)
+            os.makedirs(segment_dir, exist_ok=True)
+            self.sources[cam_id] = _SegmentSource(
+                cam_id, url, transport if transport in ("tcp", "udp") else "tcp", segment_dir
+            )
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._supervisor_loop, daemon=True)
+                self._thread.start()
+        print(f"🎞️ [RTSP 녹화 대기] {cam_id} (세그먼트 {self.segment_sec:.0f}초)")
+        return True
+
+    def stop(self, cam_id):
+        with self._lock:
+            src = self.sources.pop(cam_id, None)
+        if src is None:
+            return
+        # 세그먼트 프로세스 종료/클립 생성은 호출자(이벤트 루프)를 막지 않도록 별도 스레드에서 처리
+        threading.Thread(target=self._finalize, args=(src,), daemon=True).start()
+
+    def _finalize(self, src):
+        try:
+            self._terminate(src)
+            # 마무리되지 않은 클립은 남아 있는 세그먼트로 바로 저장
+            for clip in src.pending:
+                self._cut_clip(src, clip)
+        finally:
+            shutil.rmtree(src.segment_dir, ignore_errors=True)
+
+    def record_event(self, cam_id, event_time, pre_sec=3.0, post_sec=10.0):
+        """경보 시각 전후 구간 클립 예약. 아직 잘리지 않은 클립이 있으면 종료 시각만 연장"""
+        with self._lock:
+            src = self.sources.get(cam_id)
+            if src is None:
+                return False
+            if src.pending:
+                self._extend_clip(src.pending[-1], event_time + post_sec)
+                return True
+            print(f"🎥 [RTSP 녹화 시작] {cam_id} (-{pre_sec:.0f}s ~ +{post_sec:.0f}s, 스트림 복사)")
+            src.pending.append({
+                "start": event_time - pre_sec,
+                "end": event_time + post_sec,
+                "event_time": event_time,
+                "timestamp": datetime.fromtimestamp(event_time).strftime(CLIP_TIME_FORMAT),
+                "detections": 1,
+            })
+            return True
+
+    def extend(self, cam_id, current_time, post_sec=10.0):
+        with self._lock:
+            src = self.sources.get(cam_id)
+            if src is not None and src.pending:
+                self._extend_clip(src.pending[-1], current_time + post_sec)
+
+    def _extend_clip(self, clip, end_time):
+        clip["detections"] += 1
+        clip["end"] = min(max(clip["end"], end_time), clip["start"] + self.max_clip_sec)
+
+    def _spawn(self, src):
+        src.proc = subprocess.Popen(
+            [sys.executable, "-m", "functions.rtsp_segmenter"],
+            cwd=self._cwd,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        config = {
+            "url": src.url,
+            "transport": src.transport,
+            "dir": os.path.abspath(src.segment_dir),
+            "segment_sec": self.segment_sec,
+        }
+        try:
+            src.proc.stdin.write(json.dumps(config).encode("utf-8") + b"\n")
+            src.proc.stdin.flush()
+        except OSError:
+            pass
+
+    def _terminate(self, src):
+        proc, src.proc = src.proc, None
+        if proc is None:
+            return
+        # stdin을 닫으면 자식이 현재 세그먼트를 닫고 종료. 응답이 없으면 강제 종료
+        try:
+            proc.stdin.close()
+        except OSError:
+            pass
+        if proc.poll() is not None:
+            return
+        try:
+            proc.wait(timeout=3)
+        except subprocess.TimeoutExpired:
+            proc.terminate()
+            try:
+                proc.wait(timeout=3)
+            except subprocess.TimeoutExpired:
+                proc.kill()
+
+    def _list_segments(self, src):
+        """[(start_ts, path)] 시작 시각 순"""
+        segments = []
+        try:
+            entries = list(os.scandir(src.segment_dir))
+        except FileNotFoundError:
+            return segments
+        for entry in entries:
+            name = entry.name
+            if not name.startswith(SEGMENT_PREFIX) or not name.endswith(".ts"):
+                continue
+            try:
+                start = datetime.strptime(name[len(SEGMENT_PREFIX):-3], SEGMENT_TIME_FORMAT).timestamp()
+            except ValueError:
+                continue
+            segments.append((start, entry.path))
+        segments.sort()
+        return segments
+
+    def frame_at(self, cam_id, ts, max_skew=2.0):
+        """
+        이미 받아 둔 세그먼트에서 ts에 가장 가까운 프레임 -> (BGR 프레임, 프레임 시각).
+        ts를 담은 세그먼트의 첫 키프레임부터 ts까지만 디코딩. 없거나 max_skew보다 멀면 (None, None)
+        """
+        with self._lock:
+            src = self.sources.get(cam_id)
+        if src is None:
+            return None, None
+        segments = self._list_segments(src)
+        if not segments:
+            return None, None
+        # ts를 담은 세그먼트 = ts 이전에 시작한 마지막 세그먼트 (ts가 더 이르면 첫 세그먼트, 차이는 max_skew로 판단)
+        before = [segment for segment in segments if segment[0] <= ts]
+        start, path = before[-1] if before else segments[0]
+        best, best_ts = None, None
+        try:
+            with av.open(path) as container:
+                first = None
+                for frame in container.decode(container.streams.video[0]):
+                    if frame.time is None:
+                        continue
+                    first = frame.time if first is None else first
+                    frame_ts = start + frame.time - first
+                    if best is None or abs(frame_ts - ts) < abs(best_ts - ts):
+                        best, best_ts = frame, frame_ts
+                    if frame_ts >= ts:
+                        break
+        except (av.FFmpegError, OSError):
+            # 기록 중인 세그먼트는 끝부분이 잘려 있을 수 있음: 그때까지 디코딩한 프레임 중에서 고름
+            pass
+        if best is None or abs(best_ts - ts) > max_skew:
+            return None, None
+        return best.to_ndarray(format="bgr24"), best_ts
+
+    def _supervisor_loop(self):
+        while True:
+            with self._lock:
+                sources = list(self.sources.values())
+            if not sources:
+                time.sleep(1.0)
+                continue
+            now = time.time()
+            for src in sources:
+                try:
+                    self._supervise(src, now)
+                except Exception as e:
+                    print(f"❌ [RTSP 녹화 오류] {src.cam_id}: {e}")
+            time.sleep(0.5)
+
+    def _supervise(self, src, now):
+        # 1. 세그먼트 프로세스 유지 (종료되면 백오프 후 재시작)
+        if src.proc is None or src.proc.poll() is not None:
+            if src.proc is not None:
+                self._terminate(src)
+                src.restarts += 1
+                src.next_start = now + src.backoff
+                src.backoff = min(src.backoff * 2, 30.0)
+            with self._lock:
+                if now >= src.next_start and self.sources.get(src.cam_id) is src:
+                    self._spawn(src)
+        else:
+            src.backoff = 1.0
+
+        segments = self._list_segments(src)
+
+        # 2. 종료 구간 이후 세그먼트가 생기면(=마지막 세그먼트가 닫힘) 클립 생성
+        #    스트림이 끊겨 새 세그먼트가 오지 않으면 일정 시간 후 있는 만큼 저장
+        with self._lock:
+            ready = [
+                clip for clip in src.pending
+                if (segments and segments[-1][0] > clip["end"])
+                or now > clip["end"] + self.segment_sec * 5
+            ]
+            for clip in ready:
+                src.pending.remove(clip)
+        for clip in ready:
+            self._cut_clip(src, clip, segments)
+
+        # 3. 예약 클립에 필요한 구간을 제외하고 오래된 세그먼트 삭제
+        horizon = now - self.keep_sec
+        with self._lock:
+            for clip in src.pending:
+                horizon = min(horizon, clip["start"] - self.segment_sec)
+        for start, path in segments[:-1]:
+            if start < horizon:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+
+    def _cut_clip(self, src, clip, segments=None):
+        if segments is None:
+            segments = self._list_segments(src)
+        # 키프레임 경계: 시작 시각 직전에 열린 세그먼트부터 종료 시각을 덮는 세그먼트까지
+        selected = []
+        for i, (start, path) in enumerate(segments):
+            next_start = segments[i + 1][0] if i + 1 < len(segments) else float("inf")
+            if next_start > clip["start"] and start <= clip["end"]:
+                selected.append(path)
+        if not selected:
+            print(f"⚠️ [RTSP 녹화] {src.cam_id} 구간 세그먼트 없음")
+            return
+        filename = os.path.join(self.save_dir, f"{src.cam_id}_{clip['timestamp']}.mp4")
+        list_path = os.path.join(src.segment_dir, f"concat_{clip['timestamp']}.txt")
+        with open(list_path, "w", encoding="utf-8") as f:
+            for path in selected:
+                f.write(f"file '{os.path.abspath(path)}'\n")
+        cmd = [
+            self.ffmpeg_bin,
+            "-hide_banner",
+            "-loglevel", "error",
+            "-y",
+            "-f", "concat",
+            "-safe", "0",
+            "-i", list_path,
+            "-c", "copy",
+            "-movflags", "+faststart",
+            filename,
+        ]
+        try:
+            result = subprocess.run(cmd, capture_output=True, check=False, timeout=60)
+        except (subprocess.TimeoutExpired, OSError) as e:
+            print(f"❌ [RTSP 저장 실패] {src.cam_id}: {e}")
+            # 시간 초과로 끊긴 ffmpeg가 남긴 불완전한 파일 제거
+            try:
+                os.remove(filename)
+            except OSError:
+                pass
+            return
+        finally:
+            try:
+                os.remove(list_path)
+            except OSError:
+                pass
+        if result.returncode != 0:
+            print(f"❌ [RTSP 저장 실패] {src.cam_id}: {result.stderr.decode(errors='ignore').strip()}")
+            return
+        src.saved += 1
+        print(f"💾 [RTSP 저장 완료] {filename} ({len(selected)} segments, 스트림 복사)")
+        self._catalog_clip(src, clip, filename)
+        if self.on_video_saved:
+            self.on_video_saved(src.cam_id, filename)
+
+    def _catalog_clip(self, src, clip, filename):
+        if self.catalog is None:
+            return
+        name = os.path.basename(filename)
+        stem = os.path.splitext(name)[0]
+        # 썸네일은 첫 키프레임 1장만 디코딩
+        thumb_path = os.path.join(self.thumb_dir, f"{stem}.jpg")
+        try:
+            result = subprocess.run(
+                [
+                    self.ffmpeg_bin, "-hide_banner", "-loglevel", "error", "-y",
+                    "-i", filename, "-frames:v", "1", "-vf", f"scale={self.thumb_width}:-2", thumb_path,
+                ],
+                capture_output=True,
+                check=False,
+                timeout=30,
+            )
+            ok = result.returncode == 0
+        except (subprocess.TimeoutExpired, OSError) as e:
+            # 썸네일 없이도 클립은 카탈로그에 등록
+            print(f"⚠️ [RTSP 썸네일 실패] {src.cam_id}: {e}")
+            ok = False
+        thumbnail = f"/recordings/thumbs/{stem}.jpg" if ok else None
+        self.catalog.add(
+            src.cam_id,
+            "clip",
+            name,
+            clip["event_time"],
+            ended_at=clip["end"],
+            size_bytes=os.path.getsize(filename),
+            detection_count=clip["detections"],
+            thumbnail=thumbnail,
+        )
+
+    def stats(self):
+        with self._lock:
+            sources = list(self.sources.values())
+        cameras = {}
+        for src in sources:
+            segments = self._list_segments(src)
+            size = 0
+            for _, path in segments:
+                try:
+                    size += os.path.getsize(path)
+                except OSError:
+                    pass
+            cameras[src.cam_id] = {
+                "running": src.proc is not None and src.proc.poll() is None,
+                "restarts": src.restarts,
+                "segments": len(segments),
+                "segment_bytes": size,
+                "pending_clips": len(src.pending),
+                "saved_clips": src.saved,
+            }
+        return {"available": self.available, "segment_sec": self.segment_sec, "cameras": cameras}
@@ -0,0 +1,91 @@
+import json
+import os
+import sys
+import threading
+from datetime import datetime
+
+from functions import pyav_capture
+
+av = pyav_capture.av
+
+SEGMENT_PREFIX = "seg_"
+# 세그먼트 시작 시각(마이크로초까지): 경보 시각에 맞는 프레임을 세그먼트 안에서 찾을 때 기준
+SEGMENT_TIME_FORMAT = "%Y%m%d_%H%M%S_%f"
+_OPEN_TIMEOUT_SEC = float(os.getenv("RTSP_OPEN_TIMEOUT_SEC", "5"))
+
+
+def _open_segment(path, in_stream):
+    out = av.open(path, mode="w", format="mpegts")
+    add = getattr(out, "add_stream_from_template", None)
+    out_stream = add(in_stream) if add is not None else out.add_stream(template=in_stream)
+    return out, out_stream
+
+
+def segment_main(url, transport, segment_dir, segment_sec, stop_event):
+    """
+    카메라 영상 패킷을 디코딩 없이 TS 세그먼트로 복사 (ffmpeg -c copy -f segment와 같은 결과).
+    - 세그먼트는 segment_sec가 지난 뒤 첫 키프레임에서 끊고, 파일 이름은 세그먼트를 연 시각(첫 패킷 수신 시각)
+    - 세그먼트마다 타임스탬프를 0부터 다시 시작 (-reset_timestamps 1)
+    """
+    options = {}
+    if url.startswith(("rtsp://", "rtsps://")):
+        options = {"rtsp_transport": "udp" if transport == "udp" else "tcp"}
+    container = av.open(url, options=options, timeout=(_OPEN_TIMEOUT_SEC, _OPEN_TIMEOUT_SEC))
+    out = None
+    try:
+        in_stream = container.streams.video[0]
+        out_stream = None
+        base = None
+        for packet in container.demux(in_stream):
+            if stop_event.is_set():
+                break
+            if packet.dts is None:
+                continue
+            elapsed = (packet.dts - base) * in_stream.time_base if base is not None else 0
+            if packet.is_keyframe and (out is None or elapsed >= segment_sec):
+                if out is not None:
+                    out.close()
+                path = os.path.join(segment_dir, f"{SEGMENT_PREFIX}{datetime.now().strftime(SEGMENT_TIME_FORMAT)}.ts")
+                out, out_stream = _open_segment(path, in_stream)
+                base = packet.dts
+            if out is None:
+                # 첫 키프레임 전 패킷은 버림 (세그먼트가 키프레임으로 시작해야 단독 재생/이어 붙이기 가능)
+                continue
+            packet.dts -= base
+            if packet.pts is not None:
+                packet.pts -= base
+            packet.stream = out_stream
+            out.mux(packet)
+    finally:
+        if out is not None:
+            out.close()
+        container.close()
+
+
+def _watch_stdin(stop_event):
+    # 부모가 stdin을 닫거나(정상 종료) 부모 프로세스가 사라지면 EOF -> 종료
+    try:
+        for _ in sys.stdin.buffer:
+            pass
+    finally:
+        stop_event.set()
+
+
+def _child_main():
+    # 설정은 인자 대신 stdin 첫 줄(JSON)로 받음: RTSP 주소의 계정 정보가 프로세스 목록에 보이지 않게
+    config = json.loads(sys.stdin.buffer.readline())
+    stop_event = threading.Event()
+    threading.Thread(target=_watch_stdin, args=(stop_event,), daemon=True).start()
+    code = 0
+    try:
+        segment_main(config["url"], config["transport"], config["dir"], config["segment_sec"], stop_event)
+    except (av.FFmpegError, IndexError, OSError) as e:
+        print(f"❌ [RTSP 세그먼트] {e}", file=sys.stderr)
+        code = 1
+    # stdin 감시 스레드가 읽기 중이라 일반 종료(sys.exit)는 인터프리터 정리 단계에서 멈출 수 있음
+    sys.stderr.flush()
+    os._exit(code)
+
+
+if __name__ == "__main__":
+    _child_main()
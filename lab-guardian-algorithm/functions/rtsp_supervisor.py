@@ -0,0 +1,213 @@
+import random
+import threading
+import time
+
+CONNECTING = "CONNECTING"
+LIVE = "LIVE"
+DEGRADED = "DEGRADED"
+DOWN = "DOWN"
+
+
+class SourceHealth:
+    __slots__ = (
+        "cam_id", "state", "failures", "next_attempt", "connecting", "since",
+        "connected_at", "last_frame", "last_error", "attempts", "transitions",
+    )
+
+    def __init__(self, cam_id, now):
+        self.cam_id = cam_id
+        self.state = CONNECTING
+        self.failures = 0          # 연속 연결 실패 횟수 (성공하면 0)
+        self.next_attempt = 0.0    # 백오프가 끝나는 시각
+        self.connecting = False    # 재연결 슬롯을 잡고 연결 시도 중
+        self.since = now
+        self.connected_at = 0.0
+        self.last_frame = 0.0
+        self.last_error = None
+        self.attempts = 0
+        self.transitions = 0
+
+
+class RtspSupervisor:
+    """
+    RTSP 소스 연결 상태 관리 (CONNECTING -> LIVE <-> DEGRADED -> DOWN,
+    DEGRADED/DOWN에서 재연결 시도를 시작하면 다시 CONNECTING).
+    - 연결 시도는 try_begin()으로 허가를 받아야 함: 백오프(지수 + full jitter)가 끝났고
+      노드 전체 동시 재연결 수(max_concurrent)에 여유가 있을 때만 True
+    - 시도 결과는 end()로, 프레임 수신/끊김은 frame()/lost()/stalled()로 알림
+    - 연결 후 stable_sec 안에 끊기면 실패로 셈 (연결됐다 바로 끊기는 카메라도 백오프 후 DOWN)
+    - 상태가 바뀌면 on_transition(cam_id, prev, state, info) 호출 (게이트웨이 보고 등)
+    """
+
+    def __init__(
+        self,
+        max_concurrent=4,
+        backoff_base=1.0,
+        backoff_max=60.0,
+        down_after=3,
+        stable_sec=10.0,
+        on_transition=None,
+    ):
+        self.max_concurrent = max(int(max_concurrent), 1)
+        self.backoff_base = float(backoff_base)
+        self.backoff_max = float(backoff_max)
+        self.down_after = max(int(down_after), 1)
+        self.stable_sec = float(stable_sec)
+        self.on_transition = on_transition
+        self._sources = {}
+        self._lock = threading.Lock()
+        self.connecting = 0
+        self.deferred = 0  # 동시 재연결 상한 때문에 미뤄진 시도 수
+
+    def _health(self, cam_id, now):
+        health = self._sources.get(cam_id)
+        if health is None:
+            health = self._sources[cam_id] = SourceHealth(cam_id, now)
+        return health
+
+    def _backoff(self, failures):
+        # full jitter: 0 ~ base * 2^failures (상한 backoff_max)
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * (2 ** min(failures, 16))))
+
+    def _set_state(self, health, state, now):
+        """잠금 안에서 호출. 바뀌었으면 콜백에 넘길 정보를 돌려줌"""
+        if health.state == state:
+            return None
+        prev, health.state, health.since = health.state, state, now
+        health.transitions += 1
+        return (health.cam_id, prev, state, {
+            "failures": health.failures,
+            "retry_in": round(max(health.next_attempt - now, 0.0), 1),
+            "error": health.last_error,
+        })
+
+    def _fail(self, health, error, now):
+        health.failures += 1
+        health.last_error = error
+        health.next_attempt = now + self._backoff(health.failures)
+        if health.failures >= self.down_after:
+            return self._set_state(health, DOWN, now)
+        # 한 번이라도 연결됐던 소스의 재연결 실패는 DEGRADED로 (처음 연결 중인 소스는 CONNECTING 유지)
+        if health.state == LIVE or (health.state == CONNECTING and health.connected_at):
+            return self._set_state(health, DEGRADED, now)
+        return None
+
+    def _notify(self, change):
+        if change and self.on_transition:
+            try:
+                self.on_transition(*change)
+            except Exception as e:
+                print(f"⚠️ [RTSP 감독] 상태 알림 실패: {e}")
+
+    def try_begin(self, cam_id, now=None):
+        """재연결 허가: 백오프가 지났고 동시 재연결 슬롯이 있으면 슬롯을 잡고 True"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            health = self._health(cam_id, now)
+            if health.connecting or now < health.next_attempt:
+                return False
+            if self.connecting >= self.max_concurrent:
+                self.deferred += 1
+                return False
+            health.connecting = True
+            health.attempts += 1
+            self.connecting += 1
+            # 끊겼던 소스의 재연결 시작을 알림 (결과는 end()에서 LIVE/DEGRADED/DOWN)
+            change = self._set_state(health, CONNECTING, now) if health.state in (DEGRADED, DOWN) else None
+        self._notify(change)
+        return True
+
+    def end(self, cam_id, ok, error=None, now=None):
+        """연결 시도 결과. 실패하면 백오프를 늘리고 down_after번 연속 실패 시 DOWN"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            health = self._sources.get(cam_id)
+            if health is None:  # 시도 중에 카메라가 해제됨
+                return
+            if health.connecting:
+                health.connecting = False
+                self.connecting -= 1
+            if ok:
+                # 연속 실패 수는 연결이 stable_sec 동안 유지된 뒤 frame()에서 초기화
+                health.next_attempt = 0.0
+                health.connected_at = health.last_frame = now
+                change = self._set_state(health, LIVE, now)
+            else:
+                change = self._fail(health, error, now)
+        self._notify(change)
+
+    def frame(self, cam_id, now=None):
+        now = now if now is not None else time.time()
+        with self._lock:
+            health = self._sources.get(cam_id)
+            if health is None:
+                return
+            health.last_frame = now
+            if health.failures and now - health.connected_at >= self.stable_sec:
+                health.failures = 0
+                health.last_error = None
+            change = self._set_state(health, LIVE, now) if health.state == DEGRADED else None
+        self._notify(change)
+
+    def lost(self, cam_id, error=None, now=None):
+        """LIVE였던 연결이 끊김 -> DEGRADED (바로 재연결 가능). 연결 직후 끊기면 실패로 세어 백오프"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            health = self._sources.get(cam_id)
+            if health is None or health.state != LIVE:
+                return
+            if now - health.connected_at < self.stable_sec:
+                change = self._fail(health, error, now)
+            else:
+                health.last_error = error
+                change = self._set_state(health, DEGRADED, now)
+        self._notify(change)
+
+    def stalled(self, cam_id, stall_sec, now=None):
+        """연결은 살아 있지만 stall_sec 동안 새 프레임이 없으면 DEGRADED"""
+        now = now if now is not None else time.time()
+        with self._lock:
+            health = self._sources.get(cam_id)
+            if health is None or health.state != LIVE or now - health.last_frame < stall_sec:
+                return
+            health.last_error = "frame stall"
+            change = self._set_state(health, DEGRADED, now)
+        self._notify(change)
+
+    def state(self, cam_id):
+        health = self._sources.get(cam_id)
+        return health.state if health is not None else None
+
+    def remove(self, cam_id):
+        with self._lock:
+            health = self._sources.pop(cam_id, None)
+            if health is not None and health.connecting:
+                self.connecting -= 1
+
+    def stats(self, now=None):
+        now = now if now is not None else time.time()
+        with self._lock:
+            sources = {
+                cam_id: {
+                    "state": h.state,
+                    "since_sec": round(now - h.since, 1),
+                    "failures": h.failures,
+                    "retry_in": round(max(h.next_attempt - now, 0.0), 1),
+                    "connecting": h.connecting,
+                    "attempts": h.attempts,
+                    "transitions": h.transitions,
+                    "last_error": h.last_error,
+                }
+                for cam_id, h in self._sources.items()
+            }
+            counts = {CONNECTING: 0, LIVE: 0, DEGRADED: 0, DOWN: 0}
+            for info in sources.values():
+                counts[info["state"]] += 1
+            return {
+                "max_concurrent": self.max_concurrent,
+                "connecting": self.connecting,
+                "deferred": self.deferred,
+                "backoff": [self.backoff_base, self.backoff_max],
+                "states": counts,
+                "sources": sources,
+            }
@@ -0,0 +1,138 @@
+import bisect
+import hashlib
+import threading
+import time
+
+import requests
+
+
+def _hash(key):
+    return int.from_bytes(hashlib.md5(key.encode("utf-8")).digest()[:8], "big")
+
+
+class HashRing:
+    """
+    cam_id -> 노드 일관 해싱 링 (노드당 가상 노드 vnodes개).
+    노드가 들어오거나 빠질 때 그 노드 몫의 카메라만 옮겨 감 (나머지 카메라의 담당 노드는 그대로)
+    """
+
+    def __init__(self, nodes=None, vnodes=64):
+        self.vnodes = max(int(vnodes), 1)
+        self.nodes = dict(nodes or {})  # { node_id: url }
+        points = []
+        for node_id in self.nodes:
+            for i in range(self.vnodes):
+                points.append((_hash(f"{node_id}#{i}"), node_id))
+        points.sort()
+        self._keys = [p[0] for p in points]
+        self._owners = [p[1] for p in points]
+
+    def owner(self, cam_id):
+        if not self._keys:
+            return None
+        index = bisect.bisect(self._keys, _hash(cam_id)) % len(self._keys)
+        return self._owners[index]
+
+    def url(self, node_id):
+        return self.nodes.get(node_id)
+
+    def moved(self, other, cam_ids):
+        """다른 링으로 바뀌었을 때 담당 노드가 달라지는 카메라 {cam_id: (기존, 새 노드)}"""
+        result = {}
+        for cam_id in cam_ids:
+            before, after = self.owner(cam_id), other.owner(cam_id)
+            if before != after:
+                result[cam_id] = (before, after)
+        return result
+
+
+class ShardMembership:
+    """
+    레지스트리 서비스에 하트비트를 보내고 살아 있는 노드 목록으로 링을 유지.
+    - 레지스트리가 응답하지 않으면 마지막 링을 그대로 사용 (처음부터 닿지 않으면 자기 자신만)
+    - 레지스트리 API: POST /nodes/heartbeat {node_id, url} -> {version, nodes}, DELETE /nodes/{node_id}
+      (로컬 대역: bench/shard_registry_stub.py)
+    """
+
+    def __init__(self, registry_url, node_id, advertise_url, vnodes=64, timeout=2.0):
+        self.registry_url = registry_url.rstrip("/")
+        self.node_id = node_id
+        self.advertise_url = advertise_url.rstrip("/")
+        self.vnodes = vnodes
+        self.timeout = timeout
+        self.session = requests.Session()
+        self.ring = HashRing({node_id: self.advertise_url}, vnodes)
+        self.version = None
+        self.left = False
+        self._lock = threading.Lock()
+        self.heartbeats = 0
+        self.failures = 0
+        self.last_ok = 0.0
+        self.rebalances = 0
+
+    def heartbeat(self):
+        """하트비트 1회. 노드 구성이 바뀌었으면 (기존 링, 새 링)을, 아니면 None을 돌려줌"""
+        if self.left:
+            return None
+        try:
+            resp = self.session.post(
+                f"{self.registry_url}/nodes/heartbeat",
+                json={"node_id": self.node_id, "url": self.advertise_url},
+                timeout=self.timeout,
+            )
+            resp.raise_for_status()
+            body = resp.json()
+        except (requests.RequestException, ValueError):
+            self.failures += 1
+            return None
+        self.heartbeats += 1
+        self.last_ok = time.time()
+        nodes = dict(body.get("nodes") or {})
+        nodes[self.node_id] = self.advertise_url
+        with self._lock:
+            if nodes == self.ring.nodes:
+                self.version = body.get("version")
+                return None
+            old = self.ring
+            self.ring = HashRing(nodes, self.vnodes)
+            self.version = body.get("version")
+            self.rebalances += 1
+            return old, self.ring
+
+    def leave(self):
+        """정상 종료: 레지스트리에서 빠지고 자기 자신을 뺀 링으로 전환 (기존 링, 새 링)"""
+        self.left = True
+        try:
+            self.session.delete(f"{self.registry_url}/nodes/{self.node_id}", timeout=self.timeout)
+        except requests.RequestException:
+            pass
+        with self._lock:
+            old = self.ring
+            nodes = {k: v for k, v in old.nodes.items() if k != self.node_id}
+            self.ring = HashRing(nodes, self.vnodes)
+            return old, self.ring
+
+    def owner(self, cam_id):
+        """(담당 노드 id, 주소). 자기 자신밖에 없으면 자기 자신"""
+        ring = self.ring
+        node_id = ring.owner(cam_id)
+        return node_id, ring.url(node_id)
+
+    def is_local(self, cam_id):
+        return self.ring.owner(cam_id) in (None, self.node_id)
+
+    def stats(self):
+        ring = self.ring
+        return {
+            "node_id": self.node_id,
+            "url": self.advertise_url,
+            "registry": self.registry_url,
+            "version": self.version,
+            "nodes": ring.nodes,
+            "vnodes": self.vnodes,
+            "heartbeats": self.heartbeats,
+            "failures": self.failures,
+            "last_ok_age_sec": round(time.time() - self.last_ok, 1) if self.last_ok else None,
+            "rebalances": self.rebalances,
+            "left": self.left,
+        }
@@ -1,13 +1,18 @@
-import time, socket, cv2, numpy as np
+import time, cv2, numpy as np
 import logging
 import torch
 import psutil
 import uvicorn, os, asyncio, sys
+import socket
 import subprocess
+import threading
+import hmac
+from datetime import datetime
+from urllib.parse import urlencode
 from functools import wraps
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, HTTPException, Request
-from fastapi.responses import StreamingResponse
+from fastapi.responses import FileResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from fastapi.middleware.cors import CORSMiddleware 
 from fastapi.staticfiles import StaticFiles 
 from dotenv import load_dotenv # 환경변수 로드
@@ -16,6 +21,26 @@ from dotenv import load_dotenv # 환경변수 로드
 from functions.ai_detector import AIDetector
 from functions.notifier import TelegramNotifier
 from functions.recorder import VideoRecorder
+from functions.preroll import PrerollBuffer
+from functions.rtsp_recorder import RtspSegmentRecorder
+from functions.recording_catalog import RecordingCatalog
+from functions.retention import RetentionManager
+from functions.alert_pipeline import AlertEvent, AlertPipeline
+from functions.alert_coalescer import AlertCoalescer
+from functions.gateway_client import GatewayClient
+from functions.gateway_spool import GatewaySpool
+from functions.camera_state import CameraRegistry
+from functions.capture_process import CAPTURE_BACKEND, CaptureProcessHub, capture_backend, open_rtsp_source
+from functions.shard import ShardMembership
+from functions.rtsp_probe import RtspProber
+from functions.rtsp_supervisor import RtspSupervisor
+from functions.camera_store import CameraStore
+from functions.evidence_grabber import EvidenceGrabber
+from functions.alert_boost import AlertBoostScheduler
+from functions.metrics import MetricsRegistry
+from functions.frame_trace import FrameTrace, FrameTracer
+from functions.profiler import MemoryProfiler, ProfilerManager
+from functions.loop_lag import LoopLagMonitor
 
 # ================= 설정 (환경변수 적용) =================
 load_dotenv() # .env 파일 로딩
@@ -34,7 +59,7 @@ TELEGRAM_TOKEN = os.getenv("TELEGRAM_TOKEN")
 TELEGRAM_CHAT_ID = os.getenv("TELEGRAM_CHAT_ID")
 PC_IP = os.getenv("PC_IP")
 PORT_GATEWAY = 8888
-PORT_ALGO = 3000
+PORT_ALGO = int(os.getenv("PORT_ALGO", "3000"))
 
 STREAM_FPS = float(os.getenv("STREAM_FPS", "12"))
 DETECT_FPS = float(os.getenv("DETECT_FPS", "3"))
@@ -54,6 +79,99 @@ QUALITY_PRESETS = [
     {"label": "360p", "width": 640, "height": 360, "fps": 8, "quality": 70},
 ]
 
+# 경보 품질 부스트: 유지 시간 및 동시 부스트 카메라 수(인코딩 예산)
+ALERT_BOOST_HOLD_SEC = float(os.getenv("ALERT_BOOST_HOLD_SEC", "10.0"))
+ALERT_BOOST_MAX = int(os.getenv("ALERT_BOOST_MAX", "2"))
+
+# 이벤트 녹화: writer 큐 길이(프레임) 및 경보 지속 시 최대 녹화 길이
+RECORD_QUEUE_FRAMES = int(os.getenv("RECORD_QUEUE_FRAMES", "30"))
+RECORD_MAX_SEC = float(os.getenv("RECORD_MAX_SEC", "60.0"))
+# 녹화 인코더: opencv(mp4v) 또는 x264(ffmpeg libx264, 브라우저 재생 가능한 faststart MP4)
+RECORD_BACKEND = os.getenv("RECORD_BACKEND", "x264").strip().lower()
+RECORD_X264_PRESET = os.getenv("RECORD_X264_PRESET", "veryfast")
+RECORD_X264_CRF = int(os.getenv("RECORD_X264_CRF", "23"))
+# 녹화 색인(SQLite) 위치: recordings/ 밖에 두어 정적 파일로 노출되지 않게 함
+RECORDING_CATALOG_DB = os.getenv("RECORDING_CATALOG_DB", "recordings.db")
+# 경보 후속 처리(스냅샷/알림/녹화/게이트웨이) 단계별 큐 길이
+ALERT_QUEUE_SIZE = int(os.getenv("ALERT_QUEUE_SIZE", "64"))
+# 다중 카메라 경보 묶음 창(초): 첫 경보는 바로 보내고 창 안에 뒤따른 경보를 텔레그램 1건으로 합침 (0이면 비활성, 게이트웨이는 항상 카메라별)
+ALERT_COALESCE_SEC = float(os.getenv("ALERT_COALESCE_SEC", "3.0"))
+# 듀얼 스트림 카메라 경보 시 메인 스트림에서 증거 프레임을 받는 워커 수
+EVIDENCE_WORKERS = int(os.getenv("EVIDENCE_WORKERS", "2"))
+# 증거 프레임이 경보 시각과 이보다 많이 차이 나면 쓰지 않음 (서브스트림 탐지 프레임 유지)
+EVIDENCE_MAX_AGE_SEC = float(os.getenv("EVIDENCE_MAX_AGE_SEC", "2.0"))
+# 프레임 지연 추적: 지점별 백분위 창 크기, 샘플 타임라인 파일(JSONL, 비우면 끔), 샘플 간격(발행 N장 중 1장), 파일 상한
+FRAME_TRACE_WINDOW = int(os.getenv("FRAME_TRACE_WINDOW", "512"))
+FRAME_TRACE_PATH = os.getenv("FRAME_TRACE_PATH", "").strip()
+FRAME_TRACE_SAMPLE_EVERY = int(os.getenv("FRAME_TRACE_SAMPLE_EVERY", "100"))
+FRAME_TRACE_MAX_MB = float(os.getenv("FRAME_TRACE_MAX_MB", "100"))
+# 운영 중 프로파일링 (/admin/profile/*): ADMIN_TOKEN이 없으면 관리자 엔드포인트 비활성
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "").strip()
+PROFILE_DIR = os.getenv("PROFILE_DIR", "profiles")
+PROFILE_MAX_SEC = float(os.getenv("PROFILE_MAX_SEC", "300"))
+PROFILE_KEEP = int(os.getenv("PROFILE_KEEP", "10"))
+# 이벤트 루프 지연 측정 주기 / 보관 기간
+LOOP_LAG_INTERVAL_SEC = float(os.getenv("LOOP_LAG_INTERVAL_SEC", "0.5"))
+LOOP_LAG_HISTORY_SEC = float(os.getenv("LOOP_LAG_HISTORY_SEC", "600"))
+# 게이트웨이 송신 큐(outbox) 길이 / 한 번에 묶어 보낼 최대 메시지 수
+GATEWAY_QUEUE_SIZE = int(os.getenv("GATEWAY_QUEUE_SIZE", "1024"))
+GATEWAY_BATCH_MAX = int(os.getenv("GATEWAY_BATCH_MAX", "64"))
+# 게이트웨이 전송 형식: framed(길이 접두 프레임, 시각/메타 포함) 또는 text(구버전 "cam:status:path")
+GATEWAY_PROTOCOL = os.getenv("GATEWAY_PROTOCOL", "framed").strip().lower()
+# 게이트웨이 장애 중 이벤트 디스크 스풀 위치 / 최대 크기 (0이면 스풀 미사용)
+GATEWAY_SPOOL_DIR = os.getenv("GATEWAY_SPOOL_DIR", "gateway_spool")
+GATEWAY_SPOOL_MAX_BYTES = int(os.getenv("GATEWAY_SPOOL_MAX_BYTES", str(64 * 1024 * 1024)))
+# 텔레그램 알림 워커 수 / 큐 길이 / 재시도 횟수
+NOTIFY_WORKERS = int(os.getenv("NOTIFY_WORKERS", "2"))
+NOTIFY_QUEUE_SIZE = int(os.getenv("NOTIFY_QUEUE_SIZE", "32"))
+NOTIFY_MAX_RETRIES = int(os.getenv("NOTIFY_MAX_RETRIES", "3"))
+# 녹화 보관 정책 (0이면 해당 한도 미사용)
+RETENTION_MAX_AGE_DAYS = float(os.getenv("RETENTION_MAX_AGE_DAYS", "0"))
+RETENTION_MAX_BYTES = int(os.getenv("RETENTION_MAX_BYTES", "0"))
+RETENTION_CAM_MAX_BYTES = int(os.getenv("RETENTION_CAM_MAX_BYTES", "0"))
+RETENTION_CAM_MAX_COUNT = int(os.getenv("RETENTION_CAM_MAX_COUNT", "0"))
+RETENTION_MIN_FREE_BYTES = int(os.getenv("RETENTION_MIN_FREE_BYTES", "0"))
+RETENTION_MIN_FREE_MAX_SHARE = float(os.getenv("RETENTION_MIN_FREE_MAX_SHARE", "0.5"))
+RETENTION_INTERVAL_SEC = float(os.getenv("RETENTION_INTERVAL_SEC", "60"))
+# 사전 녹화(pre-roll): 카메라별로 최근 N초를 JPEG 바이트로 보관 (0이면 비활성)
+PREROLL_SEC = float(os.getenv("PREROLL_SEC", "3.0"))
+PREROLL_FPS = float(os.getenv("PREROLL_FPS", "5.0"))
+PREROLL_MAX_BYTES = int(os.getenv("PREROLL_MAX_BYTES", str(4 * 1024 * 1024)))
+# RTSP 패스스루 녹화: ffmpeg 스트림 복사 세그먼트 길이 / 보관 시간 / 경보 전 구간
+RTSP_SEGMENT_SEC = float(os.getenv("RTSP_SEGMENT_SEC", "2.0"))
+RTSP_SEGMENT_KEEP_SEC = float(os.getenv("RTSP_SEGMENT_KEEP_SEC", "30.0"))
+RTSP_RECORD_PRE_SEC = float(os.getenv("RTSP_RECORD_PRE_SEC", "3.0"))
+# 유휴 카메라 정리: N초 동안 프레임/뷰어가 없으면 프레임 버퍼와 트래커 해제 (0이면 비활성)
+CAMERA_IDLE_SEC = float(os.getenv("CAMERA_IDLE_SEC", "600"))
+CAMERA_REAP_INTERVAL_SEC = float(os.getenv("CAMERA_REAP_INTERVAL_SEC", "60"))
+# 공유 메모리 프레임 버스: RTSP 디코드를 카메라별 캡처 프로세스로 분리 (1이면 사용)
+FRAME_BUS = os.getenv("FRAME_BUS", "0").strip().lower() in ("1", "true", "yes", "on")
+FRAME_BUS_SLOTS = int(os.getenv("FRAME_BUS_SLOTS", "4"))
+FRAME_BUS_MAX_WIDTH = int(os.getenv("FRAME_BUS_MAX_WIDTH", "1920"))
+FRAME_BUS_MAX_HEIGHT = int(os.getenv("FRAME_BUS_MAX_HEIGHT", "1080"))
+FRAME_BUS_MAX_FPS = float(os.getenv("FRAME_BUS_MAX_FPS", "15"))
+# 카메라 샤딩: 레지스트리에 등록된 알고리즘 노드들 사이에서 cam_id 일관 해싱으로 담당 노드 결정 (URL이 없으면 단일 노드)
+SHARD_REGISTRY_URL = os.getenv("SHARD_REGISTRY_URL", "").strip()
+SHARD_NODE_ID = os.getenv("SHARD_NODE_ID", f"{socket.gethostname()}:{PORT_ALGO}").strip()
+SHARD_ADVERTISE_URL = os.getenv("SHARD_ADVERTISE_URL", f"http://{socket.gethostname()}:{PORT_ALGO}").strip()
+SHARD_HEARTBEAT_SEC = float(os.getenv("SHARD_HEARTBEAT_SEC", "2.0"))
+SHARD_VNODES = int(os.getenv("SHARD_VNODES", "64"))
+SHARD_TOKEN = os.getenv("SHARD_TOKEN", "").strip()
+# RTSP 등록 검사: 이벤트 루프 밖에서 실행 (검사 1건 제한 시간 / 일괄 등록 동시 검사 수)
+RTSP_PROBE_TIMEOUT_SEC = float(os.getenv("RTSP_PROBE_TIMEOUT_SEC", "6.0"))
+RTSP_PROBE_CONCURRENCY = int(os.getenv("RTSP_PROBE_CONCURRENCY", "8"))
+RTSP_PROBE_MAX_BATCH = int(os.getenv("RTSP_PROBE_MAX_BATCH", "200"))
+# RTSP 재연결 감독: 노드 전체 동시 재연결 수, 지수 백오프(full jitter) 범위, DOWN 판정 연속 실패 수
+RTSP_RECONNECT_MAX_CONCURRENT = int(os.getenv("RTSP_RECONNECT_MAX_CONCURRENT", "4"))
+RTSP_BACKOFF_BASE_SEC = float(os.getenv("RTSP_BACKOFF_BASE_SEC", "1.0"))
+RTSP_BACKOFF_MAX_SEC = float(os.getenv("RTSP_BACKOFF_MAX_SEC", "60.0"))
+RTSP_DOWN_AFTER = int(os.getenv("RTSP_DOWN_AFTER", "3"))
+# 카메라 등록 정보 영구 저장 (RTSP 주소는 별도 비밀 파일) + 시작 시 병렬 복구
+CAMERA_STORE_DB = os.getenv("CAMERA_STORE_DB", "cameras.db")
+CAMERA_SECRETS_PATH = os.getenv("CAMERA_SECRETS_PATH", "camera_secrets.json")
+CAMERA_SECRET_KEY = os.getenv("CAMERA_SECRET_KEY", "").strip()
+CAMERA_WARM_RESTART = os.getenv("CAMERA_WARM_RESTART", "1").strip().lower() not in ("0", "false", "no", "off")
+
 DEFAULT_STREAM_CONFIG = {
     "fps": STREAM_FPS,
     "width": STREAM_WIDTH,
@@ -72,6 +190,10 @@ os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = OPENCV_FFMPEG_CAPTURE_OPTIONS
 if not TELEGRAM_TOKEN or not PC_IP:
     print("❌ [오류] .env 파일 설정이 누락되었습니다.")
     sys.exit(1)
+if SHARD_REGISTRY_URL and not SHARD_TOKEN:
+    # 노드 간 카메라 인계(/cameras/adopt)는 RTSP 계정 정보를 주고받으므로 토큰 없이 열지 않음
+    print("❌ [오류] SHARD_REGISTRY_URL을 쓰려면 SHARD_TOKEN이 필요합니다.")
+    sys.exit(1)
 # ======================================================
 
 @asynccontextmanager
@@ -84,48 +206,213 @@ async def lifespan(app: FastAPI):
         loop.default_exception_handler(context)
     loop.set_exception_handler(_handler)
     asyncio.create_task(_auto_quality_loop())
+    asyncio.create_task(loop_lag.run())
+    if CAMERA_IDLE_SEC > 0:
+        asyncio.create_task(_idle_reaper_loop())
+    # 카탈로그 도입 이전 파일 색인 (백그라운드)
+    threading.Thread(target=catalog.backfill, args=("recordings",), daemon=True).start()
+    retention.start()
+    if shard is not None:
+        asyncio.create_task(_shard_loop())
+    if CAMERA_WARM_RESTART:
+        asyncio.create_task(_warm_restart())
     yield
+    if shard is not None:
+        # 정상 종료: 레지스트리에서 빠지고 담당 카메라를 남은 노드로 넘김
+        await asyncio.to_thread(shard.leave)
+        await _rebalance()
+    retention.stop()
+    if capture_hub is not None:
+        capture_hub.close()
+    rtsp_prober.close()
+    gateway.close()
 
 app = FastAPI(lifespan=lifespan)
 app.add_middleware(CORSMiddleware, allow_origins=["*"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
-# recordings 폴더 개방
 os.makedirs("recordings", exist_ok=True)
-app.mount("/recordings", StaticFiles(directory="recordings"), name="recordings")
 
 # ✅ 모듈 초기화
 detector = AIDetector()
-notifier = TelegramNotifier(TELEGRAM_TOKEN, TELEGRAM_CHAT_ID)
-recorder = VideoRecorder(save_dir="recordings")
-
-# 상태 변수들
-camera_streams = {}
-camera_sources = {}
-last_seen = {}
-last_heartbeat = {}
-device_status = {}
-active_viewers = set()
-verified_viewers = set()
-monitoring_enabled = set()
-last_alert_times = {}
+catalog = RecordingCatalog(RECORDING_CATALOG_DB)
+retention = RetentionManager(
+    catalog,
+    save_dir="recordings",
+    max_age_days=RETENTION_MAX_AGE_DAYS,
+    max_total_bytes=RETENTION_MAX_BYTES,
+    per_camera_max_bytes=RETENTION_CAM_MAX_BYTES,
+    per_camera_max_count=RETENTION_CAM_MAX_COUNT,
+    min_free_bytes=RETENTION_MIN_FREE_BYTES,
+    min_free_max_share=RETENTION_MIN_FREE_MAX_SHARE,
+    interval=RETENTION_INTERVAL_SEC,
+)
+notifier = TelegramNotifier(
+    TELEGRAM_TOKEN,
+    TELEGRAM_CHAT_ID,
+    workers=NOTIFY_WORKERS,
+    queue_size=NOTIFY_QUEUE_SIZE,
+    max_retries=NOTIFY_MAX_RETRIES,
+)
+recorder = VideoRecorder(
+    save_dir="recordings",
+    queue_size=RECORD_QUEUE_FRAMES,
+    max_duration=RECORD_MAX_SEC,
+    preroll=PrerollBuffer(seconds=PREROLL_SEC, fps=PREROLL_FPS, max_bytes=PREROLL_MAX_BYTES),
+    backend=RECORD_BACKEND,
+    x264_preset=RECORD_X264_PRESET,
+    x264_crf=RECORD_X264_CRF,
+    catalog=catalog,
+)
+rtsp_recorder = RtspSegmentRecorder(
+    save_dir="recordings",
+    segment_dir="rtsp_segments",
+    segment_sec=RTSP_SEGMENT_SEC,
+    keep_sec=RTSP_SEGMENT_KEEP_SEC,
+    max_clip_sec=RECORD_MAX_SEC,
+    catalog=catalog,
+)
+alert_pipeline = AlertPipeline(queue_size=ALERT_QUEUE_SIZE)
+evidence_grabber = EvidenceGrabber(max_age_sec=EVIDENCE_MAX_AGE_SEC, segment_source=rtsp_recorder.frame_at)
+gateway = GatewayClient(
+    PC_IP,
+    PORT_GATEWAY,
+    queue_size=GATEWAY_QUEUE_SIZE,
+    batch_max=GATEWAY_BATCH_MAX,
+    protocol=GATEWAY_PROTOCOL,
+    spool=GatewaySpool(GATEWAY_SPOOL_DIR, max_bytes=GATEWAY_SPOOL_MAX_BYTES) if GATEWAY_SPOOL_MAX_BYTES > 0 else None,
+)
+alert_boost = AlertBoostScheduler(hold_sec=ALERT_BOOST_HOLD_SEC, max_boosted=ALERT_BOOST_MAX)
+capture_hub = CaptureProcessHub(
+    slots=FRAME_BUS_SLOTS,
+    max_width=FRAME_BUS_MAX_WIDTH,
+    max_height=FRAME_BUS_MAX_HEIGHT,
+    max_fps=FRAME_BUS_MAX_FPS,
+) if FRAME_BUS else None
+if CAPTURE_BACKEND == "pyav" and capture_backend() != "pyav":
+    print("⚠️ [캡처] PyAV(av)를 찾을 수 없어 OpenCV 캡처를 사용합니다.")
+shard = ShardMembership(
+    SHARD_REGISTRY_URL,
+    SHARD_NODE_ID,
+    SHARD_ADVERTISE_URL,
+    vnodes=SHARD_VNODES,
+) if SHARD_REGISTRY_URL else None
+camera_store = CameraStore(CAMERA_STORE_DB, CAMERA_SECRETS_PATH, secret_key=CAMERA_SECRET_KEY or None)
+# 재시작 복구 결과 (프로세스 시작 -> 모든 RTSP 스트림 연결까지 걸린 시간)
+warm_restart = {
+    "enabled": CAMERA_WARM_RESTART,
+    "restored": 0,
+    "rtsp": 0,
+    "live": 0,
+    "failed": [],
+    "done": False,
+    "seconds_to_done": None,
+    "seconds_to_all_live": None,
+    "cameras": {},
+}
+# auto 모드는 카메라당 UDP/TCP 2건을 동시에 검사하므로 스레드는 동시 검사 수의 2배
+rtsp_prober = RtspProber(max_workers=max(RTSP_PROBE_CONCURRENCY, 1) * 2, timeout=RTSP_PROBE_TIMEOUT_SEC)
+
+def _on_rtsp_transition(cam_id, prev, state, info):
+    # RTSP 연결 상태 변화는 게이트웨이에 상태 보고로 전달 (RTSP_CONNECTING / RTSP_LIVE / RTSP_DEGRADED / RTSP_DOWN)
+    print(f"📶 [RTSP 상태] {cam_id} {prev} -> {state} (연속 실패 {info['failures']}, 재시도 {info['retry_in']}초 후)")
+    alert_pipeline.submit("gateway", AlertEvent(cam_id, "status", f"RTSP_{state}", meta={"prev": prev, **info}))
+
+rtsp_supervisor = RtspSupervisor(
+    max_concurrent=RTSP_RECONNECT_MAX_CONCURRENT,
+    backoff_base=RTSP_BACKOFF_BASE_SEC,
+    backoff_max=RTSP_BACKOFF_MAX_SEC,
+    down_after=RTSP_DOWN_AFTER,
+    on_transition=_on_rtsp_transition,
+)
+shard_counters = {"redirects": 0, "handoffs": 0, "handoff_failures": 0, "adopted": 0}
+
+# 상태 변수들: 카메라별 상태는 CameraState 하나에 모음 (functions/camera_state.py)
+cameras = CameraRegistry()
+
+# Prometheus 지표 (/metrics): 단계별 지연 히스토그램 + 프레임/경보 카운터 + 큐 깊이 게이지
+metrics = MetricsRegistry(prefix="lab_guardian_")
+STAGE_SECONDS = metrics.histogram(
+    "stage_seconds",
+    "Per-frame processing time by stage "
+    "(capture_read, decode, inference, tracking, annotate, resize, jpeg_encode, viewer_send)",
+    ("cam", "stage"),
+)
+FRAMES_TOTAL = metrics.counter("frames_total", "JPEG frames published to viewers", ("cam",))
+FRAMES_DROPPED = metrics.counter(
+    "frames_dropped_total",
+    "Frames dropped before reaching viewers (lag_skip, bus_overwritten, viewer_skip)",
+    ("cam", "reason"),
+)
+VIEWER_FRAMES = metrics.counter(
+    "viewer_frames_total", "Multipart frames sent to viewers (new or repeated JPEG)", ("cam", "kind")
+)
+DETECTIONS = metrics.counter("detections_total", "Detector runs", ("cam",))
+DETECTED_OBJECTS = metrics.counter("detected_objects_total", "Tracked people summed over detector runs", ("cam",))
+ALERTS = metrics.counter("alerts_total", "Alert and status events emitted", ("cam", "kind"))
+FRAME_AGE = metrics.histogram(
+    "frame_age_seconds",
+    "Time since capture when a frame reaches each point (picked, detected, encoded, sent)",
+    ("cam", "point"),
+    buckets=(0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+frame_tracer = FrameTracer(
+    window=FRAME_TRACE_WINDOW,
+    trace_path=FRAME_TRACE_PATH,
+    sample_every=FRAME_TRACE_SAMPLE_EVERY,
+    max_bytes=int(FRAME_TRACE_MAX_MB * 1024 * 1024),
+)
+LOOP_LAG = metrics.histogram(
+    "event_loop_lag_seconds",
+    "How late the asyncio event loop woke up from a timed sleep",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0),
+)
+loop_lag = LoopLagMonitor(
+    interval=LOOP_LAG_INTERVAL_SEC,
+    history_sec=LOOP_LAG_HISTORY_SEC,
+    on_sample=LOOP_LAG.observe,
+)
+profiler = ProfilerManager(out_dir=PROFILE_DIR, max_sec=PROFILE_MAX_SEC, keep=PROFILE_KEEP)
+memory_profiler = MemoryProfiler(out_dir=PROFILE_DIR, keep=PROFILE_KEEP)
+
+def _queue_metrics(field):
+    values = {(f"alert_{name}",): stats[field] for name, stats in alert_pipeline.stats().items()}
+    values[("gateway_outbox",)] = gateway.stats()[field]
+    values[("telegram",)] = notifier.stats()[field]
+    return values
+
+metrics.gauge("viewers", "Connected MJPEG viewers", ("cam",),
+              lambda: {(s.cam_id,): s.viewers for s in cameras.states()})
+metrics.gauge("queue_depth", "Items waiting in background queues", ("queue",), lambda: _queue_metrics("depth"))
+metrics.gauge("queue_capacity", "Background queue capacity", ("queue",), lambda: _queue_metrics("capacity"))
+metrics.gauge("queue_dropped_total", "Items dropped by full background queues", ("queue",),
+              lambda: _queue_metrics("dropped"), kind="counter")
+metrics.gauge("rtsp_state", "RTSP connection state (1 for the current state)", ("cam", "state"),
+              lambda: {(cam_id, h["state"]): 1 for cam_id, h in rtsp_supervisor.stats()["sources"].items()})
 ALERT_COOLDOWN = 30
 _danger_hold_raw = float(os.getenv("DANGER_HOLD_SEC", "3.0"))
 DANGER_HOLD_SEC = max(_danger_hold_raw, 1.0)
-error_last_log = {}
-ERROR_LOG_COOLDOWN = 5.0
-last_stream_sent = {}
-last_detect_time = {}
-last_annotated_frames = {}
-last_danger_time = {}
-stream_tasks = {}
-stream_stop_events = {}
-stream_jpeg_cache = {}
-viewer_counts = {}
-stream_configs = {}
 auto_quality_index = 1
 auto_quality_high_count = 0
 auto_quality_low_count = 0
 
+def _trace_point(trace, point, ts=None):
+    # 캡처 시각 기준 누적 지연 기록 (/system/latency 백분위 + /metrics 히스토그램)
+    age = trace.mark(point, ts)
+    frame_tracer.observe(trace.cam_id, point, age)
+    FRAME_AGE.observe(age, trace.cam_id, point)
+
+def _republish(trace):
+    # 이미 발행한 프레임(탐지 결과/업로드 프레임)을 다시 내보내면 캡처/탐지 시각을 유지한 새 타임라인
+    if trace is None or trace.jpeg_seq == 0:
+        return trace
+    return trace.derive()
+
+def _resize(cam_id, frame, size):
+    start = time.perf_counter()
+    frame = cv2.resize(frame, size)
+    STAGE_SECONDS.observe(time.perf_counter() - start, cam_id, "resize")
+    return frame
+
 def _encode_jpeg(frame, quality):
     params = [int(cv2.IMWRITE_JPEG_QUALITY), int(quality)]
     ret, buf = cv2.imencode('.jpg', frame, params)
@@ -140,31 +427,62 @@ def _match_preset_label(cfg):
             return preset["label"]
     return cfg.get("label", "720p")
 
-def _open_rtsp_capture(url, transport):
-    os.environ["OPENCV_FFMPEG_CAPTURE_OPTIONS"] = (
-        "rtsp_transport;udp|fflags;nobuffer|flags;low_delay|max_delay;0|reorder_queue_size;0|stimeout;2000000"
-        if transport == "udp"
-        else "rtsp_transport;tcp|fflags;nobuffer|flags;low_delay|max_delay;0|reorder_queue_size;0|stimeout;2000000"
-    )
-    cap = cv2.VideoCapture(url, cv2.CAP_FFMPEG)
+def _boost_target_size(frame, stream_size):
+    # 경보 부스트는 원본보다 크게 업스케일하지 않음 (인코딩 비용만 늘어남)
+    src_w, src_h = frame.shape[1], frame.shape[0]
+    if stream_size[0] >= src_w or stream_size[1] >= src_h:
+        return (src_w, src_h)
+    return stream_size
+
+def _parse_time_param(value):
+    # epoch 초 또는 ISO 8601 문자열
+    if value is None or value == "":
+        return None
     try:
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)
-    except Exception:
+        return float(value)
+    except ValueError:
         pass
-    return cap
-
-def _test_rtsp_connection(url, transport):
-    cap = _open_rtsp_capture(url, transport)
     try:
-        if not cap.isOpened():
-            return False
-        ok, frame = cap.read()
-        return bool(ok and frame is not None)
-    finally:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid time: {value}")
+
+def _file_range_response(path, range_header, media_type):
+    # HTTP Range(bytes=start-end) 지원: 브라우저 영상 탐색/이어받기용
+    size = os.path.getsize(path)
+    start, end = 0, size - 1
+    status_code = 200
+    if range_header and range_header.startswith("bytes="):
+        spec = range_header[len("bytes="):].split(",")[0].strip()
         try:
-            cap.release()
-        except Exception:
-            pass
+            first, last = spec.split("-", 1)
+            if first == "":
+                start = max(0, size - int(last))
+            else:
+                start = int(first)
+                end = int(last) if last else size - 1
+        except ValueError:
+            raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        end = min(end, size - 1)
+        if start > end:
+            raise HTTPException(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+        status_code = 206
+
+    def iter_file():
+        with open(path, "rb") as f:
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(256 * 1024, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    headers = {"Accept-Ranges": "bytes", "Content-Length": str(end - start + 1)}
+    if status_code == 206:
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(iter_file(), status_code=status_code, media_type=media_type, headers=headers)
 
 def _get_gpu_stats():
     try:
@@ -221,8 +539,10 @@ async def _auto_quality_loop():
             continue
 
         preset = QUALITY_PRESETS[auto_quality_index]
-        for cam_id in list(stream_configs.keys()):
-            stream_configs[cam_id] = {
+        for state in cameras.states():
+            if state.stream_config is None:
+                continue
+            state.stream_config = {
                 "width": preset["width"],
                 "height": preset["height"],
                 "fps": preset["fps"],
@@ -231,122 +551,253 @@ async def _auto_quality_loop():
                 "auto": True,
             }
 
-async def _stream_worker(cam_id):
-    source = camera_sources.get(cam_id)
+async def _idle_reap(now):
+    # 유휴 카메라의 런타임 자원 해제 (_release_camera와 같되 등록 정보/패스스루 녹화는 유지).
+    # 등록 정보나 감시 설정이 없으면 상태 자체를 제거.
+    # 감시 중인 RTSP 카메라는 캡처 프로세스/재연결 감독을 유지 (웜 재시작이 띄워 둔 연결을 끊지 않게)
+    released = []
+    for state in cameras.idle(now, CAMERA_IDLE_SEC):
+        held = state.frame_bytes() > 0 or state.cam_id in detector.trackers
+        unconfigured = state.source is None and not state.monitoring and (state.stream_config or {}).get("auto", True)
+        if unconfigured:
+            cameras.remove(state.cam_id)
+        live = state.monitoring and (state.source or {}).get("type") == "rtsp"
+        await _release_runtime(state.cam_id, state, keep_connection=live)
+        if held:
+            released.append(state.cam_id)
+    return released
+
+async def _idle_reaper_loop():
+    while True:
+        await asyncio.sleep(CAMERA_REAP_INTERVAL_SEC)
+        released = await _idle_reap(time.time())
+        if released:
+            print(f"🧹 [유휴 카메라 정리] {', '.join(released)}")
+
+def _publish_jpeg(state, frame, quality, now, ref=None, trace=None):
+    start = time.perf_counter()
+    buf = _encode_jpeg(frame, quality)
+    STAGE_SECONDS.observe(time.perf_counter() - start, state.cam_id, "jpeg_encode")
+    # 프레임 버스 뷰를 인코딩하는 동안 캡처가 슬롯을 덮어썼으면 버림 (다음 프레임 사용)
+    if ref is not None and not ref.valid():
+        FRAMES_DROPPED.inc(state.cam_id, "bus_overwritten")
+        return
+    if buf is not None:
+        state.jpeg = buf.tobytes()
+        state.jpeg_ts = now
+        state.jpeg_seq += 1
+        state.last_stream_sent = now
+        FRAMES_TOTAL.inc(state.cam_id)
+        if trace is not None:
+            _trace_point(trace, "encoded")
+            trace.jpeg_seq = state.jpeg_seq
+            frame_tracer.published(trace)
+        frame_tracer.finish(state.jpeg_trace)
+        state.jpeg_trace = trace
+
+async def _stream_worker(state):
+    cam_id = state.cam_id
+    source = state.source
     is_rtsp = source and source.get("type") == "rtsp"
     transport = (source.get("transport") if source else None) or "tcp"
+    stop = state.stream_stop
     cap = None
+    cap_fps = None
+    bus_seq = 0
+    bus_ts = time.time()
+    bus_ring = None
+    bus_connecting = False
+    bus_connect_seq = 0
     try:
-        while not stream_stop_events[cam_id].is_set():
+        while not stop.is_set():
             await asyncio.sleep(0.01)
             now = time.time()
-            cfg = stream_configs.get(cam_id, DEFAULT_STREAM_CONFIG)
+            cfg = alert_boost.effective_config(
+                cam_id, state.stream_config or DEFAULT_STREAM_CONFIG, now
+            )
+            boosted = cfg.get("boost", False)
             fps = max(float(cfg.get("fps", STREAM_FPS)), 0.1)
             width = int(cfg.get("width", STREAM_WIDTH))
             height = int(cfg.get("height", STREAM_HEIGHT))
             quality = int(cfg.get("quality", JPEG_QUALITY))
             stream_size = (width, height)
-            if now - last_stream_sent.get(cam_id, 0) < (1.0 / fps):
+            if now - state.last_stream_sent < (1.0 / fps):
+                continue
+
+            if is_rtsp and capture_hub is not None:
+                # 디코드는 캡처 프로세스가 담당: 공유 메모리 링의 최신 프레임을 복사 없이 읽음
+                ring = capture_hub.current(cam_id, source.get("url"), transport)
+                if ring is None:
+                    # (재)시작은 이전 프로세스 정리/새 프로세스 생성으로 막힐 수 있어 스레드에서
+                    ring = await asyncio.to_thread(capture_hub.ensure, cam_id, source.get("url"), transport)
+                if ring is not bus_ring:
+                    # 캡처 프로세스가 (재)시작됨: 새 프로세스는 연결 요청을 기다림
+                    if bus_connecting:
+                        rtsp_supervisor.end(cam_id, False, "capture restarted")
+                    bus_ring, bus_connecting = ring, False
+                status = ring.status()
+                if bus_connecting and status != "CONNECTING":
+                    # 연결 직후 바로 끊겨 DOWN이 먼저 보여도 그 사이 프레임이 기록됐으면 성공으로 봄
+                    connected = status == "LIVE" or ring.head_seq > bus_connect_seq
+                    bus_connecting = False
+                    rtsp_supervisor.end(cam_id, connected, None if connected else "connect failed")
+                    bus_ts = now
+                elif not bus_connecting and (status == "DOWN" or (status == "CONNECTING" and ring.head_seq == 0)):
+                    rtsp_supervisor.lost(cam_id, "stream lost")
+                    # 재연결은 감독 허가(백오프 경과 + 동시 재연결 여유)가 있을 때만 요청
+                    if rtsp_supervisor.try_begin(cam_id, now):
+                        bus_connect_seq = ring.head_seq
+                        bus_connecting = await asyncio.to_thread(capture_hub.request_connect, cam_id)
+                        if not bus_connecting:
+                            rtsp_supervisor.end(cam_id, False, "capture process unavailable")
+                ref = ring.latest(after_seq=bus_seq)
+                if ref is None:
+                    if status != "LIVE" or now - bus_ts > STALE_FRAME_SEC:
+                        rtsp_supervisor.stalled(cam_id, STALE_FRAME_SEC, now)
+                        _publish_jpeg(state, offline_frame, quality, now)
+                        await asyncio.sleep(0.5)
+                    continue
+                rtsp_supervisor.frame(cam_id, now)
+                if transport == "auto" and ring.transport():
+                    source["active_transport"] = ring.transport()
+                bus_seq, bus_ts = ref.seq, ref.ts
+                frame = ref.array
+                trace = FrameTrace(cam_id, ref.seq, "bus", ref.ts)
+                _trace_point(trace, "picked")
+                display_frame, display_trace = frame, trace
+                if state.monitoring:
+                    if now - state.last_detect >= (1.0 / DETECT_FPS):
+                        # 탐지 결과/경보 스냅샷은 프레임을 보관하므로 탐지 주기에만 복사
+                        display_frame, _ = process_detection(
+                            state,
+                            frame.copy(),
+                            now,
+                            require_verified_viewer=False,
+                            trace=trace,
+                        )
+                        state.last_detect = now
+                        state.annotated_frame = display_frame
+                        state.annotated_trace = trace
+                    elif state.annotated_frame is not None:
+                        display_frame = state.annotated_frame
+                        display_trace = _republish(state.annotated_trace)
+                from_bus = display_frame is frame
+                target_size = _boost_target_size(display_frame, stream_size) if boosted else stream_size
+                if target_size and (display_frame.shape[1], display_frame.shape[0]) != target_size:
+                    display_frame = _resize(cam_id, display_frame, target_size)
+                _publish_jpeg(state, display_frame, quality, now, ref if from_bus else None, display_trace)
                 continue
 
             if is_rtsp:
-                if cap is None or not cap.isOpened():
-                    url = source.get("url")
-                    order = []
-                    if transport == "auto":
-                        last_transport = source.get("active_transport")
-                        if last_transport in ("tcp", "udp"):
-                            order = [last_transport, "udp" if last_transport == "tcp" else "tcp"]
-                        else:
-                            order = ["udp", "tcp"]
-                    else:
-                        order = [transport]
-                    cap = None
-                    for candidate in order:
-                        attempt = _open_rtsp_capture(url, candidate)
-                        if attempt.isOpened():
-                            cap = attempt
-                            if transport == "auto":
-                                source["active_transport"] = candidate
-                            break
-                        attempt.release()
-                    if not cap or not cap.isOpened():
-                        buf = _encode_jpeg(offline_frame, quality)
-                        if buf is not None:
-                            stream_jpeg_cache[cam_id] = (buf.tobytes(), now)
-                            last_stream_sent[cam_id] = now
+                if cap is None:
+                    # 재연결은 감독 허가(백오프 경과 + 동시 재연결 여유)가 있을 때만, 열기는 이벤트 루프 밖에서
+                    if not rtsp_supervisor.try_begin(cam_id, now):
+                        _publish_jpeg(state, offline_frame, quality, now)
                         await asyncio.sleep(0.5)
                         continue
-                ok, frame = cap.read()
+                    cap_fps = max(fps, DETECT_FPS)
+                    cap, candidate = await asyncio.to_thread(
+                        open_rtsp_source, source.get("url"), transport, source.get("active_transport"), cap_fps
+                    )
+                    rtsp_supervisor.end(cam_id, cap is not None, None if cap is not None else "connect failed")
+                    if cap is None:
+                        _publish_jpeg(state, offline_frame, quality, now)
+                        await asyncio.sleep(0.5)
+                        continue
+                    if transport == "auto":
+                        source["active_transport"] = candidate
+                if max(fps, DETECT_FPS) != cap_fps:
+                    # 소비 fps 변경(부스트 등): PyAV 백엔드는 디코드 생략 모드를 다시 정함 (OpenCV는 무시)
+                    cap_fps = max(fps, DETECT_FPS)
+                    cap.set(cv2.CAP_PROP_FPS, cap_fps)
+                # grab(수신 + 코덱 디코드)과 retrieve(BGR 변환)를 나눠 단계별 시간 기록
+                t0 = time.perf_counter()
+                ok = cap.grab()
+                t1 = time.perf_counter()
+                captured = time.time()
+                frame = None
+                if ok:
+                    ok, frame = cap.retrieve()
+                    STAGE_SECONDS.observe(t1 - t0, cam_id, "capture_read")
+                    STAGE_SECONDS.observe(time.perf_counter() - t1, cam_id, "decode")
                 if not ok or frame is None:
-                    if cap is not None:
-                        cap.release()
+                    cap.release()
                     cap = None
-                    buf = _encode_jpeg(offline_frame, quality)
-                    if buf is not None:
-                        stream_jpeg_cache[cam_id] = (buf.tobytes(), now)
-                        last_stream_sent[cam_id] = now
+                    rtsp_supervisor.lost(cam_id, "read failed")
+                    _publish_jpeg(state, offline_frame, quality, now)
                     await asyncio.sleep(0.5)
                     continue
+                rtsp_supervisor.frame(cam_id, now)
+                state.capture_seq += 1
+                trace = FrameTrace(cam_id, state.capture_seq, "rtsp", captured)
+                _trace_point(trace, "picked")
 
-                display_frame = frame
+                display_frame, display_trace = frame, trace
                 # 조건부 지연 해소: 지연이 클 때만 짧게 프레임 드롭
-                if now - last_stream_sent.get(cam_id, 0) > DROP_LAG_SEC:
+                if now - state.last_stream_sent > DROP_LAG_SEC:
                     for _ in range(max(1, DROP_LAG_FRAMES)):
                         if not cap.grab():
                             break
-                    ok, latest = cap.read()
-                    if ok and latest is not None:
-                        display_frame = latest
-                if cam_id in monitoring_enabled:
-                    if now - last_detect_time.get(cam_id, 0) >= (1.0 / DETECT_FPS):
+                        state.capture_seq += 1
+                        FRAMES_DROPPED.inc(cam_id, "lag_skip")
+                    ok = cap.grab()
+                    captured = time.time()
+                    if ok:
+                        ok, latest = cap.retrieve()
+                        if ok and latest is not None:
+                            state.capture_seq += 1
+                            display_frame = latest
+                            display_trace = FrameTrace(cam_id, state.capture_seq, "rtsp", captured)
+                            _trace_point(display_trace, "picked")
+                if state.monitoring:
+                    if now - state.last_detect >= (1.0 / DETECT_FPS):
                         display_frame, _ = process_detection(
-                            cam_id,
+                            state,
                             frame,
                             now,
                             require_verified_viewer=False,
+                            trace=trace,
                         )
-                        last_detect_time[cam_id] = now
-                        last_annotated_frames[cam_id] = display_frame
-                    else:
-                        display_frame = last_annotated_frames.get(cam_id, frame)
-                if stream_size and (display_frame.shape[1], display_frame.shape[0]) != stream_size:
-                    display_frame = cv2.resize(display_frame, stream_size)
-
-                buf = _encode_jpeg(display_frame, quality)
-                if buf is not None:
-                    stream_jpeg_cache[cam_id] = (buf.tobytes(), now)
-                    last_stream_sent[cam_id] = now
+                        state.last_detect = now
+                        state.annotated_frame = display_frame
+                        state.annotated_trace = trace
+                        display_trace = trace
+                    elif state.annotated_frame is not None:
+                        display_frame = state.annotated_frame
+                        display_trace = _republish(state.annotated_trace)
+                target_size = _boost_target_size(display_frame, stream_size) if boosted else stream_size
+                if target_size and (display_frame.shape[1], display_frame.shape[0]) != target_size:
+                    display_frame = _resize(cam_id, display_frame, target_size)
+
+                _publish_jpeg(state, display_frame, quality, now, trace=display_trace)
                 continue
 
             # robot/usb: use latest frame if available
-            frame = camera_streams.get(cam_id)
+            frame = state.frame
             if frame is None:
-                buf = _encode_jpeg(offline_frame, quality)
-                if buf is not None:
-                    stream_jpeg_cache[cam_id] = (buf.tobytes(), now)
-                    last_stream_sent[cam_id] = now
+                _publish_jpeg(state, offline_frame, quality, now)
                 await asyncio.sleep(0.5)
                 continue
 
             display_frame = frame
-            if stream_size and (display_frame.shape[1], display_frame.shape[0]) != stream_size:
-                display_frame = cv2.resize(display_frame, stream_size)
+            display_trace = _republish(state.frame_trace)
+            target_size = _boost_target_size(display_frame, stream_size) if boosted else stream_size
+            if target_size and (display_frame.shape[1], display_frame.shape[0]) != target_size:
+                display_frame = _resize(cam_id, display_frame, target_size)
 
-            buf = _encode_jpeg(display_frame, quality)
-            if buf is not None:
-                stream_jpeg_cache[cam_id] = (buf.tobytes(), now)
-                last_stream_sent[cam_id] = now
+            _publish_jpeg(state, display_frame, quality, now, trace=display_trace)
     finally:
         if cap is not None:
             cap.release()
+        if is_rtsp and capture_hub is not None:
+            await asyncio.to_thread(capture_hub.stop, cam_id)
 
-async def ensure_stream_task(cam_id):
-    if cam_id in stream_tasks and not stream_tasks[cam_id].done():
+async def ensure_stream_task(state):
+    if state.streaming():
         return
-    if cam_id not in stream_configs:
+    if state.stream_config is None:
         default_preset = QUALITY_PRESETS[1]
-        stream_configs[cam_id] = {
+        state.stream_config = {
             "width": default_preset["width"],
             "height": default_preset["height"],
             "fps": default_preset["fps"],
@@ -354,8 +805,147 @@ async def ensure_stream_task(cam_id):
             "label": default_preset["label"],
             "auto": True,
         }
-    stream_stop_events[cam_id] = asyncio.Event()
-    stream_tasks[cam_id] = asyncio.create_task(_stream_worker(cam_id))
+    state.stream_stop = asyncio.Event()
+    state.stream_task = asyncio.create_task(_stream_worker(state))
+
+def _stop_stream(state):
+    if state.stream_stop is not None:
+        state.stream_stop.set()
+
+def _shard_redirect(request, cam_id):
+    # 다른 노드 담당 카메라면 그 노드로 307 (POST 본문 유지).
+    # _shard 표시가 붙은 요청은 링 전환 중 노드 간 핑퐁을 막기 위해 그대로 처리
+    if shard is None or request.query_params.get("_shard") or shard.is_local(cam_id):
+        return None
+    node_id, url = shard.owner(cam_id)
+    if not url:
+        return None
+    params = dict(request.query_params)
+    params["_shard"] = node_id
+    shard_counters["redirects"] += 1
+    return RedirectResponse(f"{url}{request.url.path}?{urlencode(params)}", status_code=307)
+
+def _handoff_camera(url, node_id, state):
+    # 등록 정보/감시 여부/스트림 설정을 새 담당 노드로 전달 (RTSP 재검사 없이 채택)
+    payload = {
+        "cam_id": state.cam_id,
+        "source": state.source,
+        "monitoring": state.monitoring,
+        "stream_config": state.stream_config,
+    }
+    headers = {"X-Shard-Token": SHARD_TOKEN}
+    try:
+        resp = shard.session.post(
+            f"{url}/cameras/adopt?{urlencode({'_shard': node_id})}", json=payload, headers=headers, timeout=3.0
+        )
+        return resp.status_code == 200
+    except Exception:
+        return False
+
+async def _release_runtime(cam_id, state, keep_connection=False):
+    # 카메라 런타임 자원 해제: 프레임, 캡처 프로세스, 부스트, 사전 녹화 버퍼, 트래커, 재연결 감독, 지표/지연 시계열
+    # (다시 쓰이면 모두 새로 만들어짐). keep_connection이면 캡처 프로세스/재연결 감독/지표는 유지
+    if state is not None:
+        frame_tracer.finish(state.jpeg_trace)
+        state.release_frames()
+    if capture_hub is not None and not keep_connection:
+        await asyncio.to_thread(capture_hub.stop, cam_id)
+    alert_boost.release(cam_id)
+    recorder.preroll.clear(cam_id)
+    detector.remove_tracker(cam_id)
+    if not keep_connection:
+        rtsp_supervisor.remove(cam_id)
+        metrics.remove("cam", cam_id)
+    frame_tracer.remove(cam_id)
+
+async def _release_camera(cam_id):
+    # 카메라 상태 전체 해제: 스트림 워커, 패스스루 녹화, 런타임 자원, 저장된 등록 정보
+    state = cameras.remove(cam_id)
+    if state is not None:
+        _stop_stream(state)
+    rtsp_recorder.stop(cam_id)
+    await _release_runtime(cam_id, state)
+    await asyncio.to_thread(camera_store.remove, cam_id)
+
+async def _rebalance():
+    # 링 기준으로 이 노드 담당이 아닌 카메라를 새 담당 노드로 넘기고 로컬 상태 해제 (실패하면 다음 주기에 재시도)
+    moved = []
+    for state in cameras.states():
+        if shard.is_local(state.cam_id):
+            continue
+        node_id, url = shard.owner(state.cam_id)
+        configured = state.source or state.monitoring or (state.stream_config or {}).get("auto") is False
+        if configured and not await asyncio.to_thread(_handoff_camera, url, node_id, state):
+            shard_counters["handoff_failures"] += 1
+            continue
+        await _release_camera(state.cam_id)
+        shard_counters["handoffs"] += 1
+        moved.append(f"{state.cam_id}->{node_id}")
+    if moved:
+        print(f"🔀 [샤드 재배치] {', '.join(moved)}")
+
+async def _shard_loop():
+    while not shard.left:
+        changed = await asyncio.to_thread(shard.heartbeat)
+        if changed:
+            print(f"🧭 [샤드] 노드 구성 변경: {', '.join(sorted(shard.ring.nodes))}")
+        await _rebalance()
+        await asyncio.sleep(SHARD_HEARTBEAT_SEC)
+
+async def _warm_camera(state, semaphore, process_start):
+    # 저장된 RTSP 카메라 재연결: 검사(전송 방식 확정) -> 프레임 버스면 감시 카메라 캡처 프로세스를 미리 띄워 첫 프레임 대기
+    # 검사도 연결 시도이므로 RTSP 감독의 동시 재연결 상한을 따름 (실패하면 백오프/상태 전환)
+    source = state.source
+    async with semaphore:
+        while not rtsp_supervisor.try_begin(state.cam_id):
+            await asyncio.sleep(0.1)
+        active = await rtsp_prober.probe(source["url"], source.get("transport") or "auto")
+        rtsp_supervisor.end(state.cam_id, active is not None, None if active else "probe failed")
+    if active is None:
+        warm_restart["failed"].append(state.cam_id)
+        return
+    if source.get("transport") == "auto":
+        source["active_transport"] = active
+    if capture_hub is not None and state.monitoring:
+        ring = await asyncio.to_thread(capture_hub.ensure, state.cam_id, source["url"], source.get("transport") or "auto")
+        if await asyncio.to_thread(capture_hub.request_connect, state.cam_id):
+            deadline = time.time() + RTSP_PROBE_TIMEOUT_SEC
+            while ring.head_seq == 0 and time.time() < deadline:
+                await asyncio.sleep(0.05)
+        if ring.head_seq == 0:
+            warm_restart["failed"].append(state.cam_id)
+            return
+    # 연결된 시각을 활동으로 기록 (0이면 첫 유휴 점검에서 바로 유휴로 잡힘)
+    state.last_seen = time.time()
+    warm_restart["live"] += 1
+    warm_restart["cameras"][state.cam_id] = round(time.time() - process_start, 2)
+
+async def _warm_restart():
+    # 재시작/장애 후 저장된 카메라를 복구: 상태(소스/감시/스트림 설정)는 즉시, RTSP 재연결은 병렬로
+    process_start = psutil.Process().create_time()
+    saved = await asyncio.to_thread(camera_store.load)
+    rtsp_states = []
+    for entry in saved:
+        state = cameras.ensure(entry["cam_id"])
+        state.source = entry["source"]
+        state.monitoring = entry["monitoring"]
+        if entry["stream_config"]:
+            state.stream_config = entry["stream_config"]
+        _sync_rtsp_recording(state)
+        if state.source and state.source.get("type") == "rtsp":
+            rtsp_states.append(state)
+    warm_restart["restored"] = len(saved)
+    warm_restart["rtsp"] = len(rtsp_states)
+    semaphore = asyncio.Semaphore(max(RTSP_PROBE_CONCURRENCY, 1))
+    await asyncio.gather(*(_warm_camera(state, semaphore, process_start) for state in rtsp_states))
+    warm_restart["done"] = True
+    warm_restart["seconds_to_done"] = round(time.time() - process_start, 2)
+    warm_restart["seconds_to_all_live"] = warm_restart["seconds_to_done"] if not warm_restart["failed"] else None
+    if saved:
+        print(
+            f"♻️ [웜 재시작] {len(saved)}대 복구, RTSP 연결 {warm_restart['live']}/{len(rtsp_states)}, "
+            f"프로세스 시작 후 {time.time() - process_start:.1f}초"
+        )
 
 def create_offline_frame():
     img = np.zeros((480, 640, 3), dtype=np.uint8)
@@ -373,66 +963,147 @@ def mask_rtsp_url(ip, stream="sub", port=554, path=None):
     stream_path = path.lstrip("/") if path else ("stream1" if stream == "main" else "stream2")
     return f"{ip}:{port}/{stream_path}"
 
-def send_to_gateway(cam_id, status_msg, image_path=None):
-    try:
-        full_msg = f"{cam_id}:{status_msg}"
-        if image_path:
-            full_msg += f":{image_path}"
-        with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as s:
-            s.settimeout(2.0)
-            s.connect((PC_IP, PORT_GATEWAY))
-            s.sendall(full_msg.encode('utf-8'))
-            print(f"📡 [전송] {full_msg}") 
-    except Exception as e:
-        now = time.time()
-        key = f"gateway:{cam_id}"
-        if now - error_last_log.get(key, 0) > ERROR_LOG_COOLDOWN:
-            error_last_log[key] = now
-            print(f"❌ [전송 실패] {e}")
-
-def process_detection(cam_id, frame, current_time, require_verified_viewer):
-    annotated_frame, new_ids, _ = detector.detect_and_track(cam_id, frame)
-
-    if new_ids and (not require_verified_viewer or cam_id in verified_viewers):
-        original_cfg = stream_configs.get(cam_id, None)
-        if original_cfg:
-            stream_configs[cam_id] = {
-                "width": 1920,
-                "height": 1080,
-                "fps": max(original_cfg.get("fps", STREAM_FPS), 12),
-                "quality": 90,
-                "label": "alert-1080p",
-                "auto": False,
-            }
+def _sync_rtsp_recording(state):
+    # 감시 중인 RTSP 카메라만 패스스루 세그먼트 녹화를 유지 (듀얼 스트림이면 메인 스트림을 디코드 없이 복사)
+    source = state.source
+    if source and source.get("type") == "rtsp" and state.monitoring:
+        if source.get("main_url"):
+            url = source["main_url"]
+            transport = source.get("main_transport") or source.get("transport") or "tcp"
+        else:
+            url = source.get("url")
+            transport = source.get("active_transport") or source.get("transport") or "tcp"
+        rtsp_recorder.start(state.cam_id, url, transport)
+    else:
+        rtsp_recorder.stop(state.cam_id)
+
+def _start_event_recording(cam_id, current_time):
+    # RTSP 카메라는 스트림 복사 클립, 그 외(업로드 프레임)는 인코딩 녹화
+    if rtsp_recorder.is_active(cam_id):
+        rtsp_recorder.record_event(cam_id, current_time, pre_sec=RTSP_RECORD_PRE_SEC, post_sec=10.0)
+    else:
+        recorder.start_recording(cam_id, duration=10.0, current_time=current_time)
+
+def _extend_event_recording(cam_id, current_time):
+    if rtsp_recorder.is_active(cam_id):
+        rtsp_recorder.extend(cam_id, current_time)
+    else:
+        recorder.extend_recording(cam_id, current_time)
+
+def emit_status(cam_id, status_msg):
+    # 게이트웨이 상태 보고는 파이프라인 워커가 전송 (호출자는 막히지 않음)
+    ALERTS.inc(cam_id, status_msg.lower())
+    alert_pipeline.submit("gateway", AlertEvent(cam_id, "status", status_msg))
+
+def _alert_evidence_stage(event):
+    # 듀얼 스트림: 원본 해상도 프레임으로 스냅샷 (패스스루 녹화 세그먼트 -> 메인 스트림 순, 실패하면 탐지에 쓴 서브스트림 프레임)
+    state = cameras.get(event.cam_id)
+    source = state.source if state is not None else None
+    if source and source.get("main_url"):
+        frame, frame_ts, kind = evidence_grabber.evidence(
+            event.cam_id,
+            source["main_url"],
+            event.created,
+            source.get("transport") or "tcp",
+            source.get("main_transport"),
+        )
+        if frame is not None:
+            event.frame = frame
+            event.meta["evidence"] = kind
+            event.meta["evidence_ts"] = round(frame_ts, 3)
+            event.meta["evidence_offset_sec"] = round(frame_ts - event.created, 3)
+    alert_pipeline.submit("snapshot", event)
+
+def _alert_snapshot_stage(event):
+    event.image_path, event.jpeg_bytes = recorder.write_snapshot(event.cam_id, event.frame)
+    # 게이트웨이에는 카메라마다 자기 cam_id/스냅샷으로 바로 전송 (대시보드/로그가 카메라별로 남게)
+    alert_pipeline.submit("gateway", event)
+    # 텔레그램 알림만 묶음 창을 거침 (여러 카메라 동시 경보 -> 미디어 그룹 1건)
+    alert_coalescer.submit(event)
+
+def _dispatch_single_alert(event):
+    alert_pipeline.submit("notify", event)
+
+def _dispatch_alert_digest(events):
+    first = events[0]
+    digest = AlertEvent(first.cam_id, "digest", first.status, created=first.created, meta={"events": events})
+    alert_pipeline.submit("notify", digest)
+
+def _alert_notify_stage(event):
+    if event.kind == "digest":
+        notifier.send_media_group([(e.cam_id, e.frame, e.jpeg_bytes) for e in event.meta["events"]])
+        return
+    # 스냅샷에서 인코딩한 JPEG를 그대로 전송 (실패 시 원본 프레임으로 인코딩)
+    notifier.send_photo(event.cam_id, frame=event.frame, jpeg_bytes=event.jpeg_bytes)
+
+def _alert_record_stage(event):
+    _start_event_recording(event.cam_id, event.created)
+
+def _alert_gateway_stage(event):
+    meta = event.meta or None
+    # 발생 시각을 함께 보내 스풀 재전송 시에도 원래 시각으로 기록되게 함
+    send_to_gateway(event.cam_id, event.status, image_path=event.image_path, meta=meta, ts=event.created)
+
+def send_to_gateway(cam_id, status_msg, image_path=None, meta=None, ts=None):
+    # 지속 연결 클라이언트의 outbox에 넣기만 함 (게이트웨이가 내려가 있어도 막히지 않음)
+    gateway.send(cam_id, status_msg, image_path=image_path, meta=meta, ts=ts)
+    print(f"📡 [전송 예약] {cam_id}:{status_msg}")
+
+def process_detection(state, frame, current_time, require_verified_viewer, trace=None):
+    cam_id = state.cam_id
+    timings = {}
+    if trace is not None:
+        trace.mark("detect_start")
+    annotated_frame, new_ids, objects = detector.detect_and_track(cam_id, frame, timings)
+    if trace is not None:
+        _trace_point(trace, "detected")
+    for stage, seconds in timings.items():
+        STAGE_SECONDS.observe(seconds, cam_id, stage)
+    DETECTIONS.inc(cam_id)
+    if objects:
+        DETECTED_OBJECTS.inc(cam_id, amount=len(objects))
+
+    # 경보가 이어지는 동안(추적 중인 사람이 남아 있는 동안) 녹화를 연장
+    if objects and state.status == "DANGER":
+        _extend_event_recording(cam_id, current_time)
+
+    if new_ids and (not require_verified_viewer or state.verified):
+        # 경보 품질 부스트: 유지 시간 동안만 적용되고 자동 복귀 (예산 초과 시 기존 품질 유지)
+        alert_boost.request(cam_id, current_time)
         status_changed = False
-        if device_status.get(cam_id) != "DANGER":
-            device_status[cam_id] = "DANGER"
+        if state.status != "DANGER":
+            state.status = "DANGER"
             status_changed = True
-        last_danger_time[cam_id] = current_time
-
-        if current_time - last_alert_times.get(cam_id, 0) > ALERT_COOLDOWN:
-            img_path = recorder.save_snapshot(cam_id, frame)
-            notifier.send_photo(cam_id, frame)
-            recorder.start_recording(cam_id, duration=10.0, current_time=current_time)
-            send_to_gateway(cam_id, "침입자 감지(스냅샷)", image_path=img_path)
-            last_alert_times[cam_id] = current_time
+        state.last_danger = current_time
+
+        if current_time - state.last_alert > ALERT_COOLDOWN:
+            # 탐지 루프는 이벤트만 발행: 스냅샷 저장 -> (알림, 게이트웨이), 녹화 제어는 워커가 처리
+            event = AlertEvent(
+                cam_id,
+                "intrusion",
+                "침입자 감지(스냅샷)",
+                frame=frame,
+                created=current_time,
+                meta={"objects": len(objects)},
+            )
+            dual = state.source is not None and state.source.get("main_url")
+            alert_pipeline.submit("evidence" if dual else "snapshot", event)
+            alert_pipeline.submit("record", event)
+            ALERTS.inc(cam_id, "intrusion")
+            state.last_alert = current_time
         elif status_changed:
-            send_to_gateway(cam_id, "DANGER")
+            emit_status(cam_id, "DANGER")
 
-        last_heartbeat[cam_id] = current_time
-        if original_cfg:
-            stream_configs[cam_id] = original_cfg
+        state.last_heartbeat = current_time
 
-    elif not new_ids and device_status.get(cam_id) == "DANGER":
-        last_danger = last_danger_time.get(cam_id, 0)
-        last_alert = last_alert_times.get(cam_id, 0)
-        if current_time - last_danger < DANGER_HOLD_SEC:
+    elif not new_ids and state.status == "DANGER":
+        if current_time - state.last_danger < DANGER_HOLD_SEC:
             return annotated_frame, new_ids
-        if current_time - last_alert < DANGER_HOLD_SEC:
+        if current_time - state.last_alert < DANGER_HOLD_SEC:
             return annotated_frame, new_ids
-        device_status[cam_id] = "SAFE"
-        last_heartbeat[cam_id] = current_time
-        send_to_gateway(cam_id, "SAFE")
+        state.status = "SAFE"
+        state.last_heartbeat = current_time
+        emit_status(cam_id, "SAFE")
 
     return annotated_frame, new_ids
 
@@ -449,8 +1120,134 @@ def system_runtime():
         "cpu_usage_percent": cpu_usage,
     }
 
+@app.get("/system/recorder")
+def system_recorder():
+    # 관측용: 녹화 writer 큐에 머무르는 프레임 메모리
+    return {**recorder.stats(), "rtsp": rtsp_recorder.stats()}
+
+@app.get("/metrics")
+def metrics_endpoint():
+    # Prometheus 수집용 텍스트 형식 (단계별 지연 히스토그램, 프레임/경보 카운터, 큐 깊이)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+@app.get("/system/latency")
+def system_latency():
+    # 관측용: 캡처 시각 기준 지점별(picked/detected/encoded/sent) 지연 백분위, 샘플 타임라인 기록 상태
+    return frame_tracer.stats()
+
+@app.get("/system/event_loop")
+def system_event_loop(window_sec: float = 60.0):
+    # 관측용: 이벤트 루프 지연 (최근 window_sec 백분위 + 구간별 최대/평균 시계열)
+    return loop_lag.stats(window_sec=window_sec)
+
+@app.get("/system/alerts")
+def system_alerts():
+    # 관측용: 경보 파이프라인 단계별 큐 깊이/지연
+    return {
+        **alert_pipeline.stats(),
+        "coalescer": alert_coalescer.stats(),
+        "notifier": notifier.stats(),
+        "gateway": gateway.stats(),
+        "evidence": evidence_grabber.stats(),
+    }
+
+@app.get("/system/cameras")
+def system_cameras():
+    # 관측용: 카메라 상태 수, 보관 중인 프레임 메모리, 트래커 수
+    return {
+        **cameras.stats(),
+        "trackers": len(detector.trackers),
+        "idle_sec": CAMERA_IDLE_SEC,
+        "capture_backend": capture_backend(),
+        "frame_bus": capture_hub.stats() if capture_hub is not None else None,
+        "rtsp_probe": rtsp_prober.stats(),
+        "store": camera_store.stats(),
+        "warm_restart": warm_restart,
+    }
+
+@app.get("/system/rtsp")
+def system_rtsp():
+    # 관측용: RTSP 소스별 연결 상태(CONNECTING/LIVE/DEGRADED/DOWN), 연속 실패, 다음 재시도까지 남은 시간
+    return rtsp_supervisor.stats()
+
+@app.get("/system/shard")
+def system_shard():
+    if shard is None:
+        return {"enabled": False, "node_id": SHARD_NODE_ID}
+    return {
+        "enabled": True,
+        **shard.stats(),
+        **shard_counters,
+        "cameras": sorted(s.cam_id for s in cameras.states()),
+    }
+
+@app.get("/system/retention")
+def system_retention():
+    # 관측용: 녹화 디스크 사용량 및 보관 정책으로 회수한 용량
+    return retention.stats()
+
+@app.get("/recordings/search")
+def search_recordings(
+    cam_id: str = None,
+    kind: str = None,
+    start: str = None,
+    end: str = None,
+    cursor: str = None,
+    limit: int = 50,
+):
+    # 카탈로그 검색 (최신순, next_cursor로 다음 페이지)
+    limit = max(1, min(int(limit), 200))
+    try:
+        items, next_cursor = catalog.search(
+            cam_id=cam_id,
+            kind=kind,
+            start=_parse_time_param(start),
+            end=_parse_time_param(end),
+            cursor=cursor,
+            limit=limit,
+        )
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    for item in items:
+        item["url"] = f"/recordings/{item['filename']}"
+        item["play_url"] = f"/recordings/play/{item['id']}"
+    return {"status": "ok", "count": len(items), "items": items, "next_cursor": next_cursor}
+
+@app.get("/recordings/play/{rec_id}")
+def play_recording(rec_id: int, request: Request):
+    item = catalog.get(rec_id)
+    if item is None:
+        raise HTTPException(status_code=404, detail="Recording not found")
+    path = os.path.join("recordings", item["filename"])
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="File not found")
+    media_type = "video/mp4" if item["kind"] == "clip" else "image/jpeg"
+    return _file_range_response(path, request.headers.get("range"), media_type)
+
+def _upload_trace(state, request, received):
+    # 로봇이 X-Capture-Ts(epoch 초)/X-Frame-Seq를 보내면 그 값을 사용 (시계가 60초 넘게 어긋나면 수신 시각)
+    state.capture_seq += 1
+    seq, capture_ts = state.capture_seq, received
+    try:
+        client_ts = float(request.headers.get("x-capture-ts", ""))
+        if abs(received - client_ts) <= 60.0:
+            capture_ts = client_ts
+    except ValueError:
+        pass
+    try:
+        seq = int(request.headers.get("x-frame-seq", ""))
+    except ValueError:
+        pass
+    trace = FrameTrace(state.cam_id, seq, "upload", capture_ts)
+    _trace_point(trace, "picked")
+    return trace
+
 @app.post("/upload_frame/{robot_id}")
-async def upload_frame(robot_id: str, file: UploadFile = File(...)):
+async def upload_frame(robot_id: str, request: Request, file: UploadFile = File(...)):
+    redirect = _shard_redirect(request, robot_id)
+    if redirect is not None:
+        return redirect
+    received = time.time()
     try:
         contents = await file.read()
         nparr = np.frombuffer(contents, np.uint8)
@@ -458,42 +1255,50 @@ async def upload_frame(robot_id: str, file: UploadFile = File(...)):
         if frame is None: return {"status": "fail"}
 
         current_time = time.time()
-        last_seen[robot_id] = current_time
+        state = cameras.ensure(robot_id)
+        state.last_seen = current_time
+        trace = _upload_trace(state, request, received)
 
         # 스트리밍용 프레임은 항상 최신으로 유지
-        camera_streams[robot_id] = frame
+        state.frame = frame
+        state.frame_trace = trace
         # 감시 활성 상태가 아니라면 탐지/알림은 생략 (스트림 연결과 분리)
-        if robot_id not in monitoring_enabled:
+        if not state.monitoring:
             return {"status": "ignored"}
 
         annotated_frame, new_ids = process_detection(
-            robot_id,
+            state,
             frame,
             current_time,
             require_verified_viewer=True,
+            trace=trace,
         )
 
-        recorder.process_frame(robot_id, frame, current_time)
+        # 업로드된 JPEG 원본을 그대로 사전 녹화 버퍼에 넘겨 재인코딩을 피함
+        recorder.process_frame(robot_id, frame, current_time, jpeg_bytes=contents)
 
-        if current_time - last_heartbeat.get(robot_id, 0) >= 600:
-            if robot_id in verified_viewers and device_status.get(robot_id) != "DANGER":
-                send_to_gateway(robot_id, "SAFE")
-                last_heartbeat[robot_id] = current_time
+        if current_time - state.last_heartbeat >= 600:
+            if state.verified and state.status != "DANGER":
+                emit_status(robot_id, "SAFE")
+                state.last_heartbeat = current_time
 
-        camera_streams[robot_id] = annotated_frame
+        state.frame = annotated_frame
         return {"status": "ok"}
     except Exception as e:
         print(f"❌ [upload_frame 오류] {robot_id}: {e}")
         return {"status": "error"}
 
-@app.post("/cameras/register")
-async def register_camera(payload: dict):
+def _parse_registration(payload):
     cam_id = str(payload.get("cam_id", "")).strip()
     ip = str(payload.get("ip", "")).strip()
     username = str(payload.get("username", "")).strip()
     password = str(payload.get("password", "")).strip()
-    stream = str(payload.get("stream", "sub")).strip().lower() or "sub"
     path = str(payload.get("path", "")).strip() or None
+    main_path = str(payload.get("main_path", "")).strip() or None
+    # sub(기본) | main | dual(서브스트림은 탐지/미리보기, 메인 스트림은 경보 스냅샷/녹화용)
+    # 메인 스트림 경로를 알 때만 dual: main_path를 줬거나 기본 경로 배치(stream1/stream2)일 때
+    default_stream = "dual" if main_path else "sub"
+    stream = str(payload.get("stream", default_stream)).strip().lower() or default_stream
     port_raw = payload.get("port", 554)
     transport = str(payload.get("transport", "auto")).strip().lower() or "auto"
     if transport not in ("tcp", "udp", "auto"):
@@ -502,103 +1307,331 @@ async def register_camera(payload: dict):
         port = int(port_raw)
     except Exception:
         port = 554
-    if stream not in ("sub", "main"):
-        stream = "sub"
+    if stream not in ("sub", "main", "dual"):
+        stream = default_stream
 
     if not cam_id or not ip:
         raise HTTPException(status_code=400, detail="cam_id and ip are required")
+    if stream == "dual" and path and not main_path:
+        # 사용자 지정 경로에서는 메인 스트림 경로(stream1)를 추측하지 않음
+        raise HTTPException(status_code=400, detail="main_path is required for stream=dual with a custom path")
+    return {
+        "cam_id": cam_id,
+        "stream": stream,
+        "transport": transport,
+        "url": build_rtsp_url(ip, username, password, "main" if stream == "main" else "sub", port=port, path=path),
+        "masked": mask_rtsp_url(ip, "main" if stream == "main" else "sub", port=port, path=path),
+        "main_url": build_rtsp_url(ip, username, password, "main", port=port, path=main_path) if stream == "dual" else None,
+    }
 
-    rtsp_url = build_rtsp_url(ip, username, password, stream, port=port, path=path)
-    masked = mask_rtsp_url(ip, stream, port=port, path=path)
-
+async def _probe_and_register(reg):
+    # 연결 검사는 전용 스레드 풀 + 자식 프로세스에서 실행 (스트림/다른 요청이 멈추지 않음)
+    # 듀얼 스트림은 서브/메인을 동시에 검사 (메인만 실패하면 서브스트림 단일로 등록)
+    cam_id, transport, stream = reg["cam_id"], reg["transport"], reg["stream"]
+    probes = [rtsp_prober.probe(reg["url"], transport)]
+    if reg["main_url"]:
+        probes.append(rtsp_prober.probe(reg["main_url"], transport))
     try:
-        active_transport = None
-        if transport == "auto":
-            if _test_rtsp_connection(rtsp_url, "udp"):
-                active_transport = "udp"
-            elif _test_rtsp_connection(rtsp_url, "tcp"):
-                active_transport = "tcp"
-            else:
-                raise HTTPException(status_code=400, detail="RTSP connection failed")
-        else:
-            if not _test_rtsp_connection(rtsp_url, transport):
-                raise HTTPException(status_code=400, detail="RTSP connection failed")
-    except HTTPException:
-        raise
+        results = await asyncio.gather(*probes)
     except Exception:
         raise HTTPException(status_code=500, detail="RTSP connection error")
+    active_transport = results[0]
+    if active_transport is None:
+        raise HTTPException(status_code=400, detail="RTSP connection failed")
 
-    source_info = {"type": "rtsp", "url": rtsp_url, "transport": transport}
-    if transport == "auto" and active_transport:
+    source_info = {"type": "rtsp", "url": reg["url"], "transport": transport}
+    if transport == "auto":
         source_info["active_transport"] = active_transport
-    camera_sources[cam_id] = source_info
-    print(f"[rtsp] registered {cam_id} -> {masked}")
+    if reg["main_url"]:
+        if results[1] is not None:
+            source_info["main_url"] = reg["main_url"]
+            if transport == "auto":
+                source_info["main_transport"] = results[1]
+        else:
+            stream = "sub"
+            print(f"⚠️ [rtsp] {cam_id} 메인 스트림 연결 실패: 서브스트림만 사용")
+    state = cameras.ensure(cam_id)
+    state.source = source_info
+    _sync_rtsp_recording(state)
+    await asyncio.to_thread(camera_store.save, state, masked_url=reg["masked"], stream=stream)
+    print(f"[rtsp] registered {cam_id} -> {reg['masked']} ({active_transport}, {stream})")
     return {"status": "connected", "cam_id": cam_id, "stream": stream}
 
+@app.post("/cameras/register")
+async def register_camera(payload: dict, request: Request):
+    reg = _parse_registration(payload)
+    redirect = _shard_redirect(request, reg["cam_id"])
+    if redirect is not None:
+        return redirect
+    return await _probe_and_register(reg)
+
+def _forward_registrations(url, node_id, items):
+    # 다른 노드 담당 카메라 묶음은 그 노드의 일괄 등록으로 전달
+    try:
+        resp = shard.session.post(
+            f"{url}/cameras/register_many?{urlencode({'_shard': node_id})}",
+            json={"cameras": items},
+            timeout=RTSP_PROBE_TIMEOUT_SEC * (len(items) / max(RTSP_PROBE_CONCURRENCY, 1) + 2),
+        )
+        resp.raise_for_status()
+        return resp.json().get("results", [])
+    except Exception as e:
+        return [
+            {"cam_id": str(item.get("cam_id", "")), "status": "error", "code": 502, "detail": f"shard {node_id}: {e}"}
+            for item in items
+        ]
+
+@app.post("/cameras/register_many")
+async def register_many(payload: dict, request: Request):
+    # 일괄 등록: 동시 검사 수를 제한해 병렬로 검사하고 카메라별 결과를 돌려줌 (일부 실패해도 200)
+    items = payload.get("cameras")
+    if not isinstance(items, list) or not items:
+        raise HTTPException(status_code=400, detail="cameras must be a non-empty list")
+    if len(items) > RTSP_PROBE_MAX_BATCH:
+        raise HTTPException(status_code=400, detail=f"at most {RTSP_PROBE_MAX_BATCH} cameras per request")
+    limit = RTSP_PROBE_CONCURRENCY
+    try:
+        limit = max(1, min(int(payload.get("concurrency", limit)), RTSP_PROBE_CONCURRENCY))
+    except (TypeError, ValueError):
+        pass
+    semaphore = asyncio.Semaphore(limit)
+    local_shard = shard is None or bool(request.query_params.get("_shard"))
+    forwards = {}
+
+    async def register_item(index, item):
+        try:
+            if not isinstance(item, dict):
+                raise HTTPException(status_code=400, detail="camera entry must be an object")
+            reg = _parse_registration(item)
+            if not local_shard and not shard.is_local(reg["cam_id"]):
+                forwards.setdefault(shard.owner(reg["cam_id"]), []).append((index, item))
+                return None
+            async with semaphore:
+                return await _probe_and_register(reg)
+        except HTTPException as e:
+            cam_id = str(item.get("cam_id", "")) if isinstance(item, dict) else ""
+            return {"cam_id": cam_id, "status": "error", "code": e.status_code, "detail": e.detail}
+
+    start = time.time()
+    results = list(await asyncio.gather(*(register_item(i, item) for i, item in enumerate(items))))
+    groups = list(forwards.items())
+    forwarded = await asyncio.gather(*(
+        asyncio.to_thread(_forward_registrations, url, node_id, [item for _, item in entries])
+        for (node_id, url), entries in groups
+    ))
+    for ((node_id, _), entries), group_results in zip(groups, forwarded):
+        for (index, _), result in zip(entries, group_results):
+            results[index] = {**result, "node": node_id}
+    connected = sum(1 for r in results if r and r.get("status") == "connected")
+    print(f"[rtsp] register_many: {connected}/{len(items)} connected in {time.time() - start:.1f}s")
+    return {
+        "status": "ok",
+        "connected": connected,
+        "failed": len(items) - connected,
+        "elapsed_sec": round(time.time() - start, 2),
+        "results": results,
+    }
+
 @app.post("/cameras/unregister/{cam_id}")
-async def unregister_camera(cam_id: str):
-    camera_sources.pop(cam_id, None)
-    stream_configs.pop(cam_id, None)
-    stream_jpeg_cache.pop(cam_id, None)
-    last_stream_sent.pop(cam_id, None)
-    last_detect_time.pop(cam_id, None)
-    last_annotated_frames.pop(cam_id, None)
-    monitoring_enabled.discard(cam_id)
-    active_viewers.discard(cam_id)
-    verified_viewers.discard(cam_id)
-    if cam_id in stream_stop_events:
-        stream_stop_events[cam_id].set()
+async def unregister_camera(cam_id: str, request: Request):
+    redirect = _shard_redirect(request, cam_id)
+    if redirect is not None:
+        return redirect
+    await _release_camera(cam_id)
+    return {"status": "ok", "cam_id": cam_id}
+
+def _adopted_source(source):
+    # 인계받은 소스는 등록 때와 같은 형태(RTSP 주소 + 전송 방식)만 허용
+    if not source:
+        return None
+    if not isinstance(source, dict) or source.get("type") != "rtsp":
+        raise HTTPException(status_code=400, detail="source must be an rtsp source")
+    for key in ("url", "main_url"):
+        value = source.get(key)
+        if key == "url" or value is not None:
+            if not isinstance(value, str) or not value.startswith(("rtsp://", "rtsps://")):
+                raise HTTPException(status_code=400, detail=f"source.{key} must be an rtsp:// url")
+    for key in ("transport", "active_transport", "main_transport"):
+        if source.get(key) not in (None, "tcp", "udp", "auto"):
+            raise HTTPException(status_code=400, detail=f"invalid source.{key}")
+    return source
+
+@app.post("/cameras/adopt")
+async def adopt_camera(payload: dict, request: Request):
+    # 샤드 재배치: 이전 담당 노드가 넘긴 카메라를 채택 (노드 간 내부용, 샤드 모드 + 토큰 필수)
+    if shard is None:
+        raise HTTPException(status_code=404, detail="sharding is disabled")
+    if not hmac.compare_digest(request.headers.get("X-Shard-Token", ""), SHARD_TOKEN):
+        raise HTTPException(status_code=403, detail="invalid shard token")
+    cam_id = str(payload.get("cam_id", "")).strip()
+    if not cam_id:
+        raise HTTPException(status_code=400, detail="cam_id is required")
+    if not shard.is_local(cam_id):
+        # 이 노드의 링 기준 담당이 아니면 거절 (보낸 노드는 다음 재배치 주기에 다시 시도)
+        node_id, _ = shard.owner(cam_id)
+        raise HTTPException(status_code=409, detail=f"camera {cam_id} belongs to node {node_id}")
+    source = _adopted_source(payload.get("source"))
+    state = cameras.ensure(cam_id)
+    state.source = source or state.source
+    state.monitoring = bool(payload.get("monitoring"))
+    if payload.get("stream_config"):
+        state.stream_config = payload["stream_config"]
+    _sync_rtsp_recording(state)
+    await asyncio.to_thread(camera_store.save, state)
+    shard_counters["adopted"] += 1
+    print(f"🔀 [샤드 채택] {cam_id}")
     return {"status": "ok", "cam_id": cam_id}
 
+def _require_admin(request):
+    # 관리자 엔드포인트: ADMIN_TOKEN 미설정이면 없는 것처럼 404, 토큰이 다르면 403
+    if not ADMIN_TOKEN:
+        raise HTTPException(status_code=404, detail="admin endpoints are disabled")
+    if not hmac.compare_digest(request.headers.get("X-Admin-Token", ""), ADMIN_TOKEN):
+        raise HTTPException(status_code=403, detail="invalid admin token")
+
+@app.post("/admin/profile/start")
+async def admin_profile_start(request: Request, mode: str = "sample", seconds: float = 30.0, hz: int = 100):
+    # 루프 스레드에서 켜야 cProfile이 스트림 워커/탐지/핸들러를 기록함 (async 핸들러)
+    _require_admin(request)
+    try:
+        return profiler.start(asyncio.get_running_loop(), mode=mode, seconds=seconds, hz=hz)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+
+@app.post("/admin/profile/stop")
+async def admin_profile_stop(request: Request):
+    _require_admin(request)
+    result = profiler.stop()
+    if result is None:
+        raise HTTPException(status_code=409, detail="no profile is running")
+    return result
+
+@app.get("/admin/profile")
+def admin_profile_status(request: Request):
+    _require_admin(request)
+    return profiler.stats()
+
+@app.get("/admin/profile/files/{name}")
+def admin_profile_download(name: str, request: Request):
+    # .folded: flamegraph.pl / speedscope / inferno, .prof: snakeviz / flameprof, .snapshot: tracemalloc.Snapshot.load
+    _require_admin(request)
+    path = profiler.path(name) or memory_profiler.path(name)
+    if path is None or not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="profile file not found")
+    return FileResponse(path, media_type="application/octet-stream", filename=name)
+
+@app.post("/admin/profile/memory/start")
+def admin_memory_start(request: Request, frames: int = 16):
+    _require_admin(request)
+    return memory_profiler.start(frames)
+
+@app.post("/admin/profile/memory/stop")
+def admin_memory_stop(request: Request):
+    _require_admin(request)
+    return memory_profiler.stop()
+
+@app.get("/admin/profile/memory")
+def admin_memory_snapshot(request: Request, top: int = 25, code_only: bool = True, dump: bool = False):
+    # tracemalloc 스냅샷(코드 줄별 할당, 직전 스냅샷 대비 증가) + 프레임을 보관하는 곳별 메모리
+    _require_admin(request)
+    try:
+        result = memory_profiler.snapshot(top=top, code_only=code_only, dump=dump)
+    except RuntimeError as e:
+        raise HTTPException(status_code=409, detail=str(e))
+    result["holders"] = {
+        "cameras": {
+            s.cam_id: {
+                "frame_kb": round(s.frame.nbytes / 1024, 1) if s.frame is not None else 0,
+                "annotated_kb": round(s.annotated_frame.nbytes / 1024, 1) if s.annotated_frame is not None else 0,
+                "jpeg_kb": round(len(s.jpeg) / 1024, 1) if s.jpeg is not None else 0,
+            }
+            for s in cameras.states()
+        },
+        "recorder": recorder.stats(),
+    }
+    return result
+
 @app.get("/video_feed/{cam_id}")
 async def video_feed(cam_id: str, request: Request):
+    redirect = _shard_redirect(request, cam_id)
+    if redirect is not None:
+        return redirect
+
     async def generate():
-        active_viewers.add(cam_id)
-        viewer_counts[cam_id] = viewer_counts.get(cam_id, 0) + 1
-        if viewer_counts[cam_id] == 1:
-            send_to_gateway(cam_id, "CONNECTED")
-            verified_viewers.add(cam_id)
-        await ensure_stream_task(cam_id)
-        def make_payload(buf_bytes):
-            return b'--frame\r\nContent-Type: image/jpeg\r\n\r\n' + buf_bytes + b'\r\n'
+        state = cameras.ensure(cam_id)
+        state.viewers += 1
+        if state.viewers == 1:
+            emit_status(cam_id, "CONNECTED")
+            state.verified = True
+        await ensure_stream_task(state)
+        def make_payload(buf_bytes, trace=None, now=None):
+            head = b'--frame\r\nContent-Type: image/jpeg\r\n'
+            if trace is not None:
+                # 프레임별 캡처 일련번호/시각과 전송 시점의 경과 시간 (대시보드 화면이 얼마나 오래된 것인지)
+                head += (
+                    f"X-Frame-Seq: {trace.seq}\r\n"
+                    f"X-Capture-Ts: {trace.capture_ts:.3f}\r\n"
+                    f"X-Frame-Age-Ms: {(now - trace.capture_ts) * 1000:.1f}\r\n"
+                ).encode("ascii")
+            return head + b'\r\n' + buf_bytes + b'\r\n'
+        sent_seq = state.jpeg_seq
         try:
             while True:
                 if await request.is_disconnected():
                     break
+                # 해제/다른 노드로 재배치된 카메라: 응답을 끝내 클라이언트가 다시 연결(리다이렉트)하게 함
+                if cameras.get(cam_id) is not state:
+                    break
                 await asyncio.sleep(0.03)
-                cache_entry = stream_jpeg_cache.get(cam_id)
                 buf_bytes = None
+                trace = None
                 now = time.time()
-                if cache_entry is not None:
-                    cached_bytes, cached_ts = cache_entry
-                    if now - cached_ts <= STALE_FRAME_SEC:
-                        buf_bytes = cached_bytes
+                kind = "offline"
+                if state.jpeg is not None and now - state.jpeg_ts <= STALE_FRAME_SEC:
+                    buf_bytes = state.jpeg
+                    trace = state.jpeg_trace
+                    # 이 뷰어가 받기 전에 새 JPEG로 덮어써진 프레임 수 / 같은 JPEG 재전송 여부
+                    seq = state.jpeg_seq
+                    if seq - sent_seq > 1:
+                        FRAMES_DROPPED.inc(cam_id, "viewer_skip", amount=seq - sent_seq - 1)
+                    kind = "new" if seq != sent_seq else "repeat"
+                    sent_seq = seq
                 if buf_bytes is None:
-                    cfg = stream_configs.get(cam_id, DEFAULT_STREAM_CONFIG)
+                    cfg = state.stream_config or DEFAULT_STREAM_CONFIG
                     offline_buf = _encode_jpeg(offline_frame, cfg.get("quality", JPEG_QUALITY))
                     if offline_buf is not None:
                         buf_bytes = offline_buf.tobytes()
                 if buf_bytes is None:
                     continue
                 try:
-                    yield make_payload(buf_bytes)
+                    start = time.perf_counter()
+                    yield make_payload(buf_bytes, trace, now)
+                    STAGE_SECONDS.observe(time.perf_counter() - start, cam_id, "viewer_send")
+                    VIEWER_FRAMES.inc(cam_id, kind)
+                    if trace is not None and kind == "new":
+                        age = trace.sent(time.time())
+                        frame_tracer.observe(cam_id, "sent", age)
+                        FRAME_AGE.observe(age, cam_id, "sent")
                 except Exception:
                     break
         finally:
-            active_viewers.discard(cam_id)
-            viewer_counts[cam_id] = max(0, viewer_counts.get(cam_id, 1) - 1)
-            if viewer_counts.get(cam_id, 0) == 0:
-                send_to_gateway(cam_id, "DISCONNECTED")
-                verified_viewers.discard(cam_id)
-                if cam_id in stream_stop_events:
-                    stream_stop_events[cam_id].set()
-            last_stream_sent.pop(cam_id, None)
-            last_detect_time.pop(cam_id, None)
-            last_annotated_frames.pop(cam_id, None)
+            state.viewers = max(0, state.viewers - 1)
+            if state.viewers == 0:
+                emit_status(cam_id, "DISCONNECTED")
+                state.verified = False
+                _stop_stream(state)
+            state.last_stream_sent = 0.0
+            state.last_detect = 0.0
+            state.annotated_frame = None
     return StreamingResponse(generate(), media_type="multipart/x-mixed-replace; boundary=frame")
 
 @app.post("/streams/config/{cam_id}")
-async def update_stream_config(cam_id: str, payload: dict):
+async def update_stream_config(cam_id: str, payload: dict, request: Request):
+    redirect = _shard_redirect(request, cam_id)
+    if redirect is not None:
+        return redirect
     width = payload.get("width", DEFAULT_STREAM_CONFIG["width"])
     height = payload.get("height", DEFAULT_STREAM_CONFIG["height"])
     fps = payload.get("fps", DEFAULT_STREAM_CONFIG["fps"])
@@ -612,7 +1645,8 @@ async def update_stream_config(cam_id: str, payload: dict):
         raise HTTPException(status_code=400, detail="Invalid stream config")
 
     label = payload.get("label")
-    stream_configs[cam_id] = {
+    state = cameras.ensure(cam_id)
+    state.stream_config = {
         "width": max(1, width),
         "height": max(1, height),
         "fps": max(0.1, fps),
@@ -620,43 +1654,74 @@ async def update_stream_config(cam_id: str, payload: dict):
         "label": label or _match_preset_label({"width": width, "height": height}),
         "auto": False,
     }
-    return {"status": "ok", "cam_id": cam_id, "config": stream_configs[cam_id]}
+    await asyncio.to_thread(camera_store.save, state)
+    return {"status": "ok", "cam_id": cam_id, "config": state.stream_config}
 
 @app.get("/streams/config/{cam_id}")
-async def get_stream_config(cam_id: str):
-    cfg = stream_configs.get(cam_id, DEFAULT_STREAM_CONFIG)
+async def get_stream_config(cam_id: str, request: Request):
+    redirect = _shard_redirect(request, cam_id)
+    if redirect is not None:
+        return redirect
+    state = cameras.get(cam_id)
+    cfg = (state.stream_config if state is not None else None) or DEFAULT_STREAM_CONFIG
     return {"status": "ok", "cam_id": cam_id, "config": cfg}
 
 @app.get("/streams/configs")
 async def get_stream_configs():
-    return {"status": "ok", "configs": stream_configs}
+    configs = {s.cam_id: s.stream_config for s in cameras.states() if s.stream_config is not None}
+    return {"status": "ok", "configs": configs}
+
+@app.get("/streams/boosts")
+async def get_stream_boosts():
+    return {"status": "ok", "boosts": alert_boost.status(time.time())}
 
 @app.post("/update_mode/{robot_id}")
 async def update_mode(robot_id: str, mode_data: dict):
     mode = mode_data.get("mode", "UNKNOWN")
-    send_to_gateway(robot_id, "CONTROL" if mode == "CONTROL" else "MONITOR")
+    emit_status(robot_id, "CONTROL" if mode == "CONTROL" else "MONITOR")
     return {"status": "success"}
 
 @app.post("/stop_monitoring/{cam_id}")
-def stop_monitoring(cam_id: str):
-    return stop_monitoring_explicit(cam_id)
+def stop_monitoring(cam_id: str, request: Request):
+    return stop_monitoring_explicit(cam_id, request)
 
 @app.post("/monitoring/start/{cam_id}")
-def start_monitoring(cam_id: str):
-    monitoring_enabled.add(cam_id)
-    device_status[cam_id] = device_status.get(cam_id, "SAFE")
+def start_monitoring(cam_id: str, request: Request):
+    redirect = _shard_redirect(request, cam_id)
+    if redirect is not None:
+        return redirect
+    state = cameras.ensure(cam_id)
+    state.monitoring = True
+    _sync_rtsp_recording(state)
+    camera_store.save(state)
     return {"status": "monitoring_enabled"}
 
 @app.post("/monitoring/stop/{cam_id}")
-def stop_monitoring_explicit(cam_id: str):
+def stop_monitoring_explicit(cam_id: str, request: Request):
+    redirect = _shard_redirect(request, cam_id)
+    if redirect is not None:
+        return redirect
     # 감시 비활성화: 탐지/알림 중단(스트리밍과 무관)
-    monitoring_enabled.discard(cam_id)
-    active_viewers.discard(cam_id)
-    verified_viewers.discard(cam_id)
-    device_status[cam_id] = "SAFE"
-    send_to_gateway(cam_id, "DISCONNECTED")
+    state = cameras.ensure(cam_id)
+    state.monitoring = False
+    state.verified = False
+    state.status = "SAFE"
+    _sync_rtsp_recording(state)
+    camera_store.save(state)
+    emit_status(cam_id, "DISCONNECTED")
     return {"status": "disconnected"}
 
+# 경보 파이프라인 단계 등록 (핸들러 정의 이후)
+alert_pipeline.add_stage("evidence", _alert_evidence_stage, workers=EVIDENCE_WORKERS)
+alert_pipeline.add_stage("snapshot", _alert_snapshot_stage)
+alert_pipeline.add_stage("notify", _alert_notify_stage)
+alert_pipeline.add_stage("record", _alert_record_stage)
+alert_pipeline.add_stage("gateway", _alert_gateway_stage)
+alert_coalescer = AlertCoalescer(_dispatch_single_alert, _dispatch_alert_digest, window_sec=ALERT_COALESCE_SEC)
+
+# recordings 폴더 개방 (/recordings/search 등 API 라우트가 먼저 매칭되도록 마지막에 마운트)
+app.mount("/recordings", StaticFiles(directory="recordings"), name="recordings")
+
 if __name__ == "__main__":
     if sys.platform == 'win32':
         from asyncio.proactor_events import _ProactorBasePipeTransport
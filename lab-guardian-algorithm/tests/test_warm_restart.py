@@ -0,0 +1,77 @@
+import asyncio
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class _Ring:
+    head_seq = 1
+
+
+class _FakeCaptureHub:
+    """캡처 프로세스 대신: ensure/stop 호출만 기록"""
+
+    def __init__(self):
+        self.running = set()
+
+    def ensure(self, cam_id, url, transport):
+        self.running.add(cam_id)
+        return _Ring()
+
+    def request_connect(self, cam_id):
+        return True
+
+    def stop(self, cam_id):
+        self.running.discard(cam_id)
+
+
+@pytest.fixture
+def app(tmp_path, monkeypatch):
+    for key, value in {
+        "PC_IP": "127.0.0.1",
+        "TELEGRAM_TOKEN": "x",
+        "TELEGRAM_CHAT_ID": "1",
+        "GATEWAY_SPOOL_MAX_BYTES": "0",
+        "CAMERA_WARM_RESTART": "0",
+    }.items():
+        monkeypatch.setenv(key, value)
+    monkeypatch.chdir(tmp_path)
+    import main
+
+    hub = _FakeCaptureHub()
+
+    async def probe(url, transport):
+        return "tcp"
+
+    saved = [{
+        "cam_id": "CAM_1",
+        "source": {"type": "rtsp", "url": "rtsp://127.0.0.1:554/stream2", "transport": "auto"},
+        "monitoring": True,
+        "stream_config": None,
+    }]
+    monkeypatch.setattr(main, "capture_hub", hub)
+    monkeypatch.setattr(main.rtsp_prober, "probe", probe)
+    monkeypatch.setattr(main.camera_store, "load", lambda: saved)
+    monkeypatch.setattr(main, "_sync_rtsp_recording", lambda state: None)
+    yield main, hub
+    main.cameras.remove("CAM_1")
+    main.rtsp_supervisor.remove("CAM_1")
+
+
+def test_idle_reap_keeps_warmed_capture(app):
+    main, hub = app
+
+    async def scenario():
+        await main._warm_restart()
+        assert main.warm_restart["live"] >= 1
+        now = time.time()
+        await main._idle_reap(now + main.CAMERA_IDLE_SEC)
+
+    asyncio.run(scenario())
+    assert "CAM_1" in hub.running
+    assert main.cameras.get("CAM_1") is not None
+    assert main.rtsp_supervisor.stats()["sources"].get("CAM_1") is not None
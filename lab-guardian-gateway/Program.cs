@@ -216,120 +216,195 @@ while (!cts.IsCancellationRequested)
             string clientIp = endPoint?.Address.ToString() ?? "Unknown";
 
             using var stream = client.GetStream();
-            var buffer = new byte[2048];
+            var buffer = new byte[64 * 1024];
+            var pending = new List<byte>();
+            const int MaxPendingBytes = 64 * 1024;
+            const byte FrameMarker = 0x00;
+            const byte FrameVersion = 1;
+            const int FrameHeaderSize = 6;
+            const int MaxFrameBytes = 1024 * 1024;
+            bool? binaryFramed = null;
             
             while (true)
             {
                 int n = await stream.ReadAsync(buffer, 0, buffer.Length);
-                if (n == 0) break;
-
-                string rawData = Encoding.UTF8.GetString(buffer, 0, n).Trim();
-                
-                if (string.IsNullOrEmpty(rawData) || rawData.StartsWith("GET") || rawData.Contains("HTTP")) continue; 
-
-                // 1. 데이터 파싱
-                string deviceId = "Unknown";
-                string status = "SAFE";
-                string? imagePath = null;
-
-                if (rawData.Contains(':')) {
-                    string[] parts = rawData.Split(':', 3);
-                    deviceId = parts.Length > 0 ? parts[0] : "Unknown";
-                    status = parts.Length > 1 ? parts[1] : "SAFE";
-                    if (parts.Length > 2) imagePath = parts[2];
+                bool eof = n == 0;
+                if (eof && (pending.Count == 0 || binaryFramed == true)) break;
+
+                var messages = new List<(string DeviceId, string Status, string? ImagePath, DateTime CreatedAt, JsonElement? Meta)>();
+
+                // 연결의 첫 바이트가 0x00이면 길이 접두 바이너리 프레임, 아니면 텍스트
+                binaryFramed ??= pending.Count == 0 && buffer[0] == FrameMarker;
+
+                if (binaryFramed == true) {
+                    // [0x00][버전 1B][길이 4B big-endian][JSON 이벤트 배열]. 프레임이 여러 읽기에 나뉘어 올 수 있음
+                    pending.AddRange(new ArraySegment<byte>(buffer, 0, n));
+                    int consumed = 0;
+                    var frameBytes = pending.ToArray();
+                    while (frameBytes.Length - consumed >= FrameHeaderSize) {
+                        byte version = frameBytes[consumed + 1];
+                        int length = (frameBytes[consumed + 2] << 24) | (frameBytes[consumed + 3] << 16)
+                                   | (frameBytes[consumed + 4] << 8) | frameBytes[consumed + 5];
+                        if (frameBytes[consumed] != FrameMarker || version != FrameVersion || length < 0 || length > MaxFrameBytes) {
+                            throw new InvalidDataException($"잘못된 프레임 헤더 (version={version}, length={length})");
+                        }
+                        if (frameBytes.Length - consumed - FrameHeaderSize < length) break;
+
+                        // 이벤트: [cam_id, status, ts_ms, image_path, meta]
+                        using var doc = JsonDocument.Parse(new ReadOnlyMemory<byte>(frameBytes, consumed + FrameHeaderSize, length));
+                        foreach (var item in doc.RootElement.EnumerateArray()) {
+                            int fields = item.GetArrayLength();
+                            string camId = fields > 0 ? item[0].GetString() ?? "Unknown" : "Unknown";
+                            string eventStatus = fields > 1 ? item[1].GetString() ?? "SAFE" : "SAFE";
+                            DateTime createdAt = fields > 2 && item[2].ValueKind == JsonValueKind.Number
+                                ? DateTimeOffset.FromUnixTimeMilliseconds(item[2].GetInt64()).LocalDateTime
+                                : DateTime.Now;
+                            string? path = fields > 3 && item[3].ValueKind == JsonValueKind.String ? item[3].GetString() : null;
+                            JsonElement? meta = fields > 4 && item[4].ValueKind == JsonValueKind.Object ? item[4].Clone() : null;
+                            messages.Add((camId, eventStatus, path, createdAt, meta));
+                        }
+                        consumed += FrameHeaderSize + length;
+                    }
+                    if (consumed > 0) pending.RemoveRange(0, consumed);
+                } else {
+                    // 줄바꿈(\n) 단위 텍스트: 지속 연결에서 여러 메시지가 한 번에 오거나 나뉘어 올 수 있음
+                    var lines = new List<string>();
+                    int lineStart = 0;
+                    for (int i = 0; i < n; i++) {
+                        if (buffer[i] != (byte)'\n') continue;
+                        pending.AddRange(new ArraySegment<byte>(buffer, lineStart, i - lineStart));
+                        lines.Add(Encoding.UTF8.GetString(pending.ToArray()));
+                        pending.Clear();
+                        lineStart = i + 1;
+                    }
+                    pending.AddRange(new ArraySegment<byte>(buffer, lineStart, n - lineStart));
+                    if (eof) {
+                        // 구버전 클라이언트: 줄바꿈 없이 1건 보내고 연결을 닫음 -> 남은 바이트가 메시지 1건
+                        lines.Add(Encoding.UTF8.GetString(pending.ToArray()));
+                        pending.Clear();
+                    } else if (pending.Count > MaxPendingBytes) {
+                        pending.Clear();
+                    }
+
+                    foreach (var line in lines) {
+                        string rawData = line.Trim();
+                        if (string.IsNullOrEmpty(rawData) || rawData.StartsWith("GET") || rawData.Contains("HTTP")) continue;
+
+                        // 1. 데이터 파싱
+                        string camId = "Unknown";
+                        string lineStatus = "SAFE";
+                        string? path = null;
+
+                        if (rawData.Contains(':')) {
+                            string[] parts = rawData.Split(':', 3);
+                            camId = parts.Length > 0 ? parts[0] : "Unknown";
+                            lineStatus = parts.Length > 1 ? parts[1] : "SAFE";
+                            if (parts.Length > 2) path = parts[2];
+                        }
+                        messages.Add((camId, lineStatus, path, DateTime.Now, null));
+                    }
                 }
 
-                // 2. 메시지 생성
-                string displayMsg = status switch {
-                    "DANGER" => "🚨 침입자 감지!",
-                    "SAFE" => "✅ 이상 없음 (정기 보고)",
-                    "CONNECTED" => "🌐 장치 연결 성공",
-                    "DISCONNECTED" => "❌ 장치 연결 끊김",
-                    "CONTROL" => "🎮 조종 모드 (전체화면)",
-                    "MONITOR" => "🛡️ 감시 모드 (전체화면 해제)",
-                    _ => status
-                };
-
-                // 로그 길이 축소: 스냅샷 메시지는 UI 로그에 포함하지 않음
-                string finalLogEntry = $"[{status}] {displayMsg}";
-
-                // 3. Redis 버퍼링 및 웹소켓 전송
-                try {
-                    deviceId ??= "Unknown";
-                    bool isDanger = status.Equals("DANGER", StringComparison.OrdinalIgnoreCase);
-                    bool isCctv = deviceId.ToUpper().Contains("CCTV") || deviceId.ToUpper().Contains("WEBCAM");
-                    
-                    var newLog = new EventLog {
-                        CamId = deviceId,
-                        CreatedAt = DateTime.Now,
-                        CctvLog = isCctv ? finalLogEntry : null,
-                        RobotLog = !isCctv ? finalLogEntry : null,
-                        SnapshotPath = imagePath
+                foreach (var (deviceId, status, imagePath, createdAt, meta) in messages)
+                {
+                    // 2. 메시지 생성
+                    string displayMsg = status switch {
+                        "DANGER" => "🚨 침입자 감지!",
+                        "SAFE" => "✅ 이상 없음 (정기 보고)",
+                        "CONNECTED" => "🌐 장치 연결 성공",
+                        "DISCONNECTED" => "❌ 장치 연결 끊김",
+                        "CONTROL" => "🎮 조종 모드 (전체화면)",
+                        "MONITOR" => "🛡️ 감시 모드 (전체화면 해제)",
+                        "RTSP_CONNECTING" => "🔄 카메라 스트림 연결 중",
+                        "RTSP_LIVE" => "📶 카메라 스트림 정상",
+                        "RTSP_DEGRADED" => "⚠️ 카메라 스트림 불안정 (재연결 중)",
+                        "RTSP_DOWN" => "📴 카메라 스트림 끊김 (재시도 대기)",
+                        _ => status
                     };
 
-                    // 🚀 [핵심 수정 2] DB 직접 저장(Lock 유발) 코드 제거 -> Redis 큐(List)에 적재
-                    // Write-Back 패턴: 여기서 Redis에 넣으면, 별도의 Worker가 나중에 꺼내서 DB에 저장함
-                    string jsonLog = JsonSerializer.Serialize(newLog);
-                    string queueKey = isDanger ? RedisQueueConfig.DangerQueue : RedisQueueConfig.EventQueue;
-
-                    // DB 스톨 방지: backlog 임계치 이상이면 저중요 로그만 드랍 (DANGER는 보존)
-                    bool shouldEnqueue = true;
-                    if (!isDanger) {
-                        if (backlogCache.EventBacklog >= RedisQueueConfig.BacklogThreshold) {
-                            queueMetrics.IncrementDropped(status);
-                            shouldEnqueue = false;
+                    // 로그 길이 축소: 스냅샷 메시지는 UI 로그에 포함하지 않음
+                    string finalLogEntry = $"[{status}] {displayMsg}";
+
+                    // 3. Redis 버퍼링 및 웹소켓 전송
+                    try {
+                        bool isDanger = status.Equals("DANGER", StringComparison.OrdinalIgnoreCase);
+                        bool isCctv = deviceId.ToUpper().Contains("CCTV") || deviceId.ToUpper().Contains("WEBCAM");
+                    
+                        var newLog = new EventLog {
+                            CamId = deviceId,
+                            CreatedAt = createdAt,
+                            CctvLog = isCctv ? finalLogEntry : null,
+                            RobotLog = !isCctv ? finalLogEntry : null,
+                            SnapshotPath = imagePath
+                        };
+
+                        // 🚀 [핵심 수정 2] DB 직접 저장(Lock 유발) 코드 제거 -> Redis 큐(List)에 적재
+                        // Write-Back 패턴: 여기서 Redis에 넣으면, 별도의 Worker가 나중에 꺼내서 DB에 저장함
+                        string jsonLog = JsonSerializer.Serialize(newLog);
+                        string queueKey = isDanger ? RedisQueueConfig.DangerQueue : RedisQueueConfig.EventQueue;
+
+                        // DB 스톨 방지: backlog 임계치 이상이면 저중요 로그만 드랍 (DANGER는 보존)
+                        bool shouldEnqueue = true;
+                        if (!isDanger) {
+                            if (backlogCache.EventBacklog >= RedisQueueConfig.BacklogThreshold) {
+                                queueMetrics.IncrementDropped(status);
+                                shouldEnqueue = false;
+                            }
                         }
-                    }
 
-                    if (shouldEnqueue) {
-                        await redisDb.ListRightPushAsync(queueKey, jsonLog);
-                    }
+                        if (shouldEnqueue) {
+                            await redisDb.ListRightPushAsync(queueKey, jsonLog);
+                        }
 
-                    // 콘솔 출력
-                    Console.ForegroundColor = isDanger ? ConsoleColor.Red : ConsoleColor.Yellow;
-                    if (shouldEnqueue) {
-                        Console.WriteLine($"[{DateTime.Now:HH:mm:ss}] 🚀 [Redis 적재] {deviceId}: {displayMsg}");
-                    } else {
-                        Console.WriteLine($"[{DateTime.Now:HH:mm:ss}] 🚀 [Redis 드랍] {deviceId}: {displayMsg}");
-                    }
-                    if(!string.IsNullOrEmpty(imagePath)) Console.WriteLine($"   └─ 🖼️ 경로: {imagePath}");
-                    Console.ResetColor();
-
-                    // 4. 웹소켓 실시간 전송 (UI 업데이트용)
-                    var jsonPayload = JsonSerializer.Serialize(new {
-                        status = status,
-                        camId = deviceId,
-                        message = finalLogEntry,
-                        time = newLog.CreatedAt.ToString("HH:mm:ss"),
-                        snapshot = imagePath
-                    });
-
-                    List<IWebSocketConnection> socketsSnapshot;
-                    lock (socketLock) {
-                        socketsSnapshot = allSockets.ToList();
-                    }
-                    foreach (var socket in socketsSnapshot) {
-                        try {
-                            if (socket.IsAvailable) _ = socket.Send(jsonPayload);
-                            else {
+                        // 콘솔 출력
+                        Console.ForegroundColor = isDanger ? ConsoleColor.Red : ConsoleColor.Yellow;
+                        if (shouldEnqueue) {
+                            Console.WriteLine($"[{DateTime.Now:HH:mm:ss}] 🚀 [Redis 적재] {deviceId}: {displayMsg}");
+                        } else {
+                            Console.WriteLine($"[{DateTime.Now:HH:mm:ss}] 🚀 [Redis 드랍] {deviceId}: {displayMsg}");
+                        }
+                        if(!string.IsNullOrEmpty(imagePath)) Console.WriteLine($"   └─ 🖼️ 경로: {imagePath}");
+                        Console.ResetColor();
+
+                        // 4. 웹소켓 실시간 전송 (UI 업데이트용)
+                        var jsonPayload = JsonSerializer.Serialize(new {
+                            status = status,
+                            camId = deviceId,
+                            message = finalLogEntry,
+                            time = newLog.CreatedAt.ToString("HH:mm:ss"),
+                            snapshot = imagePath,
+                            meta = meta
+                        });
+
+                        List<IWebSocketConnection> socketsSnapshot;
+                        lock (socketLock) {
+                            socketsSnapshot = allSockets.ToList();
+                        }
+                        foreach (var socket in socketsSnapshot) {
+                            try {
+                                if (socket.IsAvailable) _ = socket.Send(jsonPayload);
+                                else {
+                                    lock (socketLock) {
+                                        allSockets.Remove(socket);
+                                    }
+                                }
+                            } catch {
                                 lock (socketLock) {
                                     allSockets.Remove(socket);
                                 }
-                            }
-                        } catch {
-                            lock (socketLock) {
-                                allSockets.Remove(socket);
-                            }
-                            try {
-                                socket.Close();
-                            } catch {
+                                try {
+                                    socket.Close();
+                                } catch {
+                                }
                             }
                         }
-                    }
 
-                } catch (Exception ex) {
-                    Console.WriteLine($"❌ [오류] {deviceId}: {ex.Message}");
+                    } catch (Exception ex) {
+                        Console.WriteLine($"❌ [오류] {deviceId}: {ex.Message}");
+                    }
                 }
+
+                if (eof) break;
             }
         }
         catch (Exception) { 
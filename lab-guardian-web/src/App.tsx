@@ -120,7 +120,7 @@ function App() {
   const [newIp, setNewIp] = useState('');
   const [newUsername, setNewUsername] = useState('');
   const [newPassword, setNewPassword] = useState('');
-  const [newStream, setNewStream] = useState<'sub' | 'main'>('sub');
+  const [newStream, setNewStream] = useState<'dual' | 'sub' | 'main'>('dual');
   const [newRtspPath, setNewRtspPath] = useState('');
   const [newRtspPort, setNewRtspPort] = useState('554');
   const [newRtspTransport, setNewRtspTransport] = useState<'auto' | 'tcp' | 'udp'>('auto');
@@ -385,7 +385,7 @@ function App() {
     setNewIp('');
     setNewUsername('');
     setNewPassword('');
-    setNewStream('sub');
+    setNewStream('dual');
     setNewRtspPath('');
     setNewRtspPort('554');
     setNewRtspTransport('auto');
@@ -415,7 +415,7 @@ function App() {
           setNewIp('');
           setNewUsername('');
           setNewPassword('');
-          setNewStream('sub');
+          setNewStream('dual');
           setCctvMode('rtsp');
           setRegisterError('');
           setIsRegistering(false);
@@ -453,7 +453,7 @@ function App() {
         setNewIp('');
         setNewUsername('');
         setNewPassword('');
-        setNewStream('sub');
+        setNewStream('dual');
         setNewRtspPath('');
         setNewRtspPort('554');
         setNewRtspTransport('auto');
@@ -807,9 +807,10 @@ function App() {
                 variant="filled"
                 label="Stream"
                 value={newStream}
-                onChange={(e) => setNewStream(e.target.value as 'sub' | 'main')}
+                onChange={(e) => setNewStream(e.target.value as 'dual' | 'sub' | 'main')}
                 sx={{ mt: 1 }}
               >
+                <MenuItem value="dual">dual</MenuItem>
                 <MenuItem value="sub">sub</MenuItem>
                 <MenuItem value="main">main</MenuItem>
               </TextField>